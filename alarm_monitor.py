@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+즉시 전송할 알람 이벤트 판정
+일반 샘플/백로그와 따로 알람 토픽으로 바로 보내야 하는 상황을 샘플마다 확인
+
+- 온도 상태 전환: warm/critical_* 진입(구간 간 이동 포함), 정상 범위로 복귀
+- 센서 끊김: 온도 값이 ALARM_SENSOR_LOST_SECONDS 넘게 갱신되지 않거나 채널이 failed, 복구
+- 지오펜스: 원형 구역(GEOFENCES) 진입/이탈 (경계 부근 깜빡임 방지용 여유 거리)
+"""
+
+import logging
+import math
+import time
+from config import (
+    ALARM_STATUSES,
+    ALARM_SENSOR_LOST_SECONDS,
+    GEOFENCES,
+    GEOFENCE_HYSTERESIS_M,
+)
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+
+# 이벤트 종류별 심각도 (상태 전환은 진입한 상태로 결정)
+SEVERITY = {
+    'critical_hot': 'critical',
+    'critical_cold': 'critical',
+    'warm': 'warning',
+    'cold': 'warning',
+    'sensor_lost': 'critical',
+}
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """두 좌표 사이 거리 (미터, haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class AlarmMonitor:
+    """상태 전환/센서 끊김/지오펜스 알람 판정
+
+    update()는 샘플마다 호출하고 새로 발생한 알람 이벤트 목록을 반환합니다.
+    이벤트: {'event', 'severity', 'channel', 'timestamp', 'status', 'previous', 'temperature',
+            'latitude', 'longitude', 'detail'}
+    """
+
+    def __init__(self, alarm_statuses=ALARM_STATUSES, sensor_lost_seconds=ALARM_SENSOR_LOST_SECONDS,
+                 geofences=GEOFENCES, hysteresis_m=GEOFENCE_HYSTERESIS_M, now=None):
+        self.alarm_statuses = set(alarm_statuses)
+        self.sensor_lost_seconds = sensor_lost_seconds
+        self.geofences = geofences
+        self.hysteresis_m = hysteresis_m
+        self.started_at = now or time.time()
+
+        self.status = None          # 마지막으로 확인한 온도 상태 (unknown 제외)
+        self.lost = {}              # {채널: 끊김 여부}
+        self.inside = {}            # {지오펜스 이름: 안쪽 여부}
+
+    def update(self, status, temperature=None, temperature_age=None, latitude=None, longitude=None,
+               channels=None, now=None):
+        now = now or time.time()
+        events = []
+        context = {'timestamp': now, 'temperature': temperature, 'latitude': latitude, 'longitude': longitude}
+
+        self._check_status(status, context, events)
+
+        # 단일 센서는 'main', 다중 채널은 채널별 health/age로 판단
+        if channels:
+            for name, reading in channels.items():
+                lost = reading.get('health') == 'failed' or self._stale(reading.get('age'), now)
+                self._check_sensor(name, lost, context, events)
+        else:
+            self._check_sensor('main', self._stale(temperature_age, now), context, events)
+
+        if latitude is not None and longitude is not None:
+            self._check_geofences(latitude, longitude, context, events)
+
+        for event in events:
+            log = logger.warning if event['severity'] in ('critical', 'warning') else logger.info
+            log(f"알람: {event['event']} ({event['detail']})")
+        return events
+
+    def _stale(self, age, now):
+        if age is None:
+            # 시작 직후에는 첫 값을 기다림
+            return now - self.started_at > self.sensor_lost_seconds
+        return age > self.sensor_lost_seconds
+
+    def _event(self, event, severity, context, channel=None, status=None, previous=None, detail=None):
+        return {
+            'event': event,
+            'severity': severity,
+            'channel': channel,
+            'status': status,
+            'previous': previous,
+            'detail': detail,
+            **context
+        }
+
+    def _check_status(self, status, context, events):
+        if status is None or status == 'unknown' or status == self.status:
+            return
+        previous, self.status = self.status, status
+
+        if status in self.alarm_statuses:
+            events.append(self._event('status_change', SEVERITY.get(status, 'warning'), context,
+                                      status=status, previous=previous, detail=f"{previous} -> {status}"))
+        elif previous in self.alarm_statuses:
+            events.append(self._event('status_recovered', 'info', context,
+                                      status=status, previous=previous, detail=f"{previous} -> {status}"))
+
+    def _check_sensor(self, channel, lost, context, events):
+        was_lost = self.lost.get(channel, False)
+        if lost == was_lost:
+            return
+        self.lost[channel] = lost
+        if lost:
+            events.append(self._event('sensor_lost', SEVERITY['sensor_lost'], context, channel=channel,
+                                      detail=f"{channel} 온도 값 없음 ({self.sensor_lost_seconds:.0f}초 초과)"))
+        else:
+            events.append(self._event('sensor_restored', 'info', context, channel=channel,
+                                      detail=f"{channel} 온도 값 복구"))
+
+    def _check_geofences(self, latitude, longitude, context, events):
+        for fence in self.geofences:
+            name = fence['name']
+            distance = distance_m(latitude, longitude, fence['latitude'], fence['longitude'])
+            was_inside = self.inside.get(name)
+            if was_inside is None:
+                # 첫 위치는 기준 상태로만 사용 (시작 위치에서 진입 알람을 내지 않음)
+                self.inside[name] = distance <= fence['radius_m']
+                continue
+
+            if was_inside and distance > fence['radius_m'] + self.hysteresis_m:
+                self.inside[name] = False
+                events.append(self._event('geofence_exit', 'info', context, channel=name,
+                                          detail=f"{name} 이탈 ({distance:.0f}m)"))
+            elif not was_inside and distance < fence['radius_m'] - self.hysteresis_m:
+                self.inside[name] = True
+                events.append(self._event('geofence_enter', 'info', context, channel=name,
+                                          detail=f"{name} 진입 ({distance:.0f}m)"))
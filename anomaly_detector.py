@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+온도 이상 패턴 감지 (문 열림, 제상, 압축기 정지 등)
+고정 온도 구간으로는 잡히지 않는 급격한 변화/추세 변화를 채널별로 감지
+
+- 샘플을 block_seconds 단위 평균으로 묶고, 블록 평균 온도와 변화율(°C/분) 두 흐름을 사용
+- 롤링 z-score: 지수 가중 평균/분산 기준으로 온도 수준과 변화율이 평소와 얼마나 다른지
+- CUSUM: 변화율 z-score 누적합으로 서서히 시작되는 상승/하강 감지
+- 채널당 상수 메모리 (창 버퍼 없음, 누적값 몇 개만 유지)
+
+이벤트 종류:
+    sudden_rise / sudden_drop       변화율 급변 (문 열림, 제상 시작/종료)
+    sustained_rise / sustained_drop 변화율이 평소보다 계속 높음/낮음 (압축기 정지, 냉각 과다)
+    level_high / level_low          온도 수준이 평소 범위를 벗어남
+"""
+
+import logging
+import math
+import time
+from config import (
+    ANOMALY_BLOCK_SECONDS,
+    ANOMALY_ALPHA,
+    ANOMALY_Z_THRESHOLD,
+    ANOMALY_CUSUM_DRIFT,
+    ANOMALY_CUSUM_THRESHOLD,
+    ANOMALY_MIN_TEMP_SIGMA,
+    ANOMALY_MIN_RATE_SIGMA,
+    ANOMALY_WARMUP_BLOCKS,
+    ANOMALY_COOLDOWN,
+    TEMP_EXCURSION_MAX_GAP,
+)
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_TYPES = (
+    'sudden_rise', 'sudden_drop',
+    'sustained_rise', 'sustained_drop',
+    'level_high', 'level_low',
+)
+
+
+class EWStats:
+    """지수 가중 평균/분산 (상수 메모리)
+
+    fixed_mean을 주면 평균은 고정하고 분산만 추정 (정상 상태 변화율처럼 기대값이 0인 흐름)
+    """
+
+    def __init__(self, alpha, fixed_mean=None):
+        self.alpha = alpha
+        self.fixed = fixed_mean is not None
+        self.mean = fixed_mean
+        self.var = None
+
+    def zscore(self, value, min_sigma):
+        if self.var is None:
+            return 0.0
+        return (value - self.mean) / max(math.sqrt(self.var), min_sigma)
+
+    def update(self, value):
+        if self.var is None:
+            if not self.fixed:
+                self.mean = value
+            self.var = (value - self.mean) ** 2 if self.fixed else 0.0
+            return
+        diff = value - self.mean
+        if self.fixed:
+            self.var += self.alpha * (diff * diff - self.var)
+            return
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1.0 - self.alpha) * (self.var + diff * increment)
+
+    @property
+    def sigma(self):
+        return math.sqrt(self.var) if self.var is not None else None
+
+
+class AnomalyDetector:
+    """온도 채널 하나의 이상 패턴 감지기
+
+    update(temperature, now)는 블록이 끝날 때 감지된 이벤트 목록을 반환합니다 (없으면 빈 목록).
+    이벤트: {'event', 'channel', 'timestamp', 'temperature', 'rate_per_minute', 'score'}
+    """
+
+    def __init__(self, channel='main', block_seconds=ANOMALY_BLOCK_SECONDS, alpha=ANOMALY_ALPHA,
+                 z_threshold=ANOMALY_Z_THRESHOLD, cusum_drift=ANOMALY_CUSUM_DRIFT,
+                 cusum_threshold=ANOMALY_CUSUM_THRESHOLD, min_temp_sigma=ANOMALY_MIN_TEMP_SIGMA,
+                 min_rate_sigma=ANOMALY_MIN_RATE_SIGMA, warmup_blocks=ANOMALY_WARMUP_BLOCKS,
+                 cooldown=ANOMALY_COOLDOWN, max_gap=TEMP_EXCURSION_MAX_GAP):
+        self.channel = channel
+        self.block_seconds = block_seconds
+        self.z_threshold = z_threshold
+        self.cusum_drift = cusum_drift
+        self.cusum_threshold = cusum_threshold
+        self.min_temp_sigma = min_temp_sigma
+        self.min_rate_sigma = min_rate_sigma
+        self.warmup_blocks = warmup_blocks
+        self.cooldown = cooldown
+        self.max_gap = max_gap
+
+        self.temperature_stats = EWStats(alpha)
+        # 냉장 칸은 온도를 일정하게 유지하므로 평소 변화율 기대값은 0 (시동 직후 수렴 구간에 끌려가지 않도록)
+        self.rate_stats = EWStats(alpha, fixed_mean=0.0)
+        self.reset()
+
+    def reset(self):
+        """블록/추세 상태 초기화 (평소 통계는 유지)"""
+        self.block_start = None
+        self.block_sum = 0.0
+        self.block_count = 0
+        self.last_sample_time = None
+        self.previous_mean = None
+        self.cusum_high = 0.0
+        self.cusum_low = 0.0
+        self.blocks = 0
+        self.last_event_time = {}
+        self.event_counts = {event: 0 for event in ANOMALY_TYPES}
+
+    def update(self, temperature, now=None):
+        """샘플 하나 반영 -> 이벤트 목록"""
+        if temperature is None:
+            return []
+        if now is None:
+            now = time.time()
+
+        if self.last_sample_time is not None and now - self.last_sample_time > self.max_gap:
+            # 센서가 끊겼던 구간을 가로지르는 변화율은 계산하지 않음
+            self.block_start = None
+            self.previous_mean = None
+            self.cusum_high = self.cusum_low = 0.0
+        self.last_sample_time = now
+
+        events = []
+        if self.block_start is None:
+            self.block_start = now
+        elif now - self.block_start >= self.block_seconds and self.block_count:
+            events = self._close_block(self.block_sum / self.block_count, now)
+            self.block_start = now
+            self.block_sum = 0.0
+            self.block_count = 0
+
+        self.block_sum += temperature
+        self.block_count += 1
+        return events
+
+    def _close_block(self, mean, now):
+        previous, self.previous_mean = self.previous_mean, mean
+        self.blocks += 1
+        temperature_z = self.temperature_stats.zscore(mean, self.min_temp_sigma)
+        self.temperature_stats.update(mean)
+        if previous is None:
+            return []
+
+        rate = (mean - previous) / self.block_seconds * 60.0
+        rate_z = self.rate_stats.zscore(rate, self.min_rate_sigma)
+        sudden = abs(rate_z) > self.z_threshold
+        if sudden and self.blocks > self.warmup_blocks:
+            # 급변 블록은 임계값 위치로 잘라서 반영 (한 번의 급변으로 기준이 무뎌지지 않도록)
+            sigma = max(self.rate_stats.sigma, self.min_rate_sigma)
+            self.rate_stats.update(self.rate_stats.mean + math.copysign(self.z_threshold * sigma, rate_z))
+        else:
+            self.rate_stats.update(rate)
+
+        self.cusum_high = max(0.0, self.cusum_high + rate_z - self.cusum_drift)
+        self.cusum_low = max(0.0, self.cusum_low - rate_z - self.cusum_drift)
+
+        if self.blocks <= self.warmup_blocks:
+            # 평소 통계가 쌓이기 전에는 감지하지 않음
+            self.cusum_high = self.cusum_low = 0.0
+            return []
+
+        events = []
+        detail = (mean, rate, now)
+        if sudden:
+            self._emit(events, 'sudden_rise' if rate_z > 0 else 'sudden_drop', rate_z, *detail)
+        if self.cusum_high > self.cusum_threshold:
+            self._emit(events, 'sustained_rise', self.cusum_high, *detail)
+            self.cusum_high = 0.0
+        if self.cusum_low > self.cusum_threshold:
+            self._emit(events, 'sustained_drop', self.cusum_low, *detail)
+            self.cusum_low = 0.0
+        if abs(temperature_z) > self.z_threshold:
+            self._emit(events, 'level_high' if temperature_z > 0 else 'level_low', temperature_z, *detail)
+        return events
+
+    def _emit(self, events, event, score, temperature, rate, now):
+        # 같은 종류 이벤트는 cooldown 동안 한 번만 (지속되는 변화가 매 블록 이벤트가 되지 않도록)
+        last = self.last_event_time.get(event)
+        if last is not None and now - last < self.cooldown:
+            return
+        self.last_event_time[event] = now
+        self.event_counts[event] += 1
+        events.append({
+            'event': event,
+            'channel': self.channel,
+            'timestamp': now,
+            'temperature': round(temperature, 3),
+            'rate_per_minute': round(rate, 3),
+            'score': round(score, 2)
+        })
+        logger.info(f"온도 이상 감지 [{self.channel}] {event}: {temperature:.2f}°C, {rate:+.2f}°C/분 (점수 {score:.1f})")
+
+    def get_state(self):
+        return {
+            'channel': self.channel,
+            'blocks': self.blocks,
+            'temperature_mean': self.temperature_stats.mean,
+            'temperature_sigma': self.temperature_stats.sigma,
+            'rate_sigma': self.rate_stats.sigma,
+            'cusum_high': self.cusum_high,
+            'cusum_low': self.cusum_low,
+            'event_counts': dict(self.event_counts)
+        }
+
+
+# ━━━━━ 재현 가능한 평가 ━━━━━
+
+# 시나리오별 정답: 시작 후 이 시간(초) 안에 나와야 하는 이벤트 종류
+EXPECTED_EVENTS = {
+    'compressor_failure': ({'sustained_rise', 'sudden_rise'}, 300.0),
+    'door_open': ({'sudden_rise'}, 120.0),
+}
+# slow_drift(10분에 0.5°C)는 급변이 아니므로 감지 대상이 아님 (temperature_forecast.py가 담당), 오경보만 집계
+
+
+def replay(samples, detector=None):
+    """(timestamp, temperature) 순서열을 감지기에 통과시켜 이벤트 목록 반환"""
+    detector = detector or AnomalyDetector()
+    events = []
+    for timestamp, temperature in samples:
+        events.extend(detector.update(temperature, timestamp))
+    return events
+
+
+def simulate_scenario(scenario, duration=3600.0, sample_interval=0.1, onset=600.0, seed=None):
+    """TemperatureSimulator 시나리오를 필터 후 (timestamp, temperature) 순서열로 생성"""
+    import random
+    from temperature_filter import TemperatureFilter
+    from temperature_simulator import TemperatureSimulator
+
+    if seed is not None:
+        random.seed(seed)
+    simulator = TemperatureSimulator(scenario=scenario, scenario_onset=onset, sample_interval=sample_interval)
+    temp_filter = TemperatureFilter()
+    return [(step * sample_interval, temp_filter.update(simulator.read()))
+            for step in range(int(duration / sample_interval))]
+
+
+def evaluate(scenarios=(None, 'compressor_failure', 'door_open', 'slow_drift'), seeds=range(5), duration=3600.0, onset=600.0):
+    """시나리오 x 시드마다 감지 지연과 오경보를 집계
+
+    Returns:
+        시나리오별 {'detected', 'runs', 'mean_delay', 'false_alarms_per_hour'}
+        (오경보: 시나리오 시작 전 이벤트, 감지 대상이 아닌 시나리오는 모든 이벤트)
+    """
+    results = {}
+    for scenario in scenarios:
+        expected, deadline = EXPECTED_EVENTS.get(scenario, (set(), 0.0))
+        detected = 0
+        delays = []
+        false_alarms = 0
+        clean_seconds = 0.0
+
+        for seed in seeds:
+            samples = simulate_scenario(scenario, duration=duration, onset=onset, seed=seed)
+            events = replay(samples)
+            clean_until = onset if scenario in EXPECTED_EVENTS else duration
+            clean_seconds += clean_until
+
+            false_alarms += sum(1 for event in events if event['timestamp'] < clean_until)
+            hits = [event['timestamp'] - onset for event in events
+                    if event['event'] in expected and onset <= event['timestamp'] <= onset + deadline]
+            if hits:
+                detected += 1
+                delays.append(min(hits))
+
+        results[scenario or 'normal'] = {
+            'detected': detected if scenario in EXPECTED_EVENTS else None,
+            'runs': len(seeds),
+            'mean_delay': sum(delays) / len(delays) if delays else None,
+            'false_alarms_per_hour': false_alarms / clean_seconds * 3600.0 if clean_seconds else 0.0
+        }
+    return results
+
+
+def replay_from_db(db_path, since=None):
+    """DB에 저장된 온도 이력을 다시 돌려 감지 결과 출력 (설정값 조정용)"""
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    try:
+        query = "SELECT timestamp, temperature FROM gps_temperature_data WHERE temperature IS NOT NULL"
+        params = ()
+        if since is not None:
+            query += " AND timestamp >= ?"
+            params = (since,)
+        rows = conn.execute(query + " ORDER BY timestamp", params).fetchall()
+    finally:
+        conn.close()
+
+    events = replay(rows)
+    for event in events:
+        print(f"{event['timestamp']:.1f} {event['event']:<15} {event['temperature']:.2f}°C "
+              f"{event['rate_per_minute']:+.2f}°C/분 점수 {event['score']}")
+    print(f"샘플 {len(rows)}개, 이벤트 {len(events)}개")
+    return events
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import DB_PATH
+
+    parser = argparse.ArgumentParser(description="온도 이상 감지 평가 (시뮬레이터 시나리오 또는 저장된 이력)")
+    parser.add_argument('--db', nargs='?', const=DB_PATH, help="저장된 이력 재생 (경로 생략 시 기본 DB)")
+    parser.add_argument('--since', type=float, help="이 epoch 초 이후 데이터만 재생")
+    parser.add_argument('--seeds', type=int, default=5, help="시나리오당 반복 횟수")
+    args = parser.parse_args()
+
+    if args.db:
+        replay_from_db(args.db, args.since)
+    else:
+        for name, result in evaluate(seeds=range(args.seeds)).items():
+            detected = f"{result['detected']}/{result['runs']}" if result['detected'] is not None else "-"
+            delay = f"{result['mean_delay']:.0f}초" if result['mean_delay'] is not None else "-"
+            print(f"{name:<20} 감지: {detected:>5}  평균 지연: {delay:>6}  "
+                  f"오경보: {result['false_alarms_per_hour']:.2f}회/시간")
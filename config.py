@@ -9,6 +9,23 @@ DB_PATH = "truck_gps.db"
 GPS_PORT = "/dev/ttyACM0"  # NK-GPS-U 기본 포트
 GPS_BAUDRATE = 9600        # NK-GPS-U 기본 통신 속도 (9600 또는 38400)
 
+# GPS 핫플러그 재연결 설정
+GPS_PORT_PATTERNS = ["/dev/ttyACM*", "/dev/ttyUSB*"]  # GPS_PORT가 없을 때 검색할 포트
+GPS_USB_IDS = [          # GPS 수신기 USB (VID, PID) - 비워두면 패턴에 맞는 모든 포트 시도
+    (0x1546, 0x01A7),    # u-blox 7 (NK-GPS-U)
+    (0x1546, 0x01A8),    # u-blox 8
+    (0x067B, 0x2303),    # Prolific PL2303 (BU-353S4)
+    (0x10C4, 0xEA60),    # Silicon Labs CP210x
+]
+GPS_RECONNECT_BASE_DELAY = 1.0   # 재연결 최초 대기 (초)
+GPS_RECONNECT_MAX_DELAY = 30.0   # 재연결 최대 대기 (초, 지수 백오프 상한)
+
+# 원시 NMEA 캡처 설정 (문제 재현/재생용, nmea_capture.py)
+GPS_CAPTURE_ENABLED = False                       # True면 수신 원시 데이터를 압축 파일로 저장
+GPS_CAPTURE_DIR = "nmea_capture"                  # 캡처 파일 저장 디렉터리
+GPS_CAPTURE_MAX_FILE_BYTES = 5 * 1024 * 1024      # 파일 하나의 최대 크기 (압축 후, 초과 시 회전)
+GPS_CAPTURE_MAX_TOTAL_BYTES = 100 * 1024 * 1024   # 전체 캡처 용량 한도 (초과 시 오래된 파일 삭제)
+
 # 데이터 수집 설정
 # GPS가 초당 1개만 보내더라도 마지막 데이터를 반복 저장
 SAMPLE_RATE = 10  # 초당 샘플 수
@@ -18,10 +35,62 @@ INTERVAL = 1.0 / SAMPLE_RATE  # 샘플 간격 (0.1초)
 RETENTION_SECONDS = 1200  # SQLite 저장 데이터 보관 기간(초) = 20분
 
 # 온도 센서 설정
-TEMP_SENSOR_TYPE = "MCP9600"  # MCP9600, DS18B20, DHT22, ANALOG 등
+TEMP_SENSOR_TYPE = "MCP9600"  # MCP9600, DS18B20, DHT22, GY21 등 (sensor_drivers에 등록된 이름)
 # MCP9600: I2C 열전대 증폭기 (냉장고 온도 측정에 적합, 넓은 온도 범위)
 # DS18B20: 1-Wire 디지털 온도 센서 (가장 흔함, 방수 가능)
 # DHT22: 온습도 센서
+# GY21: I2C 온습도 센서 (SHT20 기반)
+
+# 추가 센서 드라이버 등록 (sensor_drivers 패키지)
+# {"센서 타입": "모듈:클래스"} 형식, 클래스는 sensor_drivers.base.SensorDriver 상속
+# 예: {"MAX31865": "my_drivers.max31865:MAX31865Driver"}
+TEMP_SENSOR_DRIVERS = {}
+
+# 다중 온도 채널 설정 (sensor_manager.py)
+# 비어 있으면 단일 온도 센서를 사용합니다.
+# sensor_type: MCP9600, DS18B20, DHT22, GY21, SIMULATOR / rate: 초당 읽기 횟수 / timeout: 읽기 제한 시간(초)
+TEMP_CHANNELS = [
+    # {'name': 'compartment_1', 'sensor_type': 'MCP9600', 'rate': 10, 'timeout': 0.5, 'primary': True},
+    # {'name': 'compartment_2', 'sensor_type': 'GY21', 'rate': 5, 'timeout': 0.5},
+    # {'name': 'door', 'sensor_type': 'DS18B20', 'rate': 1, 'timeout': 2.0},
+    # {'name': 'ambient', 'sensor_type': 'DHT22', 'rate': 0.5, 'timeout': 3.0},
+]
+SENSOR_FAILURE_THRESHOLD = 3      # 연속 실패 시 채널 상태를 failed로 표시
+SENSOR_RECONNECT_INTERVAL = 30    # 연결 실패 채널 재연결 간격 (초)
+
+# 센서 읽기 감시 설정 (sensor_watchdog.py)
+# 격리 모드에서는 드라이버를 별도 프로세스에서 실행하고, 제한 시간을 넘기면 프로세스를 강제 종료 후 재시작
+# 다중 채널은 채널 설정에 'isolated': True 를 추가
+TEMP_SENSOR_ISOLATED = False      # 단일 온도 센서를 격리 프로세스에서 읽기
+TEMP_READ_TIMEOUT = 1.0           # 읽기 1회 제한 시간 (초)
+TEMP_WORKER_START_TIMEOUT = 10.0  # 작업 프로세스 시작(센서 연결) 제한 시간 (초)
+
+# MCP9600 설정
+MCP9600_ADDRESSES = [0x67, 0x60, 0x66, 0x61, 0x65, 0x62, 0x64, 0x63]  # 탐색할 I2C 주소
+MCP9600_FREQUENCIES = [100000, 10000, 400000]   # 탐색할 I2C 버스 주파수 (Hz)
+MCP9600_THERMOCOUPLE_TYPE = "K"                 # 열전대 타입 (K, J, T, N, S, E, B, R)
+MCP9600_ADC_RESOLUTION = 16                     # ADC 분해능 비트 (18/16/14/12) - 16비트 변환 80ms로 10Hz 샘플링에 맞춤
+MCP9600_FILTER_COEFFICIENT = 2                  # 온칩 디지털 필터 계수 (0=끔, 1~7 클수록 강한 평활)
+MCP9600_CACHE_FILE = "mcp9600_cache.json"       # 발견한 주소/주파수 저장 파일 (재시작 시 탐색 생략)
+MCP9600_STATS_INTERVAL = 600                    # 읽기 통계 로그 주기 (읽기 횟수)
+
+# DS18B20 (1-Wire) 설정
+W1_SYSFS_ROOT = "/sys/bus/w1/devices"   # 1-Wire sysfs 경로 (테스트 시 가짜 디렉터리로 변경 가능)
+DS18B20_CONVERSION_TIMEOUT = 1.0        # 일괄 변환 완료 대기 한도 (초, 12비트 변환 750ms)
+
+# GY-21 (SHT20) 설정
+GY21_ADDRESSES = [0x40, 0x41]      # 우선 시도할 I2C 주소 (응답 없으면 전체 버스 검색)
+GY21_CONVERSION_TIME = 0.085       # 14비트 온도 변환 시간 (초)
+GY21_RESCAN_AFTER_FAILURES = 5     # 연속 실패 시 주소 재검색 기준
+
+# 온도 필터 설정 (temperature_filter.py)
+# 진동/전자파로 튀는 값을 상태 판단 전에 제거 (원시값은 temperature_raw 컬럼에 함께 저장)
+# 단계: 'median', 'hampel', 'ewma'를 적은 순서대로 적용, 빈 목록이면 필터 사용 안 함
+TEMP_FILTER_STAGES = ['hampel']
+TEMP_FILTER_WINDOW = 7              # 중앙값/Hampel 창 크기 (샘플 수)
+TEMP_FILTER_HAMPEL_SIGMAS = 3.0     # 이상치 판정 기준 (MAD 환산 표준편차의 배수)
+TEMP_FILTER_MIN_DEVIATION = 0.5     # 이 값(°C) 이하 편차는 이상치로 보지 않음 (값이 일정해 MAD=0일 때 대비)
+TEMP_FILTER_EWMA_ALPHA = 0.3        # EWMA 평활 계수 (0~1, 클수록 최근 값 비중 큼)
 
 # 온도 상태 범위 설정 (백신 운송 기준)
 TEMP_RANGES = {
@@ -32,6 +101,45 @@ TEMP_RANGES = {
     'critical_hot': (8.0, float('inf'))
 }
 
+# 온도 이탈(excursion) 판정 설정 (excursion_engine.py)
+TEMP_EXCURSION_BANDS = ['critical_cold', 'critical_hot']   # 적정 범위(2~8°C) 밖으로 보는 상태
+TEMP_STATUS_HYSTERESIS = 0.2        # 구간 경계를 이 값(°C)만큼 더 넘어가야 상태 변경 (경계 부근 깜빡임 방지)
+TEMP_EXCURSION_MIN_DURATION = 5.0   # 이 시간(초) 이상 지속된 이탈만 이벤트로 기록
+TEMP_EXCURSION_MAX_GAP = 10.0       # 샘플 간격이 이보다 길면(초) 그 시간은 unknown으로 집계
+TRIP_RESUME_SECONDS = 600           # 재시작 시 마지막 상태 저장 후 이 시간(초) 안이면 같은 운행으로 이어서 집계
+
+# 즉시 전송 알람 설정 (alarm_monitor.py)
+ALARM_STATUSES = ['warm', 'critical_hot', 'critical_cold']   # 진입 시 알람을 보내는 온도 상태
+ALARM_SENSOR_LOST_SECONDS = 5.0     # 온도 값이 이 시간(초) 넘게 갱신되지 않으면 센서 끊김 알람
+# 지오펜스 (원형): [{'name': '물류센터', 'latitude': 37.5665, 'longitude': 126.9780, 'radius_m': 300}]
+GEOFENCES = []
+GEOFENCE_HYSTERESIS_M = 20.0        # 경계에서 이 거리(m)만큼 더 들어가거나 나가야 진입/이탈로 판단
+
+# 평균 동역학 온도(MKT) / 안정성 예산 설정 (stability.py)
+MKT_ACTIVATION_ENERGY = 83.144      # 활성화 에너지 (kJ/mol, USP/ICH 기본값)
+SHIPMENT_ID = "SHIP001"             # 배송 ID (여러 운행에 걸쳐 예산을 누적, 새 배송 시 변경)
+STABILITY_BUDGET_HOURS = 72.0       # 허용 안정성 예산 (기준 온도 환산 시간)
+STABILITY_BUDGET_REFERENCE = 25.0   # 예산 기준 온도 (°C, 제조사 안정성 자료 기준)
+STABILITY_BUDGET_THRESHOLD = 8.0    # 이 온도(°C)를 넘는 시간만 예산을 소모
+
+# 온도 이탈 예측 설정 (temperature_forecast.py)
+FORECAST_WINDOWS = [120, 600]       # 추세를 맞출 최근 구간 길이 (초, 짧은 창: 급변 / 긴 창: 완만한 상승)
+FORECAST_HORIZON = 1800             # 이 시간(초) 안에 이탈할 것으로 예측될 때만 보고
+FORECAST_MIN_CONFIDENCE = 0.99      # 추세(기울기 부호) 신뢰도 최소값
+FORECAST_MIN_SLOPE = 0.05           # 이보다 완만한 추세(°C/분)는 무시 (필터 후 잔차가 자기상관이라 신뢰도만으로는 부족)
+FORECAST_MIN_SAMPLES = 30           # 창에 이 개수 이상 샘플이 있어야 예측
+
+# 온도 이상 패턴 감지 설정 (anomaly_detector.py)
+ANOMALY_BLOCK_SECONDS = 15.0        # 이 시간(초) 단위 평균 온도로 변화율 계산
+ANOMALY_ALPHA = 0.02                # 평소 통계(평균/분산) 지수 가중치 (블록당, 약 50블록 기억)
+ANOMALY_Z_THRESHOLD = 5.0           # 온도/변화율 z-score가 이보다 크면 이벤트
+ANOMALY_CUSUM_DRIFT = 0.5           # CUSUM 허용 편차 (z-score 단위)
+ANOMALY_CUSUM_THRESHOLD = 8.0       # CUSUM 누적값이 이보다 크면 지속 상승/하강 이벤트
+ANOMALY_MIN_TEMP_SIGMA = 0.1        # 온도 표준편차 하한 (°C, 매우 안정적일 때 과민 반응 방지)
+ANOMALY_MIN_RATE_SIGMA = 0.1        # 변화율 표준편차 하한 (°C/분)
+ANOMALY_WARMUP_BLOCKS = 8           # 이 블록 수만큼 평소 통계를 쌓은 뒤 감지 시작
+ANOMALY_COOLDOWN = 120.0            # 같은 종류 이벤트 최소 간격 (초)
+
 # 서버 전송 설정 (MySQL)
 SERVER_HOST = "192.168.0.3"  # 서버 호스트
 SERVER_PORT = 3306  # 서버 포트
@@ -51,14 +159,82 @@ MQTT_TOPIC = "truck/gps_temp"
 MQTT_CLIENT_ID = "truck_gps_client"
 MQTT_QOS = 1
 MQTT_RETAIN = False
+MQTT_INFLIGHT_WINDOW = 20  # PUBACK을 기다리며 동시에 보낼 수 있는 최대 메시지 수
+MQTT_ACK_TIMEOUT = 30.0    # 이 시간(초) 안에 PUBACK이 없으면 다시 전송
+SEND_CURSOR_FLUSH_INTERVAL = 5.0  # 전송 완료 위치(send_cursors)를 DB에 기록하는 간격 (초), 재시작 시 그 사이 샘플은 다시 전송
+MQTT_KEEPALIVE = 60
+MQTT_CLEAN_SESSION = False        # 지속 세션: 재연결해도 브로커가 구독/미완료 메시지를 유지
+MQTT_CONNECT_TIMEOUT = 10.0       # CONNACK을 기다리는 최대 시간 (초)
+MQTT_RECONNECT_MIN_DELAY = 1.0    # 재연결 백오프 시작 간격 (초), 실패할 때마다 2배
+MQTT_RECONNECT_MAX_DELAY = 120.0  # 재연결 백오프 최대 간격 (초)
+MQTT_RECONNECT_JITTER = 0.5       # 백오프 간격을 최대 이 비율만큼 무작위로 줄임 (동시 재연결 분산)
+MQTT_OFFLINE_QUEUE_SIZE = 1000    # 연결이 없을 때 보관할 최대 발행 수 (넘치면 오래된 것부터 버림)
+MQTT_SPOOL_PATH = "mqtt_spool.log"        # 발행 실패 메시지를 보관하는 디스크 스풀 (mqtt_spool.py)
+MQTT_SPOOL_MAX_BYTES = 20 * 1024 * 1024   # 스풀 최대 크기 (바이트)
+MQTT_SPOOL_DROP_POLICY = 'drop_oldest'    # 한도 초과 시: 'drop_oldest'(오래된 것 버림), 'drop_newest'(새 것 거부)
+MQTT_PAYLOAD_CODEC = 'json'        # 샘플 payload 형식: 'json'(기존), 'binary', 'msgpack' (payload_codec.py)
+MQTT_PAYLOAD_COMPRESSION = 'none'  # 샘플 payload 압축: 'none', 'zlib', 'zstd' (묶음이 클수록 효과적)
+MQTT_EXCURSION_TOPIC = MQTT_TOPIC + "/excursions"  # 온도 이탈 시작/종료 이벤트 토픽
+MQTT_STABILITY_TOPIC = MQTT_TOPIC + "/stability"   # MKT/안정성 예산 상태 토픽 (retain)
+MQTT_ANOMALY_TOPIC = MQTT_TOPIC + "/anomalies"     # 온도 이상 패턴 이벤트 토픽 (문 열림, 압축기 정지 등)
+MQTT_ALARM_TOPIC = MQTT_TOPIC + "/alarms"          # 즉시 전송 알람 토픽 (상태 전환, 센서 끊김, 지오펜스)
+MQTT_ALARM_QOS = 1                                  # 알람 QoS (1: 최소 1회, 2: 정확히 1회, 서버는 id로 중복 제거)
+STABILITY_PUBLISH_INTERVAL = 60     # MKT/안정성 예산 상태 전송 간격 (초)
 
 
 # 차량 설정
 VEHICLE_ID = "V001"  # 차량 고유 ID
 
+# 서버 재전송 요청 (gap_detector.py): 서버가 누락 구간을 이 토픽으로 요청하면 로컬 DB에서 묶음으로 응답
+MQTT_CONTROL_TOPIC = MQTT_TOPIC + "/control/" + VEHICLE_ID
+BACKFILL_MAX_ROWS = 20000  # 요청 1건에 응답할 최대 샘플 수 (나머지는 서버가 다시 요청)
+
 # 전송 설정
 SEND_INTERVAL = 0.1  # 서버 전송 간격 (초), 실시간 전송(초당 10회) 목표
-BATCH_SIZE = 1  # 한 번에 전송할 데이터 개수 (가장 최신 1개)
+BATCH_SIZE = 20  # 실시간 전송 1회에 보낼 최신 샘플 최대 개수 (넘치는 샘플은 백로그로 전송)
+LIVE_PUBLISH_INTERVAL = 1.0  # 실시간 샘플 묶음 발행 간격 (초), 알람은 이와 무관하게 매 주기 즉시 전송
+LIVE_WINDOW_SECONDS = 2.0  # 이보다 최근의 미전송 샘플은 실시간으로 즉시 전송, 그 이전은 백로그
+BACKLOG_BATCH_SIZE = 500  # 백로그 전송 1회(MQTT 메시지 1개)에 담을 최대 샘플 수
+BACKLOG_DRAIN_RATE = 1000.0  # 백로그 따라잡기 속도 (샘플/초, 실시간 전송과 대역폭을 나눠 쓰도록 제한)
+BACKLOG_REPORT_INTERVAL = 10.0  # 백로그 크기/예상 소요 시간 갱신 간격 (초)
+# 전송 레인별 지연 목표 (초, 샘플/이벤트 발생부터 PUBACK까지), None이면 목표 없음
+LANE_LATENCY_TARGETS = {'alarm': 1.0, 'live': 3.0, 'backlog': None}
+
+# 데이터 요금제 대역폭 예산 (server_sender.py BandwidthBudget), None이면 사용량만 집계하고 조절하지 않음
+BANDWIDTH_BUDGET_BYTES = None                   # 예: 500 * 1024 * 1024 (기간당 500MB)
+BANDWIDTH_BUDGET_PERIOD = 'month'               # 예산 기간: 'day' 또는 'month'
+BANDWIDTH_MESSAGE_OVERHEAD = 60                 # 메시지당 payload 외 바이트 추정 (MQTT 헤더, PUBACK, TCP/IP)
+BANDWIDTH_USAGE_FILE = "bandwidth_usage.json"   # 기간 사용량 저장 파일 (재시작 후 이어서 집계)
+BANDWIDTH_RATE_WINDOW = 600.0                   # 사용 속도 추정 기간 (초, 지수 평균)
+BANDWIDTH_MIN_DWELL = 300.0                     # 전송 프로필 변경 최소 간격 (초)
+# 예산 압박 단계별 전송 프로필 (0: 평상시, 뒤로 갈수록 절약, 알람은 항상 즉시 전송)
+# live_interval: 실시간 묶음 간격(초), drain_scale: 백로그 속도 배율, min_batch: 백로그 메시지 최소 샘플 수,
+# codec/compression/level: payload 형식 (None이면 MQTT_PAYLOAD_* 설정), downsample: 정상 상태 샘플 N개 중 1개만 전송
+BANDWIDTH_PROFILES = [
+    {'live_interval': LIVE_PUBLISH_INTERVAL, 'drain_scale': 1.0, 'min_batch': 1,
+     'codec': None, 'compression': None, 'level': None, 'downsample': 1},
+    {'live_interval': 5.0, 'drain_scale': 0.5, 'min_batch': 100,
+     'codec': None, 'compression': 'zlib', 'level': 6, 'downsample': 1},
+    {'live_interval': 15.0, 'drain_scale': 0.25, 'min_batch': 250,
+     'codec': 'binary', 'compression': 'zlib', 'level': 9, 'downsample': 2},
+    {'live_interval': 60.0, 'drain_scale': 0.1, 'min_batch': 500,
+     'codec': 'binary', 'compression': 'zlib', 'level': 9, 'downsample': 10},
+]
+
+# 추가 전송 대상 (telemetry_sinks.py): 기본 MQTT 브로커와 별개로 같은 샘플을 싱크별 전송 완료 위치로 전송
+# type: 'file'(JSON Lines 보관, path), 'mqtt'(다른 브로커, host/port/topic), 'http'(POST, url)
+# name: 전송 완료 위치 이름 (고유, 'mqtt'는 기본 브로커용), 싱크별로 batch_size/queue_size/retry_min/retry_max 지정 가능
+SINKS = [
+    # {'type': 'file', 'name': 'archive', 'path': 'archive/telemetry-%Y%m%d.jsonl'},
+    # {'type': 'mqtt', 'name': 'backup_broker', 'host': '192.168.0.10', 'port': 1883},
+    # {'type': 'http', 'name': 'ingest', 'url': 'https://example.com/api/telemetry', 'batch_size': 500},
+]
+SINK_BATCH_SIZE = 200          # 싱크 전송 1회에 보낼 최대 샘플 수
+SINK_QUEUE_SIZE = 2000         # 싱크별 대기 큐 최대 샘플 수 (차면 그 싱크만 DB에서 더 읽지 않음)
+SINK_RETRY_MIN_DELAY = 1.0     # 싱크 전송 실패 시 재시도 간격 시작 (초), 실패할 때마다 2배
+SINK_RETRY_MAX_DELAY = 60.0    # 싱크 재시도 간격 최대 (초)
+SINK_POLL_INTERVAL = 1.0       # 싱크용 새 샘플 조회 간격 (초)
+SINK_HTTP_TIMEOUT = 10.0       # HTTP 싱크 요청 제한 시간 (초)
 RETRY_ATTEMPTS = 3  # 전송 실패 시 재시도 횟수
 RETRY_DELAY = 1  # 재시도 간격 (초)
 
@@ -77,6 +77,110 @@ def api_temperature_series():
     return jsonify(series)
 
 
+@app.route('/api/excursions')
+def api_excursions():
+    """현재 운행의 온도 이탈 누적 상태와 최근 이탈 이벤트 반환"""
+    try:
+        from database import GPSDatabase
+        db = GPSDatabase(DB_PATH)
+        db.connect()
+        try:
+            state = db.get_latest_excursion_state()
+            events = db.get_excursion_events(limit=20, trip_id=state['trip_id'] if state else None)
+        finally:
+            db.close()
+        return jsonify({'state': state, 'events': events})
+    except Exception:
+        return jsonify({'state': None, 'events': []})
+
+
+@app.route('/api/anomalies')
+def api_anomalies():
+    """최근 온도 이상 패턴 이벤트 반환 (?channel=채널명으로 필터)"""
+    try:
+        from flask import request
+        from database import GPSDatabase
+        channel = request.args.get('channel')
+        db = GPSDatabase(DB_PATH)
+        db.connect()
+        try:
+            events = db.get_anomaly_events(limit=50, channel=channel)
+        finally:
+            db.close()
+        return jsonify({'events': events})
+    except Exception:
+        return jsonify({'events': []})
+
+
+@app.route('/api/alarms')
+def api_alarms():
+    """최근 알람 이벤트 반환 (?severity=critical 등으로 필터)"""
+    try:
+        from flask import request
+        from database import GPSDatabase
+        severity = request.args.get('severity')
+        db = GPSDatabase(DB_PATH)
+        db.connect()
+        try:
+            events = db.get_alarm_events(limit=50, severity=severity)
+        finally:
+            db.close()
+        return jsonify({'events': events})
+    except Exception:
+        return jsonify({'events': []})
+
+
+@app.route('/api/forecast')
+def api_forecast():
+    """최신 샘플의 온도 이탈 예측 반환 (이탈 추세가 없으면 eta는 null)"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT timestamp, temperature, forecast_eta, forecast_threshold, forecast_confidence
+        FROM gps_temperature_data
+        WHERE temperature IS NOT NULL
+        ORDER BY timestamp DESC
+        LIMIT 1
+        """
+    )
+    row = cur.fetchone()
+    conn.close()
+
+    if not row:
+        return jsonify({}), 200
+
+    return jsonify({
+        'timestamp': row['timestamp'],
+        'temperature': row['temperature'],
+        'eta_seconds': row['forecast_eta'],
+        'threshold': row['forecast_threshold'],
+        'confidence': row['forecast_confidence'],
+    })
+
+
+@app.route('/api/stability')
+def api_stability():
+    """현재 운행/배송의 평균 동역학 온도(MKT)와 안정성 예산 소모량 반환"""
+    try:
+        from database import GPSDatabase
+        from config import SHIPMENT_ID, STABILITY_BUDGET_HOURS
+        db = GPSDatabase(DB_PATH)
+        db.connect()
+        try:
+            trip = db.get_stability_state('trip')
+            shipment = db.get_stability_state('shipment', SHIPMENT_ID)
+        finally:
+            db.close()
+        budget_seconds = STABILITY_BUDGET_HOURS * 3600
+        for state in (trip, shipment):
+            if state:
+                state['budget_remaining_seconds'] = budget_seconds - (state['budget_used_seconds'] or 0.0)
+        return jsonify({'trip': trip, 'shipment': shipment, 'budget_hours': STABILITY_BUDGET_HOURS})
+    except Exception:
+        return jsonify({'trip': None, 'shipment': None})
+
+
 @app.route('/api/reverse-geocode')
 def api_reverse_geocode():
     """간단한 리버스 지오코딩 (BigDataCloud API 사용)"""
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 import logging
 import time
@@ -6,6 +7,27 @@ from config import DB_PATH, VEHICLE_ID
 
 logger = logging.getLogger(__name__)
 
+# 기존 DB에 없을 수 있는 추가 컬럼 (create_tables에서 자동 보강)
+# GPS 측위 품질 정보: 측위 UTC 시각, HDOP/PDOP, 측위 유형, 사용 위성 수
+EXTRA_COLUMNS = {
+    'fix_time': 'REAL',
+    'hdop': 'REAL',
+    'pdop': 'REAL',
+    'fix_type': 'INTEGER',
+    'satellites': 'INTEGER',
+    'temperature_age': 'REAL',   # 저장 시점 기준 온도 측정 후 경과 시간(초), 오래된 값 반복 저장 감지용
+    'temperature_raw': 'REAL',   # 필터 적용 전 원시 온도 (temperature는 필터링된 값)
+    'forecast_eta': 'REAL',          # 예측한 적정 범위 이탈까지 남은 시간(초), 이탈 추세가 없으면 NULL
+    'forecast_threshold': 'REAL',    # 예측 대상 경계 온도 (8.0 고온 / 2.0 저온)
+    'forecast_confidence': 'REAL',   # 추세 신뢰도 (0~1)
+}
+
+# 조회 컬럼 순서 (앞 14개는 기존 인덱스 유지, 추가 컬럼은 뒤에 붙임)
+SELECT_COLUMNS = (
+    "id, vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, "
+    "temperature, status, sent, sent_at, created_at, " + ", ".join(EXTRA_COLUMNS)
+)
+
 class GPSDatabase:
     """GPS 데이터를 저장하기 위한 SQLite 데이터베이스 관리 클래스"""
     
@@ -47,6 +69,9 @@ class GPSDatabase:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+
+            # 이전 버전 DB에 추가 컬럼 보강
+            self._add_missing_columns()
             
             # 인덱스 생성 (검색 성능 향상)
             self.cursor.execute("""
@@ -59,28 +84,192 @@ class GPSDatabase:
                 ON gps_temperature_data(datetime)
             """)
             
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_fix_time
+                ON gps_temperature_data(fix_time)
+            """)
+
+            # 미전송 조회는 send_cursors의 id 범위로 하므로 sent 인덱스 불필요 (이전 버전 DB에서 제거, 삽입 비용 절감)
+            self.cursor.execute("DROP INDEX IF EXISTS idx_sent_timestamp")
+
+            # 다중 온도 채널 값 (샘플 1건당 채널 수만큼)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS channel_temperature_data (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sample_id INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    temperature REAL,
+                    status TEXT,
+                    health TEXT,
+                    age REAL
+                )
+            """)
+
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_channel_sample
+                ON channel_temperature_data(sample_id)
+            """)
+
+            # 온도 이탈 시작/종료 이벤트 (보관 기간 정리 대상 아님)
+            self.cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS excursion_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    vehicle_id TEXT NOT NULL DEFAULT '{VEHICLE_ID}',
+                    trip_id TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    band TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    ended_at REAL,
+                    duration REAL,
+                    peak_temperature REAL,
+                    timestamp REAL NOT NULL,
+                    sent BOOLEAN DEFAULT FALSE
+                )
+            """)
+
+            # 온도 이상 패턴 이벤트 (anomaly_detector.py, 채널별)
+            self.cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS anomaly_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    vehicle_id TEXT NOT NULL DEFAULT '{VEHICLE_ID}',
+                    channel TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    temperature REAL,
+                    rate_per_minute REAL,
+                    score REAL,
+                    sent BOOLEAN DEFAULT FALSE
+                )
+            """)
+
+            # 즉시 전송 알람 (alarm_monitor.py, 상태 전환/센서 끊김/지오펜스)
+            self.cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS alarm_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    vehicle_id TEXT NOT NULL DEFAULT '{VEHICLE_ID}',
+                    event TEXT NOT NULL,
+                    severity TEXT,
+                    channel TEXT,
+                    timestamp REAL NOT NULL,
+                    status TEXT,
+                    previous TEXT,
+                    temperature REAL,
+                    latitude REAL,
+                    longitude REAL,
+                    detail TEXT,
+                    sent BOOLEAN DEFAULT FALSE
+                )
+            """)
+
+            # 운행별 이탈 누적 상태 (운행당 1행, 주기적으로 덮어씀)
+            self.cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS excursion_state (
+                    trip_id TEXT PRIMARY KEY,
+                    vehicle_id TEXT NOT NULL DEFAULT '{VEHICLE_ID}',
+                    trip_started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    band TEXT,
+                    band_seconds TEXT,
+                    out_of_range_seconds REAL,
+                    excursion_count INTEGER,
+                    longest_excursion REAL,
+                    min_temperature REAL,
+                    max_temperature REAL,
+                    excursion TEXT
+                )
+            """)
+
+            # 운행/배송별 MKT 누적값 (scope: 'trip' 또는 'shipment')
+            self.cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS stability_state (
+                    scope TEXT NOT NULL,
+                    scope_id TEXT NOT NULL,
+                    vehicle_id TEXT NOT NULL DEFAULT '{VEHICLE_ID}',
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    weight_seconds REAL,
+                    kinetic_sum REAL,
+                    budget_used_seconds REAL,
+                    mkt REAL,
+                    PRIMARY KEY (scope, scope_id)
+                )
+            """)
+
+            # 싱크별 전송 완료 위치 (acked_id 이하는 모두 전송 완료, ranges: 그 위에서 먼저 완료된 id 구간 JSON)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS send_cursors (
+                    sink TEXT PRIMARY KEY,
+                    acked_id INTEGER NOT NULL DEFAULT 0,
+                    ranges TEXT,
+                    updated_at REAL
+                )
+            """)
+
+            # 샘플 순번 공간 식별값 (1행, DB를 새로 만들면 새 epoch -> 서버가 id 재시작을 구분)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sequence_epoch (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    epoch INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+
             self.conn.commit()
             logger.info("데이터베이스 테이블 생성 완료")
         except sqlite3.Error as e:
             logger.error(f"테이블 생성 실패: {e}")
             raise
+
+    def _add_missing_columns(self):
+        """EXTRA_COLUMNS 중 테이블에 없는 컬럼 추가"""
+        self.cursor.execute("PRAGMA table_info(gps_temperature_data)")
+        existing_columns = {row[1] for row in self.cursor.fetchall()}
+
+        for column, column_type in EXTRA_COLUMNS.items():
+            if column not in existing_columns:
+                self.cursor.execute(f"ALTER TABLE gps_temperature_data ADD COLUMN {column} {column_type}")
+                logger.info(f"컬럼 추가: {column} {column_type}")
     
     def insert_gps_temperature_data(self, latitude=None, longitude=None, altitude=None,
                                    speed=None, heading=None, temperature=None,
-                                   vehicle_id=VEHICLE_ID, status='normal'):
-        """GPS + 온도 데이터 삽입 (사용자 서버 구조에 맞춤)"""
+                                   vehicle_id=VEHICLE_ID, status='normal',
+                                   fix_time=None, hdop=None, pdop=None,
+                                   fix_type=None, satellites=None, channels=None,
+                                   temperature_age=None, temperature_raw=None, forecast=None):
+        """GPS + 온도 데이터 삽입 (사용자 서버 구조에 맞춤)
+
+        channels: 다중 온도 채널 값 {채널명: {'temperature', 'status', 'health', 'age'}}
+                  같은 트랜잭션으로 channel_temperature_data에 저장
+        forecast: TemperatureForecaster.get_forecast() 결과 (없으면 예측 컬럼은 NULL)
+        """
         timestamp = datetime.now().timestamp()
         datetime_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
 
         try:
             self.cursor.execute("""
                 INSERT INTO gps_temperature_data
-                (vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, temperature, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (vehicle_id, timestamp, datetime_str, latitude, longitude, altitude, speed, heading, temperature, status))
+                (vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, temperature, status,
+                 fix_time, hdop, pdop, fix_type, satellites, temperature_age, temperature_raw,
+                 forecast_eta, forecast_threshold, forecast_confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (vehicle_id, timestamp, datetime_str, latitude, longitude, altitude, speed, heading, temperature, status,
+                  fix_time, hdop, pdop, fix_type, satellites, temperature_age, temperature_raw,
+                  forecast['eta_seconds'] if forecast else None,
+                  forecast['threshold'] if forecast else None,
+                  forecast['confidence'] if forecast else None))
+            record_id = self.cursor.lastrowid
+
+            if channels:
+                self.cursor.executemany("""
+                    INSERT INTO channel_temperature_data
+                    (sample_id, channel, temperature, status, health, age)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [(record_id, name, reading.get('temperature'), reading.get('status'),
+                       reading.get('health'), reading.get('age'))
+                      for name, reading in channels.items()])
 
             self.conn.commit()
-            return self.cursor.lastrowid
+            return record_id
         except sqlite3.Error as e:
             logger.error(f"GPS+온도 데이터 삽입 실패: {e}")
             return None
@@ -88,8 +277,8 @@ class GPSDatabase:
     def get_latest_gps_temperature_data(self, limit=10):
         """최근 GPS+온도 데이터 조회"""
         try:
-            self.cursor.execute("""
-                SELECT id, vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, temperature, status, sent, sent_at, created_at
+            self.cursor.execute(f"""
+                SELECT {SELECT_COLUMNS}
                 FROM gps_temperature_data
                 ORDER BY timestamp DESC
                 LIMIT ?
@@ -99,21 +288,127 @@ class GPSDatabase:
             logger.error(f"GPS+온도 데이터 조회 실패: {e}")
             return []
 
-    def get_unsent_gps_temperature_data(self, limit=10):
-        """전송하지 않은 GPS+온도 데이터 조회 (중복 전송 방지)"""
+    def get_unsent_gps_temperature_data(self, limit=10, since=None, before=None, oldest_first=False, after_id=0):
+        """전송하지 않은 GPS+온도 데이터 조회 (id 범위 조회, 중복 전송 방지)
+
+        after_id: 이 id보다 큰 행만 (싱크의 전송 완료 위치 또는 이미 발행하고 PUBACK을 기다리는 행 이후)
+        since/before: timestamp 범위 (since 이상, before 미만)
+        oldest_first: 오래된 순 (백로그 전송용), 기본은 최신순
+        """
         try:
-            self.cursor.execute("""
-                SELECT id, vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, temperature, status, sent, sent_at, created_at
+            conditions = ["id > ?"]
+            params = [after_id or 0]
+            if since is not None:
+                conditions.append("timestamp >= ?")
+                params.append(since)
+            if before is not None:
+                conditions.append("timestamp < ?")
+                params.append(before)
+
+            # id는 저장 순서이므로 시간 순서와 같음 (기본 키 범위 조회)
+            self.cursor.execute(f"""
+                SELECT {SELECT_COLUMNS}
                 FROM gps_temperature_data
-                WHERE sent = FALSE OR sent IS NULL
-                ORDER BY timestamp DESC
+                WHERE {' AND '.join(conditions)}
+                ORDER BY id {'ASC' if oldest_first else 'DESC'}
                 LIMIT ?
-            """, (limit,))
+            """, params + [limit])
             return self.cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"미전송 GPS+온도 데이터 조회 실패: {e}")
             return []
-    
+
+    def get_unsent_backlog(self, before, after_id=0):
+        """after_id 이후, before 이전 데이터 개수와 가장 오래된 timestamp -> (개수, timestamp 또는 None)"""
+        try:
+            self.cursor.execute("""
+                SELECT COUNT(*), MIN(timestamp)
+                FROM gps_temperature_data
+                WHERE id > ? AND timestamp < ?
+            """, (after_id or 0, before))
+            count, oldest = self.cursor.fetchone()
+            return count, oldest
+        except sqlite3.Error as e:
+            logger.error(f"백로그 조회 실패: {e}")
+            return 0, None
+
+    def get_gps_temperature_data_by_id_range(self, first_id, last_id, limit=500):
+        """id 구간의 GPS+온도 데이터 조회 (오래된 순, 서버 재전송 요청 응답용)"""
+        try:
+            self.cursor.execute(f"""
+                SELECT {SELECT_COLUMNS}
+                FROM gps_temperature_data
+                WHERE id BETWEEN ? AND ?
+                ORDER BY id ASC
+                LIMIT ?
+            """, (first_id, last_id, limit))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"id 구간 GPS+온도 데이터 조회 실패: {e}")
+            return []
+
+    def get_next_sample_id(self, after_id):
+        """after_id보다 큰 가장 작은 샘플 id (없으면 None, 삭제된 id 구간 건너뛰기용)"""
+        try:
+            self.cursor.execute("SELECT MIN(id) FROM gps_temperature_data WHERE id > ?", (after_id,))
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"다음 샘플 id 조회 실패: {e}")
+            return None
+
+    def get_gps_fixes(self, since_timestamp, max_hdop=None, min_fix_type=None):
+        """측위 품질 조건으로 GPS 궤적 조회 (필터링/보간용, fix_time 오름차순)
+
+        같은 측위를 0.1초마다 반복 저장하므로 fix_time 기준으로 중복을 제거합니다.
+        fix_time이 없는 행(구버전 데이터, 시뮬레이터)은 timestamp를 대신 사용합니다.
+        """
+        conditions = ["timestamp >= ?", "latitude IS NOT NULL", "longitude IS NOT NULL"]
+        params = [since_timestamp]
+        if max_hdop is not None:
+            conditions.append("(hdop IS NULL OR hdop <= ?)")
+            params.append(max_hdop)
+        if min_fix_type is not None:
+            conditions.append("(fix_type IS NULL OR fix_type >= ?)")
+            params.append(min_fix_type)
+
+        try:
+            self.cursor.execute(f"""
+                SELECT COALESCE(fix_time, timestamp) AS t, latitude, longitude, altitude, speed, heading,
+                       hdop, pdop, fix_type, satellites
+                FROM gps_temperature_data
+                WHERE {' AND '.join(conditions)}
+                GROUP BY t
+                ORDER BY t ASC
+            """, params)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"GPS 궤적 조회 실패: {e}")
+            return []
+
+    def get_channel_readings(self, sample_ids):
+        """샘플별 채널 온도 조회 -> {sample_id: {채널명: {'temperature', 'status', 'health'}}}"""
+        if not sample_ids:
+            return {}
+        try:
+            placeholders = ','.join(['?'] * len(sample_ids))
+            self.cursor.execute(f"""
+                SELECT sample_id, channel, temperature, status, health
+                FROM channel_temperature_data
+                WHERE sample_id IN ({placeholders})
+            """, list(sample_ids))
+
+            readings = {}
+            for sample_id, channel, temperature, status, health in self.cursor.fetchall():
+                readings.setdefault(sample_id, {})[channel] = {
+                    'temperature': temperature,
+                    'status': status,
+                    'health': health
+                }
+            return readings
+        except sqlite3.Error as e:
+            logger.error(f"채널 온도 조회 실패: {e}")
+            return {}
+
     def get_gps_temperature_data_count(self):
         """저장된 총 GPS+온도 데이터 개수 조회"""
         try:
@@ -123,38 +418,78 @@ class GPSDatabase:
             logger.error(f"GPS+온도 데이터 카운트 조회 실패: {e}")
             return 0
 
-    def mark_gps_temperature_data_as_sent(self, data_ids):
-        """전송 완료된 GPS+온도 데이터 표시 (중복 전송 방지)"""
+    def get_send_cursor(self, sink):
+        """싱크의 전송 완료 위치 조회 -> (acked_id, ranges)
+
+        처음 조회하면 이전 버전의 sent 표시에서 연속으로 전송된 마지막 id를 찾아 시작 위치로 저장합니다.
+        """
         try:
-            if not data_ids:
-                return
+            self.cursor.execute("SELECT acked_id, ranges FROM send_cursors WHERE sink = ?", (sink,))
+            row = self.cursor.fetchone()
+            if row:
+                return row[0], json.loads(row[1]) if row[1] else []
 
-            # IN 절을 위한 플레이스홀더 생성
-            placeholders = ','.join(['?'] * len(data_ids))
+            self.cursor.execute("SELECT MIN(id) FROM gps_temperature_data WHERE sent = FALSE OR sent IS NULL")
+            first_unsent = self.cursor.fetchone()[0]
+            if first_unsent is None:
+                self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM gps_temperature_data")
+                acked_id = self.cursor.fetchone()[0]
+            else:
+                acked_id = first_unsent - 1
+            self.save_send_cursor(sink, acked_id)
+            logger.info(f"전송 완료 위치 생성: {sink} id {acked_id}")
+            return acked_id, []
+        except sqlite3.Error as e:
+            logger.error(f"전송 완료 위치 조회 실패: {e}")
+            raise
 
-            self.cursor.execute(f"""
-                UPDATE gps_temperature_data SET sent = TRUE, sent_at = ?
-                WHERE id IN ({placeholders})
-            """, [datetime.now()] + data_ids)
+    def save_send_cursor(self, sink, acked_id, ranges=None):
+        """싱크의 전송 완료 위치 저장 (싱크당 1행을 덮어씀)"""
+        try:
+            self.cursor.execute("""
+                INSERT OR REPLACE INTO send_cursors (sink, acked_id, ranges, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, (sink, acked_id, json.dumps(ranges) if ranges else None, time.time()))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"전송 완료 위치 저장 실패: {e}")
 
+    def get_sequence_epoch(self):
+        """샘플 순번 epoch 조회 (없으면 현재 시각(ms)으로 생성)"""
+        try:
+            self.cursor.execute("SELECT epoch FROM sequence_epoch WHERE id = 1")
+            row = self.cursor.fetchone()
+            if row:
+                return row[0]
+            now = time.time()
+            epoch = int(now * 1000)
+            self.cursor.execute("INSERT INTO sequence_epoch (id, epoch, created_at) VALUES (1, ?, ?)", (epoch, now))
             self.conn.commit()
-            logger.debug(f"{len(data_ids)}개 GPS+온도 데이터 전송 완료 표시")
+            logger.info(f"샘플 순번 epoch 생성: {epoch}")
+            return epoch
         except sqlite3.Error as e:
-            logger.error(f"GPS+온도 데이터 전송 완료 표시 실패: {e}")
+            logger.error(f"샘플 순번 epoch 조회 실패: {e}")
+            raise
 
-    def get_sent_gps_temperature_count(self):
-        """전송 완료된 GPS+온도 데이터 개수 조회"""
+    def get_sent_gps_temperature_count(self, sink='mqtt'):
+        """전송 완료된 GPS+온도 데이터 개수 조회 (전송 완료 위치 이하)"""
         try:
-            self.cursor.execute("SELECT COUNT(*) FROM gps_temperature_data WHERE sent = TRUE")
+            self.cursor.execute("""
+                SELECT COUNT(*) FROM gps_temperature_data
+                WHERE id <= (SELECT COALESCE(MAX(acked_id), 0) FROM send_cursors WHERE sink = ?)
+            """, (sink,))
             return self.cursor.fetchone()[0]
         except sqlite3.Error as e:
             logger.error(f"전송 완료 GPS+온도 데이터 카운트 조회 실패: {e}")
             return 0
 
-    def get_unsent_gps_temperature_count(self):
-        """전송 대기 중인 GPS+온도 데이터 개수 조회"""
+    def get_unsent_gps_temperature_count(self, sink='mqtt'):
+        """전송 대기 중인 GPS+온도 데이터 개수 조회 (전송 완료 위치 이후)"""
         try:
-            self.cursor.execute("SELECT COUNT(*) FROM gps_temperature_data WHERE sent = FALSE OR sent IS NULL")
+            self.cursor.execute("""
+                SELECT COUNT(*) FROM gps_temperature_data
+                WHERE id > (SELECT COALESCE(MAX(acked_id), 0) FROM send_cursors WHERE sink = ?)
+            """, (sink,))
             return self.cursor.fetchone()[0]
         except sqlite3.Error as e:
             logger.error(f"미전송 GPS+온도 데이터 카운트 조회 실패: {e}")
@@ -166,6 +501,11 @@ class GPSDatabase:
             cutoff = time.time() - float(max_age_seconds)
             self.cursor.execute("DELETE FROM gps_temperature_data WHERE timestamp < ?", (cutoff,))
             deleted = self.cursor.rowcount if self.cursor.rowcount is not None else 0
+            # 본 샘플이 삭제된 채널 값 정리 (id는 증가만 하므로 최소 id 기준)
+            self.cursor.execute("""
+                DELETE FROM channel_temperature_data
+                WHERE sample_id < (SELECT COALESCE(MIN(id), 0) FROM gps_temperature_data)
+            """)
             self.conn.commit()
             if deleted:
                 logger.info(f"오래된 데이터 정리: {deleted}행 삭제(기준 {int(max_age_seconds)}초)")
@@ -174,6 +514,232 @@ class GPSDatabase:
             logger.error(f"오래된 데이터 정리 실패: {e}")
             return 0
     
+    def insert_excursion_event(self, event, vehicle_id=VEHICLE_ID):
+        """온도 이탈 이벤트 저장 (ExcursionEngine 이벤트 형식)"""
+        try:
+            self.cursor.execute("""
+                INSERT INTO excursion_events
+                (vehicle_id, trip_id, event, band, started_at, ended_at, duration, peak_temperature, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (vehicle_id, event['trip_id'], event['event'], event['band'], event['started_at'],
+                  event['ended_at'], event['duration'], event['peak_temperature'], event['timestamp']))
+            self.conn.commit()
+            return self.cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"온도 이탈 이벤트 저장 실패: {e}")
+            return None
+
+    def get_excursion_events(self, limit=50, trip_id=None, unsent_only=False):
+        """온도 이탈 이벤트 조회 (최신순, unsent_only면 미전송만 오래된 순)"""
+        try:
+            conditions = []
+            params = []
+            if trip_id:
+                conditions.append("trip_id = ?")
+                params.append(trip_id)
+            if unsent_only:
+                conditions.append("(sent = FALSE OR sent IS NULL)")
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            order = "ASC" if unsent_only else "DESC"
+
+            self.cursor.execute(f"""
+                SELECT id, vehicle_id, trip_id, event, band, started_at, ended_at, duration, peak_temperature, timestamp
+                FROM excursion_events {where}
+                ORDER BY id {order}
+                LIMIT ?
+            """, params + [limit])
+            columns = [description[0] for description in self.cursor.description]
+            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"온도 이탈 이벤트 조회 실패: {e}")
+            return []
+
+    def mark_excursion_events_as_sent(self, event_ids):
+        """전송 완료된 이탈 이벤트 표시"""
+        try:
+            if not event_ids:
+                return
+            placeholders = ','.join(['?'] * len(event_ids))
+            self.cursor.execute(f"UPDATE excursion_events SET sent = TRUE WHERE id IN ({placeholders})", event_ids)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"이탈 이벤트 전송 완료 표시 실패: {e}")
+
+    def insert_anomaly_events(self, events, vehicle_id=VEHICLE_ID):
+        """온도 이상 패턴 이벤트 저장 (AnomalyDetector 이벤트 형식, 한 트랜잭션)"""
+        try:
+            self.cursor.executemany("""
+                INSERT INTO anomaly_events
+                (vehicle_id, channel, event, timestamp, temperature, rate_per_minute, score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(vehicle_id, event['channel'], event['event'], event['timestamp'], event['temperature'],
+                   event['rate_per_minute'], event['score']) for event in events])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"온도 이상 이벤트 저장 실패: {e}")
+
+    def get_anomaly_events(self, limit=50, channel=None, unsent_only=False):
+        """온도 이상 패턴 이벤트 조회 (최신순, unsent_only면 미전송만 오래된 순)"""
+        try:
+            conditions = []
+            params = []
+            if channel:
+                conditions.append("channel = ?")
+                params.append(channel)
+            if unsent_only:
+                conditions.append("(sent = FALSE OR sent IS NULL)")
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            order = "ASC" if unsent_only else "DESC"
+
+            self.cursor.execute(f"""
+                SELECT id, vehicle_id, channel, event, timestamp, temperature, rate_per_minute, score
+                FROM anomaly_events {where}
+                ORDER BY id {order}
+                LIMIT ?
+            """, params + [limit])
+            columns = [description[0] for description in self.cursor.description]
+            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"온도 이상 이벤트 조회 실패: {e}")
+            return []
+
+    def mark_anomaly_events_as_sent(self, event_ids):
+        """전송 완료된 이상 패턴 이벤트 표시"""
+        try:
+            if not event_ids:
+                return
+            placeholders = ','.join(['?'] * len(event_ids))
+            self.cursor.execute(f"UPDATE anomaly_events SET sent = TRUE WHERE id IN ({placeholders})", event_ids)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"이상 이벤트 전송 완료 표시 실패: {e}")
+
+    def insert_alarm_events(self, events, vehicle_id=VEHICLE_ID):
+        """알람 이벤트 저장 (AlarmMonitor 이벤트 형식, 한 트랜잭션)"""
+        try:
+            self.cursor.executemany("""
+                INSERT INTO alarm_events
+                (vehicle_id, event, severity, channel, timestamp, status, previous, temperature,
+                 latitude, longitude, detail)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(vehicle_id, event['event'], event['severity'], event['channel'], event['timestamp'],
+                   event['status'], event['previous'], event['temperature'], event['latitude'],
+                   event['longitude'], event['detail']) for event in events])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"알람 이벤트 저장 실패: {e}")
+
+    def get_alarm_events(self, limit=50, severity=None, unsent_only=False):
+        """알람 이벤트 조회 (최신순, unsent_only면 미전송만 오래된 순)"""
+        try:
+            conditions = []
+            params = []
+            if severity:
+                conditions.append("severity = ?")
+                params.append(severity)
+            if unsent_only:
+                conditions.append("(sent = FALSE OR sent IS NULL)")
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            order = "ASC" if unsent_only else "DESC"
+
+            self.cursor.execute(f"""
+                SELECT id, vehicle_id, event, severity, channel, timestamp, status, previous, temperature,
+                       latitude, longitude, detail
+                FROM alarm_events {where}
+                ORDER BY id {order}
+                LIMIT ?
+            """, params + [limit])
+            columns = [description[0] for description in self.cursor.description]
+            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"알람 이벤트 조회 실패: {e}")
+            return []
+
+    def mark_alarm_events_as_sent(self, event_ids):
+        """전송 완료된 알람 이벤트 표시"""
+        try:
+            if not event_ids:
+                return
+            placeholders = ','.join(['?'] * len(event_ids))
+            self.cursor.execute(f"UPDATE alarm_events SET sent = TRUE WHERE id IN ({placeholders})", event_ids)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"알람 이벤트 전송 완료 표시 실패: {e}")
+
+    def save_excursion_state(self, state, vehicle_id=VEHICLE_ID):
+        """운행별 이탈 누적 상태 저장 (ExcursionEngine.get_state() 형식)"""
+        try:
+            self.cursor.execute("""
+                INSERT OR REPLACE INTO excursion_state
+                (trip_id, vehicle_id, trip_started_at, updated_at, band, band_seconds, out_of_range_seconds,
+                 excursion_count, longest_excursion, min_temperature, max_temperature, excursion)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (state['trip_id'], vehicle_id, state['trip_started_at'], state['updated_at'], state['band'],
+                  json.dumps(state['band_seconds']), state['out_of_range_seconds'], state['excursion_count'],
+                  state['longest_excursion'], state['min_temperature'], state['max_temperature'],
+                  json.dumps(state['excursion']) if state['excursion'] else None))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"온도 이탈 상태 저장 실패: {e}")
+
+    def get_latest_excursion_state(self):
+        """가장 최근에 갱신된 운행의 이탈 누적 상태 (없으면 None)"""
+        try:
+            self.cursor.execute("""
+                SELECT trip_id, vehicle_id, trip_started_at, updated_at, band, band_seconds, out_of_range_seconds,
+                       excursion_count, longest_excursion, min_temperature, max_temperature, excursion
+                FROM excursion_state
+                ORDER BY updated_at DESC
+                LIMIT 1
+            """)
+            row = self.cursor.fetchone()
+            if not row:
+                return None
+            columns = [description[0] for description in self.cursor.description]
+            state = dict(zip(columns, row))
+            state['band_seconds'] = json.loads(state['band_seconds']) if state['band_seconds'] else {}
+            state['excursion'] = json.loads(state['excursion']) if state['excursion'] else None
+            return state
+        except sqlite3.Error as e:
+            logger.error(f"온도 이탈 상태 조회 실패: {e}")
+            return None
+
+    def save_stability_state(self, states, vehicle_id=VEHICLE_ID):
+        """MKT 누적값 저장 (MKTAccumulator.get_state() 목록)"""
+        try:
+            now = time.time()
+            self.cursor.executemany("""
+                INSERT OR REPLACE INTO stability_state
+                (scope, scope_id, vehicle_id, started_at, updated_at, weight_seconds, kinetic_sum,
+                 budget_used_seconds, mkt)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(state['scope'], state['scope_id'], vehicle_id, state['started_at'], now, state['weight_seconds'],
+                   state['kinetic_sum'], state['budget_used_seconds'], state['mkt']) for state in states])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"MKT 상태 저장 실패: {e}")
+
+    def get_stability_state(self, scope, scope_id=None):
+        """MKT 누적값 조회 (scope_id가 없으면 가장 최근 갱신된 것, 없으면 None)"""
+        try:
+            query = """
+                SELECT scope, scope_id, started_at, updated_at, weight_seconds, kinetic_sum, budget_used_seconds, mkt
+                FROM stability_state WHERE scope = ?
+            """
+            params = [scope]
+            if scope_id is not None:
+                query += " AND scope_id = ?"
+                params.append(scope_id)
+            self.cursor.execute(query + " ORDER BY updated_at DESC LIMIT 1", params)
+            row = self.cursor.fetchone()
+            if not row:
+                return None
+            columns = [description[0] for description in self.cursor.description]
+            return dict(zip(columns, row))
+        except sqlite3.Error as e:
+            logger.error(f"MKT 상태 조회 실패: {e}")
+            return None
+
     def close(self):
         """데이터베이스 연결 종료"""
         if self.conn:
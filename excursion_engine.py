@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+냉장 온도 이탈(excursion) 판정 엔진
+온도 상태 분류를 한 곳에서 처리하고, 샘플마다 O(1)로 누적 상태를 갱신
+
+- 히스테리시스: 경계를 넘으면 바로 해당 구간으로 들어가고, 적정 범위 쪽으로 돌아올 때만
+  경계보다 TEMP_STATUS_HYSTERESIS만큼 더 안쪽이어야 구간을 벗어남 (8.0°C 부근 깜빡임 방지)
+- 구간별 체류 시간, 적정 범위 밖 누적 시간, 운행(trip)별 합계
+- 이탈 시작/종료 이벤트 (TEMP_EXCURSION_MIN_DURATION 이상 지속된 이탈만)
+"""
+
+import logging
+import time
+from datetime import datetime
+from config import (
+    TEMP_RANGES,
+    TEMP_EXCURSION_BANDS,
+    TEMP_STATUS_HYSTERESIS,
+    TEMP_EXCURSION_MIN_DURATION,
+    TEMP_EXCURSION_MAX_GAP,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def classify_temperature(temperature, ranges=TEMP_RANGES):
+    """온도값에 따른 상태 판단 (히스테리시스 없음)"""
+    if temperature is None:
+        return 'unknown'
+
+    for status, (min_temp, max_temp) in ranges.items():
+        if min_temp <= temperature < max_temp:
+            return status
+    return 'normal'  # 기본값
+
+
+class ExcursionEngine:
+    """온도 이탈 상태를 샘플 단위로 누적하는 클래스
+
+    update(temperature)는 (상태, 이벤트 목록)을 반환합니다.
+    경과 시간은 직전 샘플의 상태에 더합니다 (샘플 간격이 max_gap보다 길면 'unknown').
+    """
+
+    def __init__(self, ranges=TEMP_RANGES, excursion_bands=TEMP_EXCURSION_BANDS,
+                 hysteresis=TEMP_STATUS_HYSTERESIS, min_duration=TEMP_EXCURSION_MIN_DURATION,
+                 max_gap=TEMP_EXCURSION_MAX_GAP, trip_id=None, now=None):
+        self.ranges = ranges
+        self.excursion_bands = set(excursion_bands)
+        self.hysteresis = hysteresis
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+
+        # 구간별 적정 범위('normal')에서 떨어진 정도 (온도 순서 기준, 클수록 심각)
+        order = sorted(ranges, key=lambda status: ranges[status][0])
+        center = order.index('normal') if 'normal' in order else len(order) // 2
+        self.severity = {status: abs(index - center) for index, status in enumerate(order)}
+        self.start_trip(trip_id, now)
+
+    def start_trip(self, trip_id=None, now=None):
+        """운행 합계 초기화 (새 운행 시작)"""
+        now = now or time.time()
+        self.trip_id = trip_id or datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S')
+        self.trip_started_at = now
+
+        self.band = 'unknown'           # 히스테리시스가 적용된 현재 구간
+        self.last_status = 'unknown'    # 직전 샘플 상태 (경과 시간 귀속용)
+        self.last_time = None
+        self.samples = 0
+
+        self.band_seconds = {status: 0.0 for status in self.ranges}
+        self.band_seconds['unknown'] = 0.0
+        self.out_of_range_seconds = 0.0
+        self.excursion_count = 0
+        self.longest_excursion = 0.0
+        self.min_temperature = None
+        self.max_temperature = None
+
+        # 진행 중인 이탈: {'band', 'started_at', 'peak', 'confirmed'}
+        self.excursion = None
+        logger.info(f"온도 이탈 집계 시작 (운행 {self.trip_id})")
+
+    def _band_for(self, temperature):
+        """히스테리시스 적용 구간 판정
+
+        더 심각한 구간으로는 TEMP_RANGES 경계값 그대로 들어가고 (8.0°C 이상이면 바로 critical_hot),
+        적정 범위 쪽으로 돌아올 때만 경계보다 hysteresis만큼 더 안쪽이어야 현재 구간을 벗어납니다.
+        """
+        status = classify_temperature(temperature, self.ranges)
+        if self.band not in self.ranges or status == self.band:
+            return status
+        if self.severity.get(status, 0) >= self.severity[self.band]:
+            return status
+
+        min_temp, max_temp = self.ranges[self.band]
+        if min_temp - self.hysteresis <= temperature < max_temp + self.hysteresis:
+            return self.band
+        return status
+
+    def update(self, temperature, now=None):
+        """샘플 하나 반영 -> (상태, 이벤트 목록)"""
+        now = now or time.time()
+        events = []
+
+        if self.last_time is not None:
+            elapsed = now - self.last_time
+            if elapsed > 0:
+                status = self.last_status if elapsed <= self.max_gap else 'unknown'
+                self.band_seconds[status] = self.band_seconds.get(status, 0.0) + elapsed
+                if status in self.excursion_bands:
+                    self.out_of_range_seconds += elapsed
+        self.last_time = now
+        self.samples += 1
+
+        if temperature is None:
+            # 센서 값이 없으면 구간/이탈 상태는 유지하고 시간만 unknown으로 집계
+            self.last_status = 'unknown'
+            return 'unknown', events
+
+        if self.min_temperature is None or temperature < self.min_temperature:
+            self.min_temperature = temperature
+        if self.max_temperature is None or temperature > self.max_temperature:
+            self.max_temperature = temperature
+
+        self.band = self._band_for(temperature)
+        self.last_status = self.band
+        self._track_excursion(temperature, now, events)
+        return self.band, events
+
+    def _track_excursion(self, temperature, now, events):
+        """이탈 시작/종료 판정"""
+        excursion = self.excursion
+
+        if self.band not in self.excursion_bands:
+            if excursion is not None:
+                self._end_excursion(now, events)
+            return
+
+        if excursion is None or excursion['band'] != self.band:
+            if excursion is not None:
+                self._end_excursion(now, events)
+            excursion = self.excursion = {
+                'band': self.band, 'started_at': now, 'peak': temperature, 'confirmed': False
+            }
+        else:
+            # 적정 범위에서 가장 멀리 벗어난 값 (저온 이탈은 최저, 고온 이탈은 최고)
+            if self.ranges[self.band][1] == float('inf'):
+                excursion['peak'] = max(excursion['peak'], temperature)
+            else:
+                excursion['peak'] = min(excursion['peak'], temperature)
+
+        if not excursion['confirmed'] and now - excursion['started_at'] >= self.min_duration:
+            excursion['confirmed'] = True
+            self.excursion_count += 1
+            events.append(self._event('excursion_start', excursion, now))
+            logger.warning(f"온도 이탈 시작: {excursion['band']} ({temperature:.2f}°C)")
+
+    def _end_excursion(self, now, events):
+        excursion, self.excursion = self.excursion, None
+        if not excursion['confirmed']:
+            return  # 최소 지속 시간 미만의 짧은 이탈은 이벤트로 남기지 않음
+
+        duration = now - excursion['started_at']
+        self.longest_excursion = max(self.longest_excursion, duration)
+        events.append(self._event('excursion_end', excursion, now, ended_at=now, duration=duration))
+        logger.warning(f"온도 이탈 종료: {excursion['band']} ({duration:.0f}초, 최대 {excursion['peak']:.2f}°C)")
+
+    def _event(self, event, excursion, now, ended_at=None, duration=None):
+        return {
+            'event': event,
+            'trip_id': self.trip_id,
+            'band': excursion['band'],
+            'started_at': excursion['started_at'],
+            'ended_at': ended_at,
+            'duration': duration,
+            'peak_temperature': excursion['peak'],
+            'timestamp': now
+        }
+
+    def get_state(self, now=None):
+        """대시보드/전송용 현재 상태 스냅샷"""
+        now = now or time.time()
+        excursion = None
+        if self.excursion is not None:
+            excursion = {**self.excursion, 'duration': now - self.excursion['started_at']}
+
+        return {
+            'trip_id': self.trip_id,
+            'trip_started_at': self.trip_started_at,
+            'trip_seconds': now - self.trip_started_at,
+            'updated_at': now,
+            'band': self.band,
+            'band_seconds': dict(self.band_seconds),
+            'out_of_range_seconds': self.out_of_range_seconds,
+            'excursion_count': self.excursion_count,
+            'longest_excursion': self.longest_excursion,
+            'min_temperature': self.min_temperature,
+            'max_temperature': self.max_temperature,
+            'excursion': excursion
+        }
+
+    def restore(self, state):
+        """저장된 상태로 운행 합계 이어가기 (get_state() 형식)"""
+        self.trip_id = state['trip_id']
+        self.trip_started_at = state['trip_started_at']
+        self.band = state.get('band') or 'unknown'
+        for status, seconds in (state.get('band_seconds') or {}).items():
+            self.band_seconds[status] = seconds
+        self.out_of_range_seconds = state.get('out_of_range_seconds') or 0.0
+        self.excursion_count = state.get('excursion_count') or 0
+        self.longest_excursion = state.get('longest_excursion') or 0.0
+        self.min_temperature = state.get('min_temperature')
+        self.max_temperature = state.get('max_temperature')
+
+        excursion = state.get('excursion')
+        if excursion:
+            self.excursion = {key: excursion[key] for key in ('band', 'started_at', 'peak', 'confirmed')}
+        logger.info(f"온도 이탈 집계 이어서 진행 (운행 {self.trip_id}, 누적 이탈 {self.out_of_range_seconds:.0f}초)")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+수신 서버용 누락 구간 감지와 재전송(backfill) 요청
+트럭은 샘플 묶음마다 payload['seq']로 순번 정보를 보냄 (payload_codec.py)
+
+- epoch: 트럭 DB의 순번 공간 식별값 (DB를 새로 만들면 바뀜, 같은 epoch 안에서 샘플 id가 차량별 순번)
+- acked: 트럭이 PUBACK을 받아 전송 완료로 기록한 id 상한 (이 이하인데 서버에 없으면 누락)
+- covered: 이 메시지가 처리한 id 구간 (다운샘플링으로 뺀 샘플 포함)
+- unavailable: backfill 응답에서 트럭 DB에도 없는 구간 (보관 기간 정리 등, 다시 요청하지 않음)
+  이전 epoch에 대한 요청은 그 epoch로 전부 unavailable 응답이 오며, 이때 해당 epoch 상태는 삭제
+
+acked 이하에서 받지 못한 구간은 grace_seconds 뒤에 제어 토픽(<control_prefix>/<차량 ID>)으로 요청하고,
+트럭은 로컬 DB에서 묶음으로 응답합니다. 모두 다시 보내지 않고 빠진 구간만 채웁니다.
+이 모듈은 config 등 프로젝트 모듈에 의존하지 않으므로 수신 서버에 그대로 복사해 사용할 수 있습니다.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+# ━━━━━ id 구간 ([시작, 끝] 포함, 정렬/병합된 목록) ━━━━━
+
+def id_ranges(ids):
+    """id 목록 -> 연속 구간 목록"""
+    ranges = []
+    for value in sorted(set(ids)):
+        if ranges and value == ranges[-1][1] + 1:
+            ranges[-1][1] = value
+        else:
+            ranges.append([value, value])
+    return ranges
+
+
+def merge_ranges(ranges, extra):
+    """두 구간 목록 합치기 (겹치거나 맞닿는 구간은 하나로)"""
+    merged = []
+    for start, end in sorted([list(r) for r in ranges] + [list(r) for r in extra]):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def subtract_ranges(ranges, removed):
+    """ranges에서 removed 구간 빼기"""
+    result = []
+    removed = merge_ranges([], removed)
+    for start, end in ranges:
+        for removed_start, removed_end in removed:
+            if removed_end < start or removed_start > end:
+                continue
+            if removed_start > start:
+                result.append([start, removed_start - 1])
+            start = removed_end + 1
+            if start > end:
+                break
+        if start <= end:
+            result.append([start, end])
+    return result
+
+
+def count_ids(ranges):
+    return sum(end - start + 1 for start, end in ranges)
+
+
+class GapDetector:
+    """차량/epoch별로 받은 id 구간을 모아 누락 구간을 찾고 backfill 요청을 만드는 클래스
+
+    ingest(payload)로 수신 payload를 넣고, backfill_requests()가 보낼 요청 목록을 반환합니다.
+    요청: {'type': 'backfill', 'request_id', 'vehicle_id', 'epoch', 'ranges': [[시작, 끝], ...]}
+    """
+
+    def __init__(self, grace_seconds=30.0, retry_seconds=120.0, max_request_ids=20000, first_id=1):
+        self.grace_seconds = grace_seconds      # acked 이하 구간이 도착할 때까지 기다리는 시간
+        self.retry_seconds = retry_seconds      # 응답이 없으면 같은 구간을 다시 요청하는 간격
+        self.max_request_ids = max_request_ids  # 요청 1건에 담을 최대 샘플 수
+        self.first_id = first_id
+        self.streams = {}                       # {(vehicle_id, epoch): 상태}
+        self.latest_epoch = {}                  # {vehicle_id: 마지막으로 받은 epoch}
+        self.request_seq = 0
+        self.stats = {'messages': 0, 'samples': 0, 'requests': 0, 'requested_ids': 0,
+                      'backfilled_ids': 0, 'unavailable_ids': 0, 'epochs': 0}
+
+    def _stream(self, vehicle_id, epoch, latest=True):
+        key = (vehicle_id, epoch)
+        if key not in self.streams:
+            self.streams[key] = {'received': [], 'lost': [], 'acked': 0, 'acked_history': deque(),
+                                 'requested': {}}
+            if vehicle_id in self.latest_epoch and self.latest_epoch[vehicle_id] != epoch:
+                logger.warning(f"{vehicle_id} 순번 epoch 변경: {self.latest_epoch[vehicle_id]} -> {epoch} (트럭 DB 초기화)")
+            self.stats['epochs'] += 1
+        if latest:
+            self.latest_epoch[vehicle_id] = epoch
+        return self.streams[key]
+
+    def ingest(self, payload, now=None):
+        """수신 payload 반영 -> seq 정보가 있으면 True (없으면 이전 버전 트럭, 누락 감지 안 함)"""
+        seq = payload.get('seq')
+        if not seq:
+            return False
+        now = now or time.time()
+        vehicle_id, epoch = payload['vehicle_id'], seq['epoch']
+        covered = seq.get('covered') or []
+        unavailable = seq.get('unavailable') or []
+        self.stats['messages'] += 1
+
+        if seq.get('backfill') and epoch != self.latest_epoch.get(vehicle_id):
+            if not covered:
+                # 트럭에 남아 있지 않은 이전 epoch -> 더 요청하지 않도록 상태 삭제
+                if self.streams.pop((vehicle_id, epoch), None) is not None:
+                    logger.warning(f"{vehicle_id} 이전 epoch {epoch}는 트럭 DB에 없음, 누락 감지 종료")
+                self.stats['unavailable_ids'] += count_ids(unavailable)
+                return True
+        stream = self._stream(vehicle_id, epoch, latest=not seq.get('backfill'))
+
+        stream['received'] = merge_ranges(stream['received'], covered)
+        if unavailable:
+            stream['lost'] = merge_ranges(stream['lost'], unavailable)
+            self.stats['unavailable_ids'] += count_ids(unavailable)
+            logger.warning(f"{vehicle_id} 트럭에도 없는 구간 {unavailable} (보관 기간 지남)")
+        if seq.get('backfill'):
+            self.stats['backfilled_ids'] += count_ids(covered)
+
+        acked = seq.get('acked') or 0
+        if acked > stream['acked']:
+            stream['acked'] = acked
+            stream['acked_history'].append((now, acked))
+
+        self.stats['samples'] += len(payload.get('data') or [])
+        return True
+
+    def _outstanding(self, stream, request_id):
+        """요청한 구간 중 아직 받지 못한 것이 있는지"""
+        request = stream['requested'].get(request_id)
+        if request is None:
+            return False
+        return bool(subtract_ranges(request['ranges'], stream['received'] + stream['lost']))
+
+    def _settled_acked(self, stream, now):
+        """grace_seconds 전에 보고된 acked (그 이후 보고분은 아직 도착 중일 수 있음)"""
+        history = stream['acked_history']
+        settled = None
+        while history and now - history[0][0] >= self.grace_seconds:
+            settled = history.popleft()[1]
+        if settled is not None:
+            stream['settled'] = settled
+        return stream.get('settled', 0)
+
+    def missing(self, vehicle_id, epoch, now=None):
+        """acked 이하에서 받지 못한 구간 (grace_seconds 지난 것만)"""
+        now = now or time.time()
+        stream = self.streams.get((vehicle_id, epoch))
+        if stream is None:
+            return []
+        acked = self._settled_acked(stream, now)
+        if acked < self.first_id:
+            return []
+        return subtract_ranges([[self.first_id, acked]], stream['received'] + stream['lost'])
+
+    def backfill_requests(self, now=None):
+        """보낼 backfill 요청 목록 (요청 중인 구간은 retry_seconds 동안 다시 요청하지 않음)"""
+        now = now or time.time()
+        requests = []
+        for (vehicle_id, epoch), stream in self.streams.items():
+            # 응답이 끝났거나 오래된 요청 정리
+            stream['requested'] = {request_id: request for request_id, request in stream['requested'].items()
+                                   if now - request['at'] < self.retry_seconds
+                                   and self._outstanding(stream, request_id)}
+            pending = self.missing(vehicle_id, epoch, now)
+            for request in stream['requested'].values():
+                pending = subtract_ranges(pending, request['ranges'])
+            ranges, total = [], 0
+            for start, end in pending:
+                if total >= self.max_request_ids:
+                    break
+                end = min(end, start + self.max_request_ids - total - 1)
+                ranges.append([start, end])
+                total += end - start + 1
+            if not ranges:
+                continue
+
+            self.request_seq += 1
+            request_id = f"{int(now)}-{self.request_seq}"
+            stream['requested'][request_id] = {'ranges': ranges, 'at': now}
+            requests.append({'type': 'backfill', 'request_id': request_id, 'vehicle_id': vehicle_id,
+                             'epoch': epoch, 'ranges': ranges})
+            self.stats['requests'] += 1
+            self.stats['requested_ids'] += total
+            logger.info(f"{vehicle_id} 누락 구간 {len(ranges)}개 ({total}건) 재전송 요청 {request_id}")
+        return requests
+
+    def get_stats(self, now=None):
+        now = now or time.time()
+        return {
+            **self.stats,
+            'streams': {f"{vehicle_id}/{epoch}": {
+                'acked': stream['acked'],
+                'received': count_ids(stream['received']),
+                'missing': count_ids(self.missing(vehicle_id, epoch, now)),
+                'lost': count_ids(stream['lost']),
+                'requests_open': len(stream['requested']),
+            } for (vehicle_id, epoch), stream in self.streams.items()},
+        }
+
+
+def run_ingest(host, port, topic, control_prefix=None, interval=5.0, **options):
+    """수신 서버 예시: 샘플 토픽을 구독해 누락 구간을 감지하고 제어 토픽으로 backfill 요청 발행 (paho 필요)"""
+    import paho.mqtt.client as mqtt
+    from payload_codec import decode_payload
+
+    control_prefix = control_prefix or topic + "/control"
+    detector = GapDetector(**options)
+    # ingest는 paho 네트워크 스레드, backfill_requests는 메인 루프에서 실행 (GapDetector는 스레드 안전하지 않음)
+    lock = threading.Lock()
+
+    def on_message(client, userdata, message):
+        try:
+            payload = decode_payload(message.payload)
+            with lock:
+                detector.ingest(payload)
+        except Exception as e:
+            logger.error(f"payload 처리 실패 ({message.topic}): {e}")
+
+    client = mqtt.Client(client_id="gap_detector", clean_session=False)
+    client.on_connect = lambda client, userdata, flags, rc: client.subscribe(topic, qos=1)
+    client.on_message = on_message
+    client.connect(host, port)
+    client.loop_start()
+    try:
+        while True:
+            time.sleep(interval)
+            with lock:
+                requests = detector.backfill_requests()
+            for request in requests:
+                client.publish(f"{control_prefix}/{request['vehicle_id']}", json.dumps(request), qos=1)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MQTT 샘플 누락 구간 감지 + backfill 요청")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--topic', default='truck/gps_temp')
+    parser.add_argument('--grace', type=float, default=30.0, help="acked 이하 구간 도착 대기 시간 (초)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_ingest(args.host, args.port, args.topic, grace_seconds=args.grace)
@@ -4,73 +4,258 @@
 GPSD 또는 시리얼 포트를 통해 GPS 데이터 수신
 """
 
+import glob
 import logging
+import random
 import serial
+import threading
 import time
-from config import GPS_PORT, GPS_BAUDRATE
+from collections import namedtuple
+from datetime import datetime, timezone
+from config import (
+    GPS_PORT,
+    GPS_BAUDRATE,
+    GPS_CAPTURE_ENABLED,
+    GPS_PORT_PATTERNS,
+    GPS_USB_IDS,
+    GPS_RECONNECT_BASE_DELAY,
+    GPS_RECONNECT_MAX_DELAY,
+)
 
 logger = logging.getLogger(__name__)
 
+# 허용하는 NMEA talker ID (GPS 단독 / 다중 GNSS)
+NMEA_TALKERS = ('$GP', '$GN')
+
+# NMEA 유효성 규칙 (nmea_bulk_decoder.py와 공유)
+MIN_FIX_QUALITY = 1        # GGA 품질 0 = 측위 무효
+RMC_VALID_STATUS = 'A'     # RMC 상태 A = 유효, V = 경고(무효)
+KNOTS_TO_KMH = 1.852
+
+# 한 번의 측위 결과를 담는 압축 레코드 (DB 저장/필터링용)
+GPSFix = namedtuple('GPSFix', [
+    'fix_time',         # 측위 UTC 시각 (epoch 초, 날짜를 모르면 None)
+    'latitude',
+    'longitude',
+    'altitude',
+    'speed',            # km/h
+    'heading',          # 도
+    'fix_quality',      # GGA 품질 (0=무효, 1=GPS, 2=DGPS ...)
+    'fix_type',         # GSA 측위 유형 (1=없음, 2=2D, 3=3D)
+    'satellites',       # GGA 사용 위성 수
+    'satellites_used',  # GSA 사용 위성 PRN 개수
+    'hdop',
+    'pdop',
+])
+
+
+def verify_nmea_checksum(sentence):
+    """NMEA 체크섬 검증 (체크섬이 없는 문장은 통과)"""
+    star = sentence.rfind('*')
+    if star == -1:
+        return True
+    try:
+        expected = int(sentence[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+    checksum = 0
+    for ch in sentence[1:star]:
+        checksum ^= ord(ch)
+    return checksum == expected
+
+
+def split_nmea_fields(sentence):
+    """체크섬을 제거한 뒤 NMEA 필드 목록 반환"""
+    star = sentence.rfind('*')
+    if star != -1:
+        sentence = sentence[:star]
+    return sentence.split(',')
+
+
+def sentence_type(sentence):
+    """'$GNGGA,...' -> 'GGA' (허용되지 않은 talker면 None)"""
+    if sentence[:3] not in NMEA_TALKERS:
+        return None
+    return sentence[3:6]
+
+
+def parse_nmea_time(field):
+    """hhmmss.ss -> 자정 이후 초 (빈 값이면 None)"""
+    if not field or len(field) < 6:
+        return None
+    return int(field[0:2]) * 3600 + int(field[2:4]) * 60 + float(field[4:])
+
+
+def fix_epoch(utc_date, seconds_of_day, date_seconds=None):
+    """UTC 날짜 + 자정 이후 초 -> epoch 초
+
+    date_seconds는 날짜를 받은 문장(RMC/ZDA)의 시각. GGA 시각과 12시간 넘게 차이 나면
+    자정을 넘긴 것으로 보고 날짜를 하루 옮김 (자정 직후 GGA가 다음 RMC보다 먼저 오는 경우)
+    """
+    if utc_date is None or seconds_of_day is None:
+        return None
+    midnight = datetime(utc_date[0], utc_date[1], utc_date[2], tzinfo=timezone.utc).timestamp()
+    if date_seconds is not None:
+        if seconds_of_day < date_seconds - 43200:
+            midnight += 86400
+        elif seconds_of_day > date_seconds + 43200:
+            midnight -= 86400
+    return midnight + seconds_of_day
+
+
+def find_gps_ports():
+    """GPS 후보 포트 목록 (설정 포트 우선, 그다음 USB ID가 일치하는 포트)
+
+    GPS_USB_IDS가 비어 있으면 패턴에 맞는 모든 포트를 후보로 사용합니다.
+    """
+    usb_ids = {}
+    try:
+        from serial.tools import list_ports
+        for port_info in list_ports.comports():
+            if port_info.vid is not None:
+                usb_ids[port_info.device] = (port_info.vid, port_info.pid)
+    except Exception as e:
+        logger.debug(f"USB 포트 정보 조회 실패: {e}")
+
+    candidates = [GPS_PORT]
+    for pattern in GPS_PORT_PATTERNS:
+        for device in sorted(glob.glob(pattern)):
+            if device in candidates:
+                continue
+            if GPS_USB_IDS and usb_ids.get(device) not in GPS_USB_IDS:
+                continue
+            candidates.append(device)
+    return candidates
+
 
 class GPSReader:
-    """GPS 모듈에서 NMEA 데이터를 읽는 클래스"""
+    """GPS 모듈에서 NMEA 데이터를 읽는 클래스
 
-    def __init__(self):
+    생성 시 한 번만 연결을 시도하고 실패해도 예외를 던지지 않습니다.
+    재연결은 GPSReconnectManager가 백그라운드에서 담당합니다.
+    """
+
+    def __init__(self, source=None, capture=None):
+        """
+        Args:
+            source: 시리얼 포트 대신 사용할 입력 (예: nmea_capture.NMEAReplaySource)
+            capture: 원시 NMEA 캡처기 (None이면 GPS_CAPTURE_ENABLED 설정에 따름)
+        """
+        self.source = source
         self.serial_conn = None
         self.last_successful_read = None
         self.connection_attempts = 0
-        self.max_connection_attempts = 5
+        self.port = None
+        self.reconnect_manager = None
+
+        # 연결 끊김 통계
+        self.disconnected_since = time.time()
+        self.disconnect_count = 0
+        self.total_disconnected_seconds = 0.0
+
+        # 여러 문장에 걸쳐 들어오는 부가 정보 (RMC/ZDA 날짜, GSA DOP 등)
+        self.utc_date = None  # (year, month, day)
+        self.utc_date_seconds = None  # 날짜를 받은 문장의 자정 이후 초 (자정 넘김 판정용)
+        self.aux_data = {}
+        self.last_fix = None
+
+        # 원시 NMEA 캡처 (재현/벤치마크용, 읽기 경로를 막지 않음)
+        if capture is None and GPS_CAPTURE_ENABLED and source is None:
+            from nmea_capture import NMEACaptureWriter
+            capture = NMEACaptureWriter()
+        self.capture = capture
+
         self.connect()
     
     def connect(self):
-        """GPS 모듈에 연결"""
-        try:
-            # 기존 연결이 있으면 종료
-            if self.serial_conn and self.serial_conn.is_open:
-                self.serial_conn.close()
+        """GPS 모듈에 연결 (후보 포트를 한 번씩 시도, 성공 여부 반환)"""
+        if self.source is not None:
+            # 재생 입력은 시리얼 포트처럼 그대로 사용
+            self.serial_conn = self.source
+            self._mark_connected()
+            logger.info("✅ GPS 입력: 캡처 재생 소스")
+            return True
+
+        # 기존 연결이 있으면 종료
+        self._close_serial()
 
-            self.serial_conn = serial.Serial(
-                GPS_PORT,
-                baudrate=GPS_BAUDRATE,
-                timeout=1,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE,
-                bytesize=serial.EIGHTBITS
-            )
+        last_error = None
+        for port in find_gps_ports():
+            try:
+                self.serial_conn = serial.Serial(
+                    port,
+                    baudrate=GPS_BAUDRATE,
+                    timeout=1,
+                    parity=serial.PARITY_NONE,
+                    stopbits=serial.STOPBITS_ONE,
+                    bytesize=serial.EIGHTBITS
+                )
+            except serial.SerialException as e:
+                last_error = e
+                continue
 
             # 연결 직후 약간의 대기 시간
             time.sleep(0.1)
 
+            self.port = port
             self.connection_attempts = 0
-            logger.info(f"✅ GPS 모듈 연결 성공: {GPS_PORT}")
+            outage = self._mark_connected()
+            if outage:
+                logger.info(f"✅ GPS 모듈 연결 성공: {port} (끊김 {outage:.1f}초)")
+            else:
+                logger.info(f"✅ GPS 모듈 연결 성공: {port}")
+            return True
 
-        except serial.SerialException as e:
-            self.connection_attempts += 1
-            logger.error(f"❌ GPS 모듈 연결 실패 (시도 {self.connection_attempts}/{self.max_connection_attempts}): {e}")
+        self.connection_attempts += 1
+        logger.error(f"❌ GPS 모듈 연결 실패 (시도 {self.connection_attempts}): {last_error or 'GPS 포트 없음'}")
+        return False
 
-            if self.connection_attempts >= self.max_connection_attempts:
-                logger.error(f"❌ 최대 연결 시도 횟수 초과. GPS 모듈이 연결되지 않았거나 포트가 사용 중입니다.")
-                raise
-            else:
-                logger.info("재연결을 시도합니다...")
-                time.sleep(2)  # 잠시 대기 후 재시도
-                self.connect()
+    def _close_serial(self):
+        """시리얼 포트 닫기 (오류 무시)"""
+        if self.serial_conn is not None:
+            try:
+                self.serial_conn.close()
+            except Exception:
+                pass
+            self.serial_conn = None
+
+    def _mark_connected(self):
+        """연결 상태 기록, 직전 끊김 시간(초) 반환"""
+        if self.disconnected_since is None:
+            return 0.0
+        outage = time.time() - self.disconnected_since
+        self.total_disconnected_seconds += outage
+        self.disconnected_since = None
+        return outage
+
+    def _mark_disconnected(self):
+        """연결 끊김 기록 후 포트 정리"""
+        self._close_serial()
+        if self.disconnected_since is None:
+            self.disconnected_since = time.time()
+            self.disconnect_count += 1
+            logger.warning(f"GPS 모듈 연결 끊김 (누적 {self.disconnect_count}회)")
 
     def is_connected(self):
         """연결 상태 확인"""
         return self.serial_conn is not None and self.serial_conn.is_open
 
     def reconnect(self):
-        """연결 재시도"""
+        """연결 재시도 (성공 여부 반환)"""
         logger.info("GPS 모듈 재연결을 시도합니다...")
-        self.connect()
+        return self.connect()
+
+    def get_disconnected_seconds(self):
+        """누적 끊김 시간 (현재 끊김 포함)"""
+        current = time.time() - self.disconnected_since if self.disconnected_since else 0.0
+        return self.total_disconnected_seconds + current
     
     def parse_nmea_gga(self, sentence):
         """GPGGA NMEA 문장 파싱"""
         try:
-            parts = sentence.split(',')
+            parts = split_nmea_fields(sentence)
             
-            if len(parts) < 15 or parts[0] not in ['$GPGGA', '$GNGGA']:
+            if len(parts) < 15 or sentence_type(parts[0]) != 'GGA':
                 return None
             
             # 위도 파싱
@@ -95,84 +280,193 @@ class GPSReader:
             
             # 추가 정보
             fix_quality = int(parts[6]) if parts[6] else 0
+            if fix_quality < MIN_FIX_QUALITY:
+                return None
             satellites = int(parts[7]) if parts[7] else 0
+            hdop = float(parts[8]) if parts[8] else None
             altitude = float(parts[9]) if parts[9] else None
+            utc_seconds = parse_nmea_time(parts[1])
             
             return {
                 'latitude': latitude,
                 'longitude': longitude,
                 'altitude': altitude,
                 'satellites': satellites,
-                'fix_quality': fix_quality
+                'fix_quality': fix_quality,
+                'hdop': hdop,
+                'utc_seconds': utc_seconds
             }
         except (ValueError, IndexError) as e:
             logger.debug(f"NMEA 파싱 오류: {e}")
             return None
     
     def parse_nmea_rmc(self, sentence):
-        """GPRMC NMEA 문장 파싱 (속도, 방향 정보)"""
+        """GPRMC NMEA 문장 파싱 (속도, 방향, UTC 날짜 정보)"""
         try:
-            parts = sentence.split(',')
+            parts = split_nmea_fields(sentence)
             
-            if len(parts) < 12 or parts[0] not in ['$GPRMC', '$GNRMC']:
+            if len(parts) < 10 or sentence_type(parts[0]) != 'RMC':
+                return None
+
+            if parts[2] != RMC_VALID_STATUS:
                 return None
             
             # 속도 (노트를 km/h로 변환)
-            speed = float(parts[7]) * 1.852 if parts[7] else None
+            speed = float(parts[7]) * KNOTS_TO_KMH if parts[7] else None
             
             # 방향 (도)
             heading = float(parts[8]) if parts[8] else None
+
+            # UTC 날짜 (ddmmyy)
+            if len(parts[9]) == 6:
+                self.utc_date = (2000 + int(parts[9][4:6]), int(parts[9][2:4]), int(parts[9][0:2]))
+                self.utc_date_seconds = parse_nmea_time(parts[1])
             
             return {
                 'speed': speed,
-                'heading': heading
+                'heading': heading,
+                'utc_seconds': parse_nmea_time(parts[1])
             }
         except (ValueError, IndexError) as e:
             logger.debug(f"NMEA 파싱 오류: {e}")
             return None
     
+    def parse_nmea_gsa(self, sentence):
+        """GPGSA NMEA 문장 파싱 (측위 유형, 사용 위성, DOP)"""
+        try:
+            parts = split_nmea_fields(sentence)
+
+            if len(parts) < 18 or sentence_type(parts[0]) != 'GSA':
+                return None
+
+            fix_type = int(parts[2]) if parts[2] else None
+            satellites_used = sum(1 for prn in parts[3:15] if prn)
+
+            return {
+                'fix_type': fix_type,
+                'satellites_used': satellites_used,
+                'pdop': float(parts[15]) if parts[15] else None,
+                'hdop': float(parts[16]) if parts[16] else None
+            }
+        except (ValueError, IndexError) as e:
+            logger.debug(f"NMEA 파싱 오류: {e}")
+            return None
+
+    def parse_nmea_vtg(self, sentence):
+        """GPVTG NMEA 문장 파싱 (대지 속도, 진행 방향)"""
+        try:
+            parts = split_nmea_fields(sentence)
+
+            if len(parts) < 9 or sentence_type(parts[0]) != 'VTG':
+                return None
+
+            return {
+                'heading': float(parts[1]) if parts[1] else None,
+                'speed': float(parts[7]) if parts[7] else None  # 이미 km/h
+            }
+        except (ValueError, IndexError) as e:
+            logger.debug(f"NMEA 파싱 오류: {e}")
+            return None
+
+    def parse_nmea_zda(self, sentence):
+        """GPZDA NMEA 문장 파싱 (UTC 날짜/시각)"""
+        try:
+            parts = split_nmea_fields(sentence)
+
+            if len(parts) < 5 or sentence_type(parts[0]) != 'ZDA':
+                return None
+
+            if parts[2] and parts[3] and parts[4]:
+                self.utc_date = (int(parts[4]), int(parts[3]), int(parts[2]))
+                self.utc_date_seconds = parse_nmea_time(parts[1])
+
+            return {
+                'utc_seconds': parse_nmea_time(parts[1])
+            }
+        except (ValueError, IndexError) as e:
+            logger.debug(f"NMEA 파싱 오류: {e}")
+            return None
+
+    def handle_sentence(self, line, gps_data):
+        """NMEA 한 줄을 파싱해 gps_data에 반영 (위치 문장이면 True)"""
+        if not verify_nmea_checksum(line):
+            logger.debug(f"NMEA 체크섬 불일치: {line}")
+            return False
+
+        kind = sentence_type(line)
+        if kind == 'GGA':
+            gga_data = self.parse_nmea_gga(line)
+            if gga_data:
+                gps_data.update(gga_data)
+                return True
+        elif kind == 'RMC':
+            rmc_data = self.parse_nmea_rmc(line)
+            if rmc_data:
+                gps_data.update(rmc_data)
+        elif kind == 'VTG':
+            vtg_data = self.parse_nmea_vtg(line)
+            if vtg_data:
+                # RMC 값이 있으면 유지, 없을 때만 보충
+                for key, value in vtg_data.items():
+                    if value is not None:
+                        gps_data.setdefault(key, value)
+        elif kind == 'GSA':
+            gsa_data = self.parse_nmea_gsa(line)
+            if gsa_data:
+                # 다중 GNSS는 시스템별 GSA가 여러 개 -> 사용 위성 수 합산
+                used = self.aux_data.get('satellites_used', 0) if self.aux_data.get('_gsa_open') else 0
+                gsa_data['satellites_used'] += used
+                self.aux_data.update(gsa_data)
+                self.aux_data['_gsa_open'] = True
+        elif kind == 'ZDA':
+            self.parse_nmea_zda(line)
+        return False
+
+    def build_fix(self, gps_data):
+        """부가 정보를 합쳐 압축 측위 레코드(GPSFix) 생성"""
+        # 다음 GSA 묶음은 새로 합산
+        self.aux_data['_gsa_open'] = False
+        for key in ('fix_type', 'satellites_used', 'pdop', 'hdop'):
+            if gps_data.get(key) is None and self.aux_data.get(key) is not None:
+                gps_data[key] = self.aux_data[key]
+
+        gps_data['fix_time'] = fix_epoch(self.utc_date, gps_data.pop('utc_seconds', None), self.utc_date_seconds)
+
+        self.last_fix = GPSFix(*(gps_data.get(field) for field in GPSFix._fields))
+        return gps_data
+
+    def get_fix(self):
+        """마지막 압축 측위 레코드 반환"""
+        return self.last_fix
+
     def read(self):
         """GPS 데이터 읽기"""
         if not self.is_connected():
-            logger.warning("GPS 연결이 끊어져 재연결을 시도합니다")
-            try:
-                self.reconnect()
-            except:
-                logger.error("GPS 재연결 실패")
+            # 재연결 관리자가 있으면 백그라운드 재연결에 맡김 (읽기 경로를 막지 않음)
+            if self.reconnect_manager is not None or not self.reconnect():
                 return None
 
         gps_data = {}
 
         try:
-            # 연결 상태 확인
-            if not self.serial_conn.is_open:
-                logger.warning("시리얼 포트가 닫혀있습니다. 재연결을 시도합니다")
-                self.reconnect()
-                return None
-
             # 여러 NMEA 문장을 읽어서 완전한 데이터 구성
             for attempt in range(15):  # 최대 15번 시도
                 try:
                     if self.serial_conn.in_waiting > 0:
-                        line = self.serial_conn.readline().decode('ascii', errors='ignore').strip()
+                        raw_line = self.serial_conn.readline()
+                        if self.capture:
+                            self.capture.write(raw_line)
+                        line = raw_line.decode('ascii', errors='ignore').strip()
 
                         if not line:
                             continue
 
-                        if line.startswith('$GPGGA') or line.startswith('$GNGGA'):
-                            gga_data = self.parse_nmea_gga(line)
-                            if gga_data:
-                                gps_data.update(gga_data)
-
-                        elif line.startswith('$GPRMC') or line.startswith('$GNRMC'):
-                            rmc_data = self.parse_nmea_rmc(line)
-                            if rmc_data:
-                                gps_data.update(rmc_data)
+                        self.handle_sentence(line, gps_data)
 
                         # 위도/경도가 있으면 반환
                         if 'latitude' in gps_data and 'longitude' in gps_data:
                             self.last_successful_read = time.time()
-                            return gps_data
+                            return self.build_fix(gps_data)
                     else:
                         # 데이터가 없으면 잠시 대기
                         time.sleep(0.05)
@@ -181,6 +475,8 @@ class GPSReader:
                 except UnicodeDecodeError as e:
                     logger.debug(f"데이터 디코딩 오류: {e}")
                     continue
+                except serial.SerialException:
+                    raise
                 except Exception as e:
                     logger.debug(f"데이터 읽기 중 오류: {e}")
                     break
@@ -198,15 +494,10 @@ class GPSReader:
 
             return gps_data if gps_data else None
 
-        except serial.SerialException as e:
+        except (serial.SerialException, OSError) as e:
+            # USB 분리 등 -> 끊김으로 기록, 재연결은 관리자가 담당
             logger.error(f"시리얼 통신 오류: {e}")
-            # 연결이 끊어진 것 같으면 재연결 시도
-            if "device reports readiness to read but returned no data" in str(e):
-                logger.info("장치 연결이 끊어진 것 같습니다. 재연결을 시도합니다...")
-                try:
-                    self.reconnect()
-                except:
-                    logger.error("GPS 재연결 실패")
+            self._mark_disconnected()
             return None
         except Exception as e:
             logger.error(f"GPS 읽기 중 예상치 못한 오류: {e}")
@@ -214,6 +505,12 @@ class GPSReader:
     
     def close(self):
         """연결 종료"""
+        if self.reconnect_manager:
+            self.reconnect_manager.stop()
+            self.reconnect_manager = None
+        if self.capture:
+            self.capture.close()
+            self.capture = None
         if self.serial_conn:
             try:
                 self.serial_conn.close()
@@ -227,7 +524,67 @@ class GPSReader:
             'connected': self.is_connected(),
             'last_successful_read': self.last_successful_read,
             'connection_attempts': self.connection_attempts,
-            'port': GPS_PORT,
-            'baudrate': GPS_BAUDRATE
+            'port': self.port or GPS_PORT,
+            'baudrate': GPS_BAUDRATE,
+            'disconnect_count': self.disconnect_count,
+            'disconnected_seconds': self.get_disconnected_seconds(),
+            'last_fix': self.last_fix._asdict() if self.last_fix else None
         }
 
+
+
+class GPSReconnectManager:
+    """GPS 모듈 핫플러그 재연결 관리자
+
+    연결이 끊어져 있으면 지수 백오프(+지터) 간격으로 후보 포트를 다시 검색합니다.
+    백그라운드 스레드에서 동작하므로 시작/읽기 경로를 막지 않습니다.
+    """
+
+    def __init__(self, reader, base_delay=GPS_RECONNECT_BASE_DELAY, max_delay=GPS_RECONNECT_MAX_DELAY):
+        self.reader = reader
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = base_delay
+
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        reader.reconnect_manager = self
+
+    def start(self):
+        """재연결 스레드 시작"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        logger.info(f"GPS 재연결 관리자 시작 (백오프 {self.base_delay}~{self.max_delay}초)")
+
+    def stop(self):
+        """재연결 스레드 중지"""
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+    def _loop(self):
+        """끊김 감시 및 백오프 재연결 (백그라운드 스레드)"""
+        while self.running:
+            if self.reader.is_connected():
+                self.delay = self.base_delay
+                self._stop_event.wait(0.5)
+                continue
+
+            if self.reader.connect():
+                self.delay = self.base_delay
+                continue
+
+            # 다음 시도까지 지수 백오프 (동시 재시도 방지를 위한 지터 포함)
+            wait = self.delay * random.uniform(0.8, 1.2)
+            logger.info(f"GPS 재연결 대기 {wait:.1f}초")
+            self._stop_event.wait(wait)
+            self.delay = min(self.max_delay, self.delay * 2)
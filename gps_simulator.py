@@ -52,6 +52,8 @@ class GPSSimulator:
         
         # 고도에 약간의 변화
         self.current_altitude = 50.0 + random.uniform(-5, 5)
+
+        satellites = random.randint(8, 12)
         
         return {
             'latitude': self.current_lat + random.uniform(-0.00001, 0.00001),
@@ -59,8 +61,13 @@ class GPSSimulator:
             'altitude': self.current_altitude,
             'speed': max(0, self.current_speed),
             'heading': self.current_heading,
-            'satellites': random.randint(8, 12),
-            'fix_quality': 1
+            'satellites': satellites,
+            'fix_quality': 1,
+            'fix_type': 3,
+            'satellites_used': satellites,
+            'hdop': round(random.uniform(0.7, 1.2), 2),
+            'pdop': round(random.uniform(1.2, 1.8), 2),
+            'fix_time': time.time()
         }
     
     def close(self):
@@ -13,7 +13,17 @@ from collections import deque
 from datetime import datetime
 from database import GPSDatabase
 from server_sender import ServerSender
-from config import DB_PATH, SAMPLE_RATE, INTERVAL, LOG_LEVEL, LOG_FILE, VEHICLE_ID, RETENTION_SECONDS, TEMP_RANGES
+from temperature_filter import TemperatureFilter
+from excursion_engine import ExcursionEngine, classify_temperature
+from stability import StabilityTracker
+from temperature_forecast import TemperatureForecaster
+from anomaly_detector import AnomalyDetector
+from alarm_monitor import AlarmMonitor
+from config import (
+    DB_PATH, SAMPLE_RATE, INTERVAL, LOG_LEVEL, LOG_FILE, VEHICLE_ID, RETENTION_SECONDS, TEMP_RANGES,
+    TEMP_CHANNELS, TEMP_SENSOR_TYPE, TEMP_SENSOR_ISOLATED, TRIP_RESUME_SECONDS,
+    SHIPMENT_ID, ALARM_SENSOR_LOST_SECONDS,
+)
 
 # 로깅 설정
 logging.basicConfig(
@@ -33,13 +43,15 @@ class GPSTracker:
     def __init__(self):
         self.running = False
         self.db = None
-        self.gps_reader = None
+        self.gps_reader = None       # 현재 사용 중인 GPS 입력 (실제 모듈 또는 시뮬레이터)
+        self.gps_hw_reader = None    # 실제 GPS 모듈 (시뮬레이터 사용 중에도 재연결 감시)
         self.temp_reader = None  # 온도 센서 추가
+        self.sensor_manager = None  # 다중 온도 채널 관리자 (TEMP_CHANNELS 설정 시)
         self.server_sender = None  # 서버 전송기 추가
 
         # 데이터 버퍼 (초당 데이터 수 모니터링용)
         self.gps_buffer = deque(maxlen=100)  # 최근 100개 GPS 데이터
-        self.temp_buffer = deque(maxlen=100)  # 최근 100개 온도 데이터
+        self.temp_buffer = deque(maxlen=100)  # 최근 100개 온도 데이터 (필터값 + 원시값)
         self.buffer_lock = threading.Lock()
 
         # 데이터 읽기 스레드
@@ -49,33 +61,102 @@ class GPSTracker:
         # 온도 상태 범위 설정 (config.py에서 가져옴)
         self.temp_ranges = TEMP_RANGES
 
+        # 온도 스파이크 제거 필터 (상태 판단은 필터링된 값으로)
+        self.temp_filter = TemperatureFilter()
+
+        # 온도 이탈 판정 (히스테리시스 상태, 구간별 체류 시간, 운행 합계)
+        self.excursion_engine = ExcursionEngine(ranges=TEMP_RANGES)
+
+        # 평균 동역학 온도(MKT)와 안정성 예산 (운행/배송 단위)
+        self.stability = StabilityTracker(self.excursion_engine.trip_id, SHIPMENT_ID)
+
+        # 온도 추세로 적정 범위 이탈까지 남은 시간 예측 (필터링된 값 기준)
+        self.forecaster = TemperatureForecaster()
+
+        # 급변/추세 변화 감지 (다중 채널이면 채널별 감지기를 SensorManager에서 사용)
+        self.anomaly_detector = AnomalyDetector(channel='main')
+
+        # 즉시 전송 알람 (상태 전환, 센서 끊김, 지오펜스)
+        self.alarm_monitor = AlarmMonitor()
+
     def get_temperature_status(self, temperature):
-        """온도값에 따른 상태 판단"""
-        if temperature is None:
-            return 'unknown'
+        """온도값에 따른 상태 판단 (히스테리시스 없음, 저장 상태는 excursion_engine 사용)"""
+        return classify_temperature(temperature, self.temp_ranges)
+
+    def setup_excursion_engine(self):
+        """최근에 저장된 운행 상태가 있으면 이어서 집계 (배송 MKT는 항상 이어서 집계)"""
+        state = self.db.get_latest_excursion_state()
+        if state and time.time() - state['updated_at'] <= TRIP_RESUME_SECONDS:
+            self.excursion_engine.restore(state)
+            self.stability.start_trip(self.excursion_engine.trip_id)
+            trip_state = self.db.get_stability_state('trip', self.excursion_engine.trip_id)
+            if trip_state:
+                self.stability.trip.restore(trip_state)
+
+        shipment_state = self.db.get_stability_state('shipment', SHIPMENT_ID)
+        if shipment_state:
+            self.stability.shipment.restore(shipment_state)
+            logger.info(f"배송 {SHIPMENT_ID} MKT 누적 이어서 진행 (누적 {shipment_state['weight_seconds'] / 3600:.1f}시간)")
+
+    def save_trip_state(self):
+        """운행 이탈 상태와 MKT 누적값 저장"""
+        self.db.save_excursion_state(self.excursion_engine.get_state())
+        self.db.save_stability_state([self.stability.trip.get_state(), self.stability.shipment.get_state()])
 
-        for status, (min_temp, max_temp) in self.temp_ranges.items():
-            if min_temp <= temperature < max_temp:
-                return status
-        return 'normal'
+    def record_temperature_status(self, temperature, temp_age=None, sample_time=None):
+        """이탈 엔진에 샘플 반영 후 상태 반환 (이탈 시작/종료 이벤트는 즉시 저장)
+
+        temperature는 캐시된 마지막 값이므로, temp_age가 ALARM_SENSOR_LOST_SECONDS를 넘으면
+        센서가 멈춘 것으로 보고 None으로 넘겨 그 시간은 unknown으로 집계 (MKT 누적에서도 제외)
+        sample_time은 이번 주기에 새 온도 값이 들어왔을 때 그 측정 시각 (이상 감지는 새 값만 반영)
+        """
+        live_temperature = temperature
+        if temp_age is None or temp_age > ALARM_SENSOR_LOST_SECONDS:
+            live_temperature = None
+        status, events = self.excursion_engine.update(live_temperature)
+        self.stability.update(live_temperature)
+        for event in events:
+            self.db.insert_excursion_event(event)
+
+        if self.sensor_manager:
+            anomalies = self.sensor_manager.pop_anomaly_events()
+        elif sample_time is not None:
+            # 캐시된 값을 반복해 넣으면 분산이 0으로 줄어 다음 실제 값의 z-점수가 부풀려짐
+            anomalies = self.anomaly_detector.update(temperature, sample_time)
+        else:
+            anomalies = []
+        if anomalies:
+            self.db.insert_anomaly_events(anomalies)
+        return status
+
+    def check_alarms(self, temperature, temp_age, gps_data, channels):
+        """알람 판정 후 즉시 저장 (ServerSender가 알람 토픽으로 먼저 전송)"""
+        alarms = self.alarm_monitor.update(
+            self.excursion_engine.band, temperature, temp_age,
+            latitude=gps_data['latitude'] if gps_data else None,
+            longitude=gps_data['longitude'] if gps_data else None,
+            channels=channels
+        )
+        if alarms:
+            self.db.insert_alarm_events(alarms)
 
     def check_gps_connection(self):
-        """GPS 연결 상태 확인 및 재연결"""
-        if not self.gps_reader:
+        """GPS 연결 상태 확인 후 실제 모듈/시뮬레이터 전환
+
+        재연결 자체는 GPSReconnectManager가 백그라운드에서 수행하므로
+        여기서는 연결 상태에 맞춰 사용할 입력만 바꿉니다.
+        """
+        if not self.gps_hw_reader:
             return
 
         try:
-            gps_status = self.gps_reader.get_status()
-
-            if not gps_status['connected']:
-                logger.warning("GPS 연결이 끊어져 있습니다. 재연결을 시도합니다...")
-                try:
-                    self.gps_reader.reconnect()
-                    logger.info("GPS 재연결 성공")
-                except Exception as e:
-                    logger.error(f"GPS 재연결 실패: {e}")
-                    # GPS 시뮬레이터로 전환 시도
-                    self.switch_to_gps_simulator()
+            connected = self.gps_hw_reader.is_connected()
+
+            if self.gps_reader is self.gps_hw_reader and not connected:
+                logger.warning("GPS 연결이 끊어져 있습니다. 재연결될 때까지 시뮬레이터를 사용합니다")
+                self.switch_to_gps_simulator()
+            elif self.gps_reader is not self.gps_hw_reader and connected:
+                self.switch_to_gps_hardware()
 
         except Exception as e:
             logger.error(f"GPS 연결 상태 확인 중 오류: {e}")
@@ -86,16 +167,25 @@ class GPSTracker:
             logger.info("GPS 시뮬레이터로 전환을 시도합니다...")
             from gps_simulator import GPSSimulator
 
-            # 기존 GPS 리더 정리
-            if self.gps_reader:
-                self.gps_reader.close()
-
-            # GPS 시뮬레이터로 교체
+            # 실제 GPS 리더는 닫지 않음 (재연결 관리자가 계속 감시)
             self.gps_reader = GPSSimulator()
             logger.info("✅ GPS 시뮬레이터로 전환 완료")
 
         except Exception as e:
             logger.error(f"GPS 시뮬레이터 전환 실패: {e}")
+
+    def switch_to_gps_hardware(self):
+        """GPS 모듈이 다시 연결되면 실제 모듈로 복귀"""
+        simulator = self.gps_reader
+        self.gps_reader = self.gps_hw_reader
+        if simulator:
+            simulator.close()
+
+        status = self.gps_hw_reader.get_status()
+        logger.info(
+            f"✅ 실제 GPS 모듈로 복귀: {status['port']} "
+            f"(끊김 {status['disconnect_count']}회, 누적 {status['disconnected_seconds']:.1f}초)"
+        )
         
     def setup(self):
         """초기 설정"""
@@ -105,32 +195,59 @@ class GPSTracker:
         self.db = GPSDatabase()
         self.db.connect()
         self.db.create_tables()
+        self.setup_excursion_engine()
         
         # GPS 리더 초기화 (실제 GPS 모듈 또는 시뮬레이터)
+        # 연결 실패 시에도 대기하지 않고 시뮬레이터로 시작, 모듈이 연결되면 자동 복귀
         try:
-            from gps_reader import GPSReader
-            self.gps_reader = GPSReader()
-            logger.info("GPS 리더 초기화 완료 - 실제 GPS 모듈 사용")
+            from gps_reader import GPSReader, GPSReconnectManager
+            self.gps_hw_reader = GPSReader()
+            GPSReconnectManager(self.gps_hw_reader).start()
+
+            if self.gps_hw_reader.is_connected():
+                self.gps_reader = self.gps_hw_reader
+                logger.info("GPS 리더 초기화 완료 - 실제 GPS 모듈 사용")
+            else:
+                logger.warning("GPS 모듈 미연결. 시뮬레이터로 시작하고 백그라운드에서 재연결을 시도합니다.")
+                self.switch_to_gps_simulator()
         except (ImportError, Exception) as e:
             logger.warning(f"GPS 하드웨어 연결 실패 ({e}). 시뮬레이터 모드로 전환합니다.")
             from gps_simulator import GPSSimulator
             self.gps_reader = GPSSimulator()
             logger.info("GPS 시뮬레이터 초기화 완료 - 테스트 데이터 생성 중")
         
-        # 온도 센서 초기화 (실제 센서 또는 시뮬레이터)
+        # 온도 센서 초기화 (다중 채널, 실제 센서 또는 시뮬레이터)
+        if TEMP_CHANNELS:
+            from sensor_manager import SensorManager
+            self.sensor_manager = SensorManager.from_config()
+            self.sensor_manager.start()
+            # 대표 채널 값이 기존 온도 경로(temperature 컬럼)로 들어감
+            self.temp_reader = self.sensor_manager
+            logger.info(f"다중 온도 채널 초기화 완료 - {len(TEMP_CHANNELS)}개 채널")
+        else:
+            self.setup_temperature_reader()
+
+        # 서버 전송기 초기화
+        self.server_sender = ServerSender(DB_PATH)
+        logger.info("서버 전송기 초기화 완료")
+
+    def setup_temperature_reader(self):
+        """단일 온도 센서 초기화 (실패 시 시뮬레이터)"""
         try:
-            from temperature_reader import TemperatureReader
-            self.temp_reader = TemperatureReader()
-            logger.info("온도 센서 초기화 완료 - 실제 센서 사용")
+            if TEMP_SENSOR_ISOLATED:
+                # 버스가 멈춰도 샘플링이 막히지 않도록 별도 프로세스에서 읽기
+                from sensor_watchdog import IsolatedSensorReader
+                self.temp_reader = IsolatedSensorReader(TEMP_SENSOR_TYPE)
+                logger.info("온도 센서 초기화 완료 - 실제 센서 사용 (격리 프로세스)")
+            else:
+                from temperature_reader import TemperatureReader
+                self.temp_reader = TemperatureReader(sensor_type=TEMP_SENSOR_TYPE)
+                logger.info("온도 센서 초기화 완료 - 실제 센서 사용")
         except (ImportError, Exception) as e:
             logger.warning(f"온도 센서 연결 실패 ({e}). 시뮬레이터 모드로 전환합니다.")
             from temperature_simulator import TemperatureSimulator
             self.temp_reader = TemperatureSimulator()
             logger.info("온도 시뮬레이터 초기화 완료 - 냉장고 온도 시뮬레이션 중")
-
-        # 서버 전송기 초기화
-        self.server_sender = ServerSender(DB_PATH)
-        logger.info("서버 전송기 초기화 완료")
     
     def gps_reader_loop(self):
         """GPS 데이터를 지속적으로 읽는 백그라운드 스레드"""
@@ -151,11 +268,14 @@ class GPSTracker:
         """온도 데이터를 지속적으로 읽는 백그라운드 스레드"""
         while self.running:
             try:
-                temperature = self.temp_reader.read()
-                if temperature is not None:
+                raw_temperature = self.temp_reader.read()
+                if raw_temperature is not None:
+                    temperature = self.temp_filter.update(raw_temperature)
+                    self.forecaster.update(temperature)
                     with self.buffer_lock:
                         self.temp_buffer.append({
                             'data': temperature,
+                            'raw': raw_temperature,
                             'timestamp': time.time()
                         })
             except Exception as e:
@@ -182,6 +302,13 @@ class GPSTracker:
             if len(buffer) > 0:
                 return buffer[-1]['data']
         return None
+
+    def get_latest_entry(self, buffer):
+        """버퍼에서 가장 최근 항목 가져오기 ({'data', 'timestamp', ...} 또는 None)"""
+        with self.buffer_lock:
+            if len(buffer) > 0:
+                return dict(buffer[-1])
+        return None
     
     def start(self):
         """GPS 데이터 수집 시작 (초당 데이터 수 모니터링 및 적응형 저장)"""
@@ -213,11 +340,13 @@ class GPSTracker:
         start_time = time.time()
         last_gps_data = None
         last_temp_data = None
+        last_temp_raw = None
+        last_temp_time = None
         
         try:
             while self.running:
-                # GPS 연결 상태 주기적 확인 (10초마다)
-                if sample_count % 100 == 0:  # 10초마다 체크 (0.1초 * 100 = 10초)
+                # GPS 연결 상태 주기적 확인 (1초마다, 재연결은 백그라운드에서 수행)
+                if sample_count % 10 == 0:  # 1초마다 체크 (0.1초 * 10 = 1초)
                     self.check_gps_connection()
                 # 30초마다(0.1초*300) 보관기간 초과 데이터 자동 삭제
                 if sample_count % 300 == 0 and self.db:
@@ -246,11 +375,15 @@ class GPSTracker:
                     gps_data = last_gps_data  # 캐시된 데이터 재사용
                 
                 # 온도 데이터 가져오기
-                temperature = self.get_latest_data(self.temp_buffer)
-                if temperature is not None:
-                    last_temp_data = temperature
-                elif last_temp_data is not None:
-                    temperature = last_temp_data  # 캐시된 데이터 재사용
+                temp_entry = self.get_latest_entry(self.temp_buffer)
+                if temp_entry is not None:
+                    last_temp_data = temp_entry['data']
+                    last_temp_raw = temp_entry.get('raw')
+                    last_temp_time = temp_entry['timestamp']
+                temperature = last_temp_data  # 새 값이 없으면 캐시된 데이터 재사용
+
+                # 온도 측정 후 경과 시간 (센서가 멈추면 계속 증가)
+                temp_age = time.time() - last_temp_time if temperature is not None else None
                 
                 # 데이터 저장 조건:
                 # 1. GPS/온도 데이터가 초당 10개 미만: 가장 최근 데이터 저장
@@ -270,10 +403,15 @@ class GPSTracker:
                 # GPS 또는 온도 데이터 중 하나라도 있으면 저장 (독립적으로 동작)
                 has_gps = gps_data and gps_data.get('latitude') and gps_data.get('longitude')
                 has_temp = temperature is not None
+                channels = self.sensor_manager.get_readings() if self.sensor_manager else None
                 
                 if should_save and (has_gps or has_temp):
-                    # 온도 상태 판단
-                    temp_status = self.get_temperature_status(temperature) if temperature is not None else 'unknown'
+                    # 온도 상태 판단 (히스테리시스 적용, 이탈 이벤트/체류 시간 누적)
+                    sample_time = temp_entry['timestamp'] if temp_entry is not None else None
+                    temp_status = self.record_temperature_status(temperature, temp_age, sample_time)
+
+                    # 이탈 예측 (추세가 없거나 센서 값이 오래되면 저장하지 않음)
+                    forecast = self.forecaster.get_forecast(max_age=ALARM_SENSOR_LOST_SECONDS)
 
                     # GPS + 온도 데이터 저장 (GPS 또는 온도 중 하나만 있어도 저장)
                     record_id = self.db.insert_gps_temperature_data(
@@ -284,10 +422,23 @@ class GPSTracker:
                         heading=gps_data.get('heading') if has_gps else None,
                         temperature=temperature,
                         vehicle_id=VEHICLE_ID,
-                        status=temp_status
+                        status=temp_status,
+                        fix_time=gps_data.get('fix_time') if has_gps else None,
+                        hdop=gps_data.get('hdop') if has_gps else None,
+                        pdop=gps_data.get('pdop') if has_gps else None,
+                        fix_type=gps_data.get('fix_type') if has_gps else None,
+                        satellites=gps_data.get('satellites_used', gps_data.get('satellites')) if has_gps else None,
+                        channels=channels,
+                        temperature_age=temp_age,
+                        temperature_raw=last_temp_raw,
+                        forecast=forecast
                     )
                     
                     sample_count += 1
+
+                    # 1초마다 운행 이탈/MKT 누적 상태 저장 (대시보드/전송용)
+                    if sample_count % 10 == 0:
+                        self.save_trip_state()
                     
                     # 10개마다 로그 출력 (정확히 1초마다)
                     if sample_count % 10 == 0:
@@ -304,6 +455,9 @@ class GPSTracker:
                         )
                 else:
                     logger.debug(f"데이터 대기 중... GPS율: {gps_rate}/초, 온도율: {temp_rate}/초")
+
+                # 알람은 저장 여부와 관계없이 매 주기 확인 (센서 값이 없을 때도 끊김 알람)
+                self.check_alarms(temperature, temp_age, gps_data if has_gps else None, channels)
                 
         except KeyboardInterrupt:
             logger.info("사용자에 의해 중단됨")
@@ -320,6 +474,17 @@ class GPSTracker:
         self.running = False
         
         if self.db:
+            try:
+                self.save_trip_state()
+                state = self.excursion_engine.get_state()
+                mkt = self.stability.trip.mkt
+                logger.info(
+                    f"운행 {state['trip_id']} 온도 이탈: {state['excursion_count']}회, "
+                    f"적정 범위 밖 누적 {state['out_of_range_seconds']:.0f}초, "
+                    f"MKT {f'{mkt:.2f}°C' if mkt is not None else 'N/A'}"
+                )
+            except Exception:
+                pass
             try:
                 total_count = self.db.get_data_count()
                 logger.info(f"총 저장된 데이터: {total_count}개")
@@ -328,6 +493,13 @@ class GPSTracker:
             self.db.close()
             self.db = None
         
+        if self.gps_hw_reader:
+            status = self.gps_hw_reader.get_status()
+            logger.info(f"GPS 끊김 통계: {status['disconnect_count']}회, 누적 {status['disconnected_seconds']:.1f}초")
+            if self.gps_reader is not self.gps_hw_reader:
+                self.gps_hw_reader.close()
+            self.gps_hw_reader = None
+
         if self.gps_reader:
             self.gps_reader.close()
             self.gps_reader = None
@@ -335,6 +507,7 @@ class GPSTracker:
         if self.temp_reader:
             self.temp_reader.close()
             self.temp_reader = None
+            self.sensor_manager = None
 
         if self.server_sender:
             self.server_sender.stop()
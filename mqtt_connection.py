@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+MQTT 브로커 연결 관리
+전송 스레드가 연결을 기다리거나, 브로커가 죽어 있을 때 매 주기(초당 10회) 재연결을 시도하지 않도록
+연결/재연결을 별도 스레드에서 처리
+
+- 지속 세션 (clean_session=False): 재연결해도 브로커가 구독과 미완료 QoS 1 메시지를 유지
+- 재연결 간격: 지수 백오프 + 지터 (여러 트럭이 동시에 재연결하지 않도록)
+- 연결 중이 아닐 때 발행하면 오프라인 큐에 보관했다가 재연결 직후 한 번에 발행
+- 구독(제어 토픽 등)은 연결될 때마다 다시 요청
+- 연결 상태 지표 (연결/끊김 횟수, 연속 실패, 현재 백오프, 누적 연결 시간 등)
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from config import (
+    MQTT_KEEPALIVE,
+    MQTT_CLEAN_SESSION,
+    MQTT_CONNECT_TIMEOUT,
+    MQTT_RECONNECT_MIN_DELAY,
+    MQTT_RECONNECT_MAX_DELAY,
+    MQTT_RECONNECT_JITTER,
+    MQTT_OFFLINE_QUEUE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MQTTConnectionManager:
+    """paho 클라이언트 하나를 계속 재사용하며 연결을 유지하는 클래스
+
+    start()는 바로 반환하고, 연결은 관리 스레드가 합니다 (TCP 연결 대기도 관리 스레드에서).
+    publish()는 연결되어 있으면 paho MQTTMessageInfo를, 오프라인 큐에 넣었으면 None을 반환합니다.
+    큐에 넣은 메시지는 재연결 후 발행될 때 on_sent(info)가 호출됩니다 (PUBACK 추적용 mid 전달).
+    """
+
+    def __init__(self, host, port, client_id, keepalive=MQTT_KEEPALIVE, clean_session=MQTT_CLEAN_SESSION,
+                 max_inflight=20, connect_timeout=MQTT_CONNECT_TIMEOUT, min_delay=MQTT_RECONNECT_MIN_DELAY,
+                 max_delay=MQTT_RECONNECT_MAX_DELAY, jitter=MQTT_RECONNECT_JITTER,
+                 queue_size=MQTT_OFFLINE_QUEUE_SIZE, on_connect=None, on_publish=None):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.keepalive = keepalive
+        self.clean_session = clean_session
+        self.max_inflight = max_inflight
+        self.connect_timeout = connect_timeout
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.queue_size = queue_size
+        self.on_connect = on_connect      # on_connect(session_present)
+        self.on_publish = on_publish      # on_publish(mid), PUBACK 수신
+
+        self.client = None
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+        # 'disconnected' -> 'connecting' -> 'connected' -> (끊김) -> 'backoff' -> 'connecting' ...
+        self.state = 'disconnected'
+        self.next_attempt = 0.0
+        self.connect_started = None
+        self.failures = 0                 # 연속 실패 횟수 (백오프 계산용)
+
+        # 구독 {토픽: (qos, callback(topic, payload))}, 연결될 때마다 다시 구독
+        self.subscriptions = {}
+
+        # 오프라인 큐 {key: (topic, payload, qos, retain, on_sent)}, coalesce 메시지는 토픽이 key
+        self.queue = OrderedDict()
+        self.queue_seq = 0
+
+        self.metrics = {
+            'connects': 0,
+            'disconnects': 0,
+            'connect_failures': 0,
+            'session_present': None,
+            'connected_since': None,
+            'last_disconnect': None,
+            'last_error': None,
+            'current_backoff': 0.0,
+            'connected_seconds': 0.0,
+            'queued': 0,
+            'flushed': 0,
+            'dropped': 0,
+        }
+        self.started_at = None
+
+    def start(self):
+        """관리 스레드 시작 (연결 완료를 기다리지 않음)"""
+        if self.running:
+            return
+        import paho.mqtt.client as mqtt
+
+        self.client = mqtt.Client(client_id=self.client_id, clean_session=self.clean_session)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        self.client.max_inflight_messages_set(self.max_inflight)
+        for topic, (_, callback) in self.subscriptions.items():
+            self._add_message_callback(topic, callback)
+
+        self.running = True
+        self.started_at = time.time()
+        self.next_attempt = 0.0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """연결 종료 (지속 세션은 브로커에 남음)"""
+        if not self.running:
+            return
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+        try:
+            if self.state == 'connected':
+                self.client.disconnect()
+                self.client.loop(timeout=0.1)
+        except Exception as e:
+            logger.debug(f"MQTT 연결 종료 오류: {e}")
+        self._set_disconnected(time.time())
+
+    def is_connected(self):
+        return self.state == 'connected'
+
+    def publish(self, topic, payload, qos=0, retain=False, queue=True, coalesce=False, on_sent=None):
+        """메시지 발행 (연결 중이 아니면 오프라인 큐에 보관)
+
+        coalesce=True면 같은 토픽의 이전 대기 메시지를 대체 (retain 상태처럼 최신 값만 의미 있는 경우)
+        """
+        with self.lock:
+            if self.state != 'connected':
+                if queue:
+                    self._enqueue(topic, payload, qos, retain, coalesce, on_sent)
+                return None
+        import paho.mqtt.client as mqtt
+
+        info = self.client.publish(topic, payload, qos=qos, retain=retain)
+        if info.rc == mqtt.MQTT_ERR_NO_CONN and qos > 0:
+            # 연결이 막 끊긴 경우에도 QoS 1/2 메시지는 paho가 보관했다가 재연결 후 같은 mid로 다시 보냄
+            info.rc = mqtt.MQTT_ERR_SUCCESS
+        return info
+
+    def subscribe(self, topic, qos=1, callback=None):
+        """토픽 구독 (받은 메시지는 관리 스레드에서 callback(topic, payload) 호출, 오래 걸리는 처리는 넘겨서)"""
+        self.subscriptions[topic] = (qos, callback)
+        if self.client is not None:
+            self._add_message_callback(topic, callback)
+            if self.state == 'connected':
+                self.client.subscribe(topic, qos)
+
+    def _add_message_callback(self, topic, callback):
+        def on_message(client, userdata, message):
+            try:
+                callback(message.topic, message.payload)
+            except Exception as e:
+                logger.error(f"구독 메시지 처리 오류 ({message.topic}): {e}")
+
+        self.client.message_callback_add(topic, on_message)
+
+    def _enqueue(self, topic, payload, qos, retain, coalesce, on_sent):
+        if coalesce:
+            key = ('topic', topic)
+            self.queue.pop(key, None)
+        else:
+            self.queue_seq += 1
+            key = ('seq', self.queue_seq)
+        if len(self.queue) >= self.queue_size:
+            # 가장 오래된 메시지부터 버림
+            self.queue.popitem(last=False)
+            self.metrics['dropped'] += 1
+        self.queue[key] = (topic, payload, qos, retain, on_sent)
+        self.metrics['queued'] += 1
+
+    def _flush_queue(self):
+        """재연결 직후 오프라인 큐를 한 번에 발행 (paho가 in-flight 한도에 맞춰 순서대로 내보냄)"""
+        with self.lock:
+            pending = list(self.queue.values())
+            self.queue.clear()
+        for topic, payload, qos, retain, on_sent in pending:
+            info = self.client.publish(topic, payload, qos=qos, retain=retain)
+            self.metrics['flushed'] += 1
+            if on_sent is not None:
+                try:
+                    on_sent(info)
+                except Exception as e:
+                    logger.error(f"오프라인 큐 발행 콜백 오류: {e}")
+        if pending:
+            logger.info(f"오프라인 큐 {len(pending)}건 발행")
+
+    def _run(self):
+        """관리 스레드: 연결 시도, 네트워크 처리(loop), 백오프 대기"""
+        while self.running:
+            try:
+                now = time.time()
+                if self.state in ('disconnected', 'backoff'):
+                    if now < self.next_attempt:
+                        time.sleep(min(0.1, self.next_attempt - now))
+                        continue
+                    self._attempt(now)
+                    continue
+
+                if self.state == 'connecting' and now - self.connect_started > self.connect_timeout:
+                    self._connection_lost(now, "CONNACK 응답 시간 초과")
+                    continue
+
+                rc = self.client.loop(timeout=0.1)
+                if rc != 0 and self.state in ('connecting', 'connected'):
+                    self._connection_lost(time.time(), f"네트워크 오류 rc={rc}")
+            except Exception as e:
+                logger.error(f"MQTT 연결 관리 오류: {e}")
+                self._connection_lost(time.time(), str(e))
+
+    def _attempt(self, now):
+        """TCP 연결 후 CONNECT 전송 (CONNACK은 loop()에서 처리)"""
+        self.state = 'connecting'
+        self.connect_started = now
+        try:
+            self.client.connect(self.host, self.port, self.keepalive)
+        except Exception as e:
+            self._connection_lost(time.time(), f"연결 실패: {e}")
+
+    def _on_connect(self, client, userdata, flags, rc):
+        now = time.time()
+        if rc != 0:
+            self._connection_lost(now, f"브로커 연결 거부: {rc}")
+            return
+
+        session_present = bool(flags.get('session present'))
+        with self.lock:
+            self.state = 'connected'
+        self.metrics['connects'] += 1
+        self.metrics['connected_since'] = now
+        self.metrics['session_present'] = session_present
+        self.metrics['current_backoff'] = 0.0
+        logger.info(f"✅ MQTT 브로커 연결 성공: {self.host}:{self.port} "
+                    f"(세션 {'유지' if session_present else '새로 시작'}, 연속 실패 {self.failures}회 후)")
+
+        for topic, (qos, _) in self.subscriptions.items():
+            self.client.subscribe(topic, qos)
+        if self.on_connect is not None:
+            self.on_connect(session_present)
+        self._flush_queue()
+
+    def _on_disconnect(self, client, userdata, rc):
+        if self.running and rc != 0:
+            self._connection_lost(time.time(), f"연결 끊김: {rc}")
+
+    def _on_publish(self, client, userdata, mid):
+        if self.on_publish is not None:
+            self.on_publish(mid)
+
+    def _set_disconnected(self, now):
+        with self.lock:
+            was_connected = self.state == 'connected'
+            self.state = 'disconnected'
+        if was_connected:
+            since = self.metrics['connected_since']
+            self.metrics['connected_seconds'] += now - since
+            self.metrics['connected_since'] = None
+            self.metrics['disconnects'] += 1
+            self.metrics['last_disconnect'] = now
+            # 충분히 오래 연결돼 있었으면 실패 횟수 초기화 (연결 직후 끊기는 브로커는 계속 백오프)
+            if now - since >= self.max_delay:
+                self.failures = 0
+        return was_connected
+
+    def _connection_lost(self, now, reason):
+        """연결 실패/끊김 -> 지수 백오프 + 지터 후 재시도"""
+        if self.state == 'backoff':
+            return
+        # 남은 소켓은 다음 connect()에서 paho가 닫고 새로 연결
+        was_connected = self._set_disconnected(now)
+        if not self.running:
+            return
+
+        self.failures += 1
+        if not was_connected:
+            self.metrics['connect_failures'] += 1
+        delay = min(self.max_delay, self.min_delay * 2 ** (self.failures - 1))
+        delay *= 1.0 - self.jitter * random.random()
+        with self.lock:
+            self.state = 'backoff'
+        self.next_attempt = now + delay
+        self.metrics['current_backoff'] = delay
+        self.metrics['last_error'] = reason
+
+        message = f"MQTT {reason}, {delay:.1f}초 후 재연결 (연속 실패 {self.failures}회)"
+        if was_connected or self.failures == 1:
+            logger.warning(message)
+        else:
+            logger.debug(message)
+
+    def get_metrics(self, now=None):
+        """연결 상태 지표 (대시보드/전송 통계용)"""
+        now = now or time.time()
+        connected_seconds = self.metrics['connected_seconds']
+        if self.metrics['connected_since'] is not None:
+            connected_seconds += now - self.metrics['connected_since']
+        elapsed = now - self.started_at if self.started_at else 0.0
+        return {
+            **self.metrics,
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'next_attempt_in': max(0.0, self.next_attempt - now) if self.state == 'backoff' else None,
+            'connected_seconds': connected_seconds,
+            'availability': connected_seconds / elapsed if elapsed > 0 else None,
+            'queue_length': len(self.queue),
+        }
+
+
+class LocalBrokerStandIn:
+    """연결 관리 점검용 최소 MQTT 3.1.1 브로커 (CONNECT/PUBLISH/PINGREQ/SUBSCRIBE/DISCONNECT만 처리)
+
+    clean_session=False 클라이언트의 세션 유무를 기억해 CONNACK의 session present를 돌려주고,
+    받은 PUBLISH 개수를 셉니다. 구독한 클라이언트에는 QoS 0으로 전달합니다 (필터는 정확히 일치 또는 '#').
+    실제 브로커 대신 로컬에서 끊김/재연결을 재현하는 용도.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.sessions = set()
+        self.received = []
+        self.server = None
+        self.thread = None
+        self.connections = []
+        self.subscribers = {}       # {연결: 구독 필터 목록}
+        self.send_lock = threading.Lock()
+
+    def start(self):
+        import socket
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.host, self.port))
+        self.port = self.server.getsockname()[1]
+        self.server.listen(5)
+        self.thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        """브로커 중지 (연결된 클라이언트는 끊김, 세션은 유지되어 start()로 다시 띄울 수 있음)"""
+        import socket
+
+        for conn in [self.server] + self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self.connections = []
+        self.subscribers = {}
+
+    def _send(self, conn, data):
+        # 구독 전달과 응답이 여러 스레드에서 같은 연결로 나가므로 패킷 단위로 잠금
+        with self.send_lock:
+            conn.sendall(data)
+
+    def _forward(self, topic, payload):
+        """구독한 연결에 QoS 0 PUBLISH로 전달"""
+        import struct
+
+        body = struct.pack('>H', len(topic)) + topic + payload
+        length, encoded = len(body), b''
+        while True:
+            byte, length = length % 128, length // 128
+            encoded += bytes([byte | (0x80 if length else 0)])
+            if not length:
+                break
+        for conn, filters in list(self.subscribers.items()):
+            name = topic.decode()
+            if any(name == f or (f.endswith('#') and name.startswith(f[:-1])) for f in filters):
+                try:
+                    self._send(conn, b'\x30' + encoded + body)
+                except OSError:
+                    self.subscribers.pop(conn, None)
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read_exact(conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        import struct
+
+        try:
+            while True:
+                header = self._read_exact(conn, 1)[0]
+                length, multiplier = 0, 1
+                while True:
+                    byte = self._read_exact(conn, 1)[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = self._read_exact(conn, length) if length else b''
+                packet_type = header >> 4
+
+                if packet_type == 1:      # CONNECT
+                    name_len = struct.unpack('>H', body[:2])[0]
+                    offset = 2 + name_len + 1
+                    clean = bool(body[offset] & 0x02)
+                    id_len = struct.unpack('>H', body[offset + 3:offset + 5])[0]
+                    client_id = body[offset + 5:offset + 5 + id_len].decode()
+                    present = not clean and client_id in self.sessions
+                    if clean:
+                        self.sessions.discard(client_id)
+                    else:
+                        self.sessions.add(client_id)
+                    self._send(conn, bytes([0x20, 0x02, 0x01 if present else 0x00, 0x00]))
+                elif packet_type == 3:    # PUBLISH
+                    qos = (header >> 1) & 0x03
+                    topic_len = struct.unpack('>H', body[:2])[0]
+                    offset = 2 + topic_len
+                    if qos:
+                        mid = body[offset:offset + 2]
+                        self.received.append(body[offset + 2:])
+                        self._send(conn, b'\x40\x02' + mid if qos == 1 else b'\x50\x02' + mid)
+                    else:
+                        self.received.append(body[offset:])
+                    if self.subscribers:
+                        self._forward(body[2:offset], self.received[-1])
+                elif packet_type == 6:    # PUBREL (QoS 2)
+                    self._send(conn, b'\x70\x02' + body[:2])
+                elif packet_type == 8:    # SUBSCRIBE
+                    offset, granted = 2, b''
+                    while offset < len(body):
+                        filter_len = struct.unpack('>H', body[offset:offset + 2])[0]
+                        self.subscribers.setdefault(conn, []).append(body[offset + 2:offset + 2 + filter_len].decode())
+                        offset += 2 + filter_len + 1
+                        granted += b'\x00'
+                    self._send(conn, bytes([0x90, 2 + len(granted)]) + body[:2] + granted)
+                elif packet_type == 12:   # PINGREQ
+                    self._send(conn, b'\xd0\x00')
+                elif packet_type == 14:   # DISCONNECT
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def run_standin_check(messages=200, outage=5.0):
+    """로컬 브로커 대용으로 지연 연결, 백오프, 오프라인 큐 발행, 세션 유지를 점검"""
+    import socket
+
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    manager = MQTTConnectionManager('127.0.0.1', port, 'standin_check', max_delay=2.0)
+    started = time.time()
+    manager.start()
+    print(f"start() 반환까지 {time.time() - started:.3f}초 (브로커 없음)")
+
+    # 1) 브로커가 없는 동안: 백오프로 재시도 횟수가 제한되는지
+    time.sleep(outage)
+    metrics = manager.get_metrics()
+    print(f"브로커 없음 {outage:.0f}초: 연결 시도 {metrics['connect_failures']}회, 현재 백오프 {metrics['current_backoff']:.2f}초")
+
+    # 2) 오프라인 중 발행 -> 큐, retain 상태는 최신 값 하나만
+    for index in range(messages):
+        manager.publish('standin/samples', f'sample {index}', qos=1)
+    for index in range(5):
+        manager.publish('standin/state', f'state {index}', qos=1, retain=True, coalesce=True)
+    print(f"오프라인 큐: {manager.get_metrics()['queue_length']}건")
+
+    broker = LocalBrokerStandIn(port=port)
+    broker.start()
+    deadline = time.time() + 10
+    while len(broker.received) < messages + 1 and time.time() < deadline:
+        time.sleep(0.05)
+    metrics = manager.get_metrics()
+    print(f"재연결 후 브로커 수신 {len(broker.received)}건 (세션 유지: {metrics['session_present']}), "
+          f"마지막 상태 {broker.received[-1].decode() if broker.received else '-'}")
+
+    # 3) 브로커 재시작: 지속 세션이 유지되는지
+    broker.stop()
+    time.sleep(0.5)
+    broker.start()
+    deadline = time.time() + 10
+    while not manager.is_connected() and time.time() < deadline:
+        time.sleep(0.05)
+    metrics = manager.get_metrics()
+    print(f"브로커 재시작 후 상태 {metrics['state']}, 세션 유지 {metrics['session_present']}, "
+          f"연결 {metrics['connects']}회 / 끊김 {metrics['disconnects']}회")
+
+    manager.stop()
+    broker.stop()
+    return metrics
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로컬 브로커 대용으로 MQTT 연결 관리 점검")
+    parser.add_argument('--messages', type=int, default=200, help="오프라인 중 발행할 메시지 수")
+    parser.add_argument('--outage', type=float, default=5.0, help="브로커 없이 기다릴 시간 (초)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_standin_check(args.messages, args.outage)
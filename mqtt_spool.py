@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+MQTT 발행 실패 묶음을 디스크에 보관하는 스풀 (append-only 로그)
+paho 발행이 실패한 메시지를 파일 끝에 추가하고, 연결이 회복되면 같은 MQTT 클라이언트로 다시 발행
+
+- 레코드: 헤더(길이, CRC32, QoS, retain) + 메타 JSON(토픽, 종류, DB id) + payload 바이트
+- 다시 보낸 위치(head)는 별도 파일에 저장, 모두 보내면 로그를 비움
+- 크기 한도(MQTT_SPOOL_MAX_BYTES)와 초과 시 정책: 'drop_oldest'(오래된 레코드 버림), 'drop_newest'(새 레코드 거부)
+- 버린 레코드의 행은 DB에 미전송으로 남아 있으므로 일반 전송 경로(백로그)에서 다시 조회됨
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from config import (
+    MQTT_SPOOL_PATH,
+    MQTT_SPOOL_MAX_BYTES,
+    MQTT_SPOOL_DROP_POLICY,
+)
+
+logger = logging.getLogger(__name__)
+
+# payload 길이, 메타 길이, CRC32(메타+payload), QoS, retain
+RECORD_HEADER = struct.Struct('<IIIBB')
+DROP_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class MessageSpool:
+    """발행 실패 메시지 디스크 스풀
+
+    append()로 추가하고, peek()/advance()로 오래된 순서대로 다시 보냅니다.
+    pending_ids[kind]는 스풀에 있는 DB 행 id (일반 전송 경로에서 중복 조회하지 않도록 제외용).
+    """
+
+    def __init__(self, path=MQTT_SPOOL_PATH, max_bytes=MQTT_SPOOL_MAX_BYTES, drop_policy=MQTT_SPOOL_DROP_POLICY):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"지원하지 않는 스풀 정책: {drop_policy} ({', '.join(DROP_POLICIES)})")
+        self.path = path
+        self.head_path = path + '.head'
+        self.max_bytes = max_bytes
+        self.drop_policy = drop_policy
+
+        # 아직 다시 보내지 않은 레코드 [{'offset', 'size', 'topic', 'kind', 'ids', 'qos', 'retain', 'spooled_at'}]
+        self.records = []
+        self.pending_ids = {}
+        self.size = 0           # 로그 파일 크기 (head 이전의 보낸 레코드 포함)
+        self.head = 0
+
+        self.stats = {'appended': 0, 'replayed': 0, 'dropped': 0, 'rejected': 0, 'corrupt': 0}
+        self._load()
+
+    def _load(self):
+        """재시작 시 head 이후 레코드 목록 복원 (중간에 끊긴 마지막 레코드는 잘라냄)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.head_path) as f:
+                self.head = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            self.head = 0
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        offset = min(self.head, len(data))
+        while offset < len(data):
+            record = self._parse(data, offset)
+            if record is None:
+                self.stats['corrupt'] += 1
+                logger.warning(f"MQTT 스풀 {self.path}: {offset}바이트 이후 손상된 레코드 제거")
+                break
+            self._index(record)
+            offset += record['size']
+
+        if offset < len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        self.size = offset
+        self.head = min(self.head, offset)
+        if self.records:
+            logger.info(f"MQTT 스풀 복원: {len(self.records)}건 재전송 대기")
+
+    @staticmethod
+    def _parse(data, offset):
+        if offset + RECORD_HEADER.size > len(data):
+            return None
+        payload_len, meta_len, crc, qos, retain = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        end = start + meta_len + payload_len
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            return None
+        try:
+            meta = json.loads(data[start:start + meta_len].decode('utf-8'))
+        except ValueError:
+            return None
+        return {**meta, 'offset': offset, 'size': end - offset, 'qos': qos, 'retain': bool(retain)}
+
+    def _index(self, record):
+        self.records.append(record)
+        if record.get('ids'):
+            self.pending_ids.setdefault(record['kind'], set()).update(record['ids'])
+
+    def _release(self, record):
+        if record.get('ids'):
+            self.pending_ids.get(record['kind'], set()).difference_update(record['ids'])
+
+    def append(self, topic, payload, qos=1, retain=False, kind=None, ids=None):
+        """발행 실패 메시지 추가 -> 보관했으면 True (drop_newest 정책으로 거부되면 False)"""
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        meta = json.dumps({'topic': topic, 'kind': kind, 'ids': list(ids or []),
+                           'spooled_at': time.time()}).encode('utf-8')
+        body = meta + payload
+        record_bytes = RECORD_HEADER.pack(len(payload), len(meta), zlib.crc32(body), qos, int(retain)) + body
+
+        if not self._make_room(len(record_bytes)):
+            self.stats['rejected'] += 1
+            logger.warning(f"MQTT 스풀 가득 참 ({self.size}바이트), 새 메시지 거부 ({topic})")
+            return False
+
+        with open(self.path, 'ab') as f:
+            f.write(record_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._index({'topic': topic, 'kind': kind, 'ids': list(ids or []), 'spooled_at': time.time(),
+                     'offset': self.size, 'size': len(record_bytes), 'qos': qos, 'retain': bool(retain)})
+        self.size += len(record_bytes)
+        self.stats['appended'] += 1
+        return True
+
+    def _make_room(self, needed):
+        """크기 한도 안에 needed 바이트를 넣을 수 있도록 정리"""
+        if self.size + needed <= self.max_bytes:
+            return True
+        if needed > self.max_bytes:
+            return False
+        if self.head:
+            self._compact()
+        if self.drop_policy == 'drop_newest':
+            return self.size + needed <= self.max_bytes
+
+        dropped = 0
+        while self.records and self.size - self.head + needed > self.max_bytes:
+            record = self.records.pop(0)
+            self._release(record)
+            self.head = record['offset'] + record['size']
+            dropped += 1
+        if dropped:
+            self.stats['dropped'] += dropped
+            logger.warning(f"MQTT 스풀 한도 초과: 오래된 메시지 {dropped}건 버림 (DB 행은 일반 경로로 재전송)")
+            self._compact()
+        return self.size + needed <= self.max_bytes
+
+    def _compact(self):
+        """이미 보낸(head 이전) 부분을 로그에서 제거"""
+        if not self.records:
+            self._truncate()
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.head)
+            remaining = f.read()
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(remaining)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        shift = self.head
+        for record in self.records:
+            record['offset'] -= shift
+        self.size -= shift
+        self.head = 0
+        self._save_head()
+
+    def _truncate(self):
+        with open(self.path, 'wb'):
+            pass
+        self.size = 0
+        self.head = 0
+        self._save_head()
+
+    def _save_head(self):
+        temp_path = self.head_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(str(self.head))
+        os.replace(temp_path, self.head_path)
+
+    def peek(self, limit=None):
+        """다시 보낼 레코드를 오래된 순서로 (payload 포함)"""
+        records = self.records[:limit] if limit else list(self.records)
+        if not records:
+            return []
+        with open(self.path, 'rb') as f:
+            for record in records:
+                f.seek(record['offset'])
+                meta_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))[1]
+                f.seek(meta_len, os.SEEK_CUR)
+                record['payload'] = f.read(record['size'] - RECORD_HEADER.size - meta_len)
+        return records
+
+    def advance(self, count):
+        """앞에서부터 count개 레코드를 다시 보냈음 (head 저장, 모두 보냈으면 로그 비움)"""
+        done, self.records = self.records[:count], self.records[count:]
+        if not done:
+            return
+        for record in done:
+            record.pop('payload', None)
+            self._release(record)
+        self.stats['replayed'] += len(done)
+        if self.records:
+            self.head = done[-1]['offset'] + done[-1]['size']
+            self._save_head()
+        else:
+            self._truncate()
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'pending': len(self.records),
+            'bytes': self.size - self.head,
+            'max_bytes': self.max_bytes,
+            'oldest': self.records[0]['spooled_at'] if self.records else None,
+        }
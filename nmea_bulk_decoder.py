@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+NMEA 로그 일괄 디코더 (오프라인 분석용)
+하루치 캡처 파일을 메모리 매핑으로 읽어 NumPy로 바로 토큰화하고
+시각/위도/경도/속도/방향/HDOP 컬럼으로 변환 (문장 단위 Python 루프 없음)
+
+- '$', ',', '*' 위치를 버퍼 전체에서 한 번에 찾고, 필드는 쉼표 위치 오프셋으로 모아 숫자로 변환
+- 검증 규칙은 gps_reader.py와 같음 (허용 talker, RMC 상태 A, GGA 품질 >= MIN_FIX_QUALITY, 체크섬)
+"""
+
+import gzip
+import logging
+import mmap
+import time
+import numpy as np
+from gps_reader import NMEA_TALKERS, MIN_FIX_QUALITY, RMC_VALID_STATUS, KNOTS_TO_KMH
+
+logger = logging.getLogger(__name__)
+
+DOLLAR, COMMA, STAR, DOT = (ord(c) for c in '$,*.')
+FIELD_WIDTH = 18                # 숫자 필드 최대 길이 (정수 가수가 int64에 들어가는 자릿수)
+RMC_FIELDS = 9                  # 시각, 상태, 위도, N/S, 경도, E/W, 속도(노트), 방향, 날짜
+GGA_FIELDS = 8                  # 시각, 위도, N/S, 경도, E/W, 품질, 위성 수, HDOP
+
+# 16진수 문자(ASCII) -> 값 변환표 (체크섬 벡터 파싱용)
+_HEX_VALUES = np.zeros(256, dtype=np.uint8)
+_IS_HEX = np.zeros(256, dtype=bool)
+for _i, _c in enumerate(b'0123456789ABCDEF'):
+    for _h in (_c, bytes([_c]).lower()[0]):
+        _HEX_VALUES[_h] = _i
+        _IS_HEX[_h] = True
+
+def _sentences(data):
+    """한 줄 안에서 '$'로 시작해 '*' + 16진수 2자리로 끝나는 문장 -> ($ 위치, * 위치)"""
+    dollars = np.flatnonzero(data == DOLLAR)
+    stars = np.flatnonzero(data == STAR)
+    if not len(dollars) or not len(stars):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    after = np.searchsorted(stars, dollars)
+    found = after < len(stars)
+    ends = stars[after[found]]
+
+    # 다음 '$'나 줄바꿈보다 먼저 '*'가 나와야 같은 문장
+    following = np.append(dollars[1:], len(data))
+    dollars, following = dollars[found], following[found]
+    breaks = np.flatnonzero((data == 10) | (data == 13))
+    stop = np.minimum(following, np.append(breaks, len(data))[np.searchsorted(breaks, dollars)])
+    complete = (ends < stop) & (ends + 2 < len(data))
+    dollars, ends = dollars[complete], ends[complete]
+
+    hex_ok = _IS_HEX[data[ends + 1]] & _IS_HEX[data[ends + 2]]
+    return dollars[hex_ok], ends[hex_ok]
+
+
+def _select(data, dollars, stars, commas, kind, field_count):
+    """talker + kind 문장 중 필드가 field_count개 이상인 것 -> ($ 위치, * 위치, 필드 시작, 필드 끝)
+
+    필드 i는 [시작[:, i], 끝[:, i]) 바이트 구간 (문장 종류 뒤 쉼표부터 field_count + 1개 쉼표 사이)
+    talker는 NMEA 표준대로 2글자 ('$GP' -> 'GP')
+    """
+    room = stars > dollars + 6
+    dollars, stars = dollars[room], stars[room]
+    talkers = [(ord(talker[1]) << 8) | ord(talker[2]) for talker in NMEA_TALKERS]
+    match = np.isin((data[dollars + 1].astype(np.uint16) << 8) | data[dollars + 2], talkers)
+    for offset, char in enumerate((kind + ',').encode(), start=3):
+        match &= data[dollars + offset] == char
+    dollars, stars = dollars[match], stars[match]
+
+    empty = np.empty((0, field_count), dtype=np.int64)
+    if not len(dollars) or not len(commas):
+        return dollars[:0], stars[:0], empty, empty
+
+    index = np.searchsorted(commas, dollars)[:, None] + np.arange(field_count + 1)
+    enough = index[:, -1] < len(commas)
+    bounds = commas[np.minimum(index, len(commas) - 1)]
+    enough &= bounds[:, -1] < stars
+    bounds = bounds[enough]
+    return dollars[enough], stars[enough], bounds[:, :-1] + 1, bounds[:, 1:]
+
+
+def _decimal(data, starts, ends, integer=None, fraction=None, convert=True):
+    """숫자 필드 -> (값, 형식 맞음) (빈 값은 NaN)
+
+    integer: 정수부 자릿수 (지정하면 빈 값은 형식 오류)
+    fraction: True면 소수부 필수, False면 소수점 없어야 함, None이면 선택
+    convert: False면 형식만 검사 (값은 None)
+    필드 안 글자 위치(열)마다 전체 문장을 한 번에 처리하고, 가수(모든 숫자)를 int64로 모은 뒤
+    10^소수부 자릿수로 한 번 나누므로 float()와 같은 값
+    """
+    count = len(starts)
+    ok = ends - starts <= FIELD_WIDTH
+    lengths = np.minimum(ends - starts, FIELD_WIDTH + 1).astype(np.int8)
+    mantissa = np.zeros(count, dtype=np.int64)
+    dots = np.zeros(count, dtype=np.int8)
+    dot_at = lengths.copy()
+
+    last = len(data) - 1
+    width = min(int(lengths.max()), FIELD_WIDTH) if count else 0
+    for column in range(width):
+        inside = lengths > column
+        chars = data[np.minimum(starts + column, last)]
+        value = chars - np.uint8(48)            # uint8이므로 '0'~'9'만 10 미만
+        digit = inside & (value < 10)
+        dot = inside & (chars == DOT)
+        ok &= digit | dot | ~inside
+        if convert:
+            mantissa = np.where(digit, mantissa * 10 + value, mantissa)
+        dot_at[dot] = column                    # 소수점이 둘 이상이면 어차피 형식 오류
+        dots += dot
+
+    # 형식이 맞으면(숫자와 소수점 1개 이하) 소수부 자릿수와 숫자 유무는 길이와 소수점 위치로 결정
+    decimals = np.where(dots > 0, lengths - dot_at - 1, 0)
+    values = None
+    if convert:
+        values = np.where(lengths > dots, mantissa / np.power(10.0, decimals), np.nan)
+    ok &= dots <= 1
+    if integer is not None:
+        ok &= dot_at == integer
+        if fraction is None:
+            ok &= (dots == 0) | (decimals > 0)
+    if fraction is True:
+        ok &= (dots == 1) & (decimals > 0)
+    elif fraction is False:
+        ok &= dots == 0
+    return values, ok
+
+
+def _char(data, starts, ends, allowed):
+    """한 글자 필드가 allowed 중 하나인지"""
+    return (ends - starts == 1) & np.isin(data[starts], np.frombuffer(allowed, dtype=np.uint8))
+
+
+def _checksum_ok(data, dollars, stars):
+    """'$'와 '*' 사이 바이트 XOR을 벡터로 계산해 체크섬 비교"""
+    if not len(dollars):
+        return np.zeros(0, dtype=bool)
+    # [$+1, *) 구간과 그 사이 구간을 번갈아 reduceat -> 짝수 번째가 문장 본문
+    computed = np.bitwise_xor.reduceat(data, np.column_stack((dollars + 1, stars)).ravel())[::2]
+    expected = (_HEX_VALUES[data[stars + 1]] << 4) | _HEX_VALUES[data[stars + 2]]
+    return computed == expected
+
+
+def _degrees(raw, hemispheres, negative):
+    """ddmm.mmmm / dddmm.mmmm -> 십진수 도 (남/서는 음수)"""
+    degrees = np.floor(raw / 100.0)
+    result = degrees + (raw - degrees * 100.0) / 60.0
+    return np.where(hemispheres == ord(negative), -result, result)
+
+
+def _seconds_of_day(raw):
+    """hhmmss.ss -> 자정 이후 초"""
+    hours = np.floor(raw / 10000.0)
+    minutes = np.floor(raw / 100.0) % 100.0
+    return hours * 3600.0 + minutes * 60.0 + (raw % 100.0)
+
+
+def _epoch_days(raw):
+    """ddmmyy -> 1970-01-01 이후 일 수"""
+    raw = raw.astype(np.int64)
+    day = raw // 10000
+    month = (raw // 100) % 100
+    year = 2000 + raw % 100
+    months = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1)
+    return (months.astype('datetime64[D]') + (day - 1)).astype(np.int64)
+
+
+def _decode_rmc(data, dollars, stars, commas):
+    """RMC 컬럼 (유효한 문장만) + 자정 이후 초 + 문장 위치"""
+    positions, ends_at, starts, ends = _select(data, dollars, stars, commas, 'RMC', RMC_FIELDS)
+
+    def field(i):
+        return starts[:, i], ends[:, i]
+
+    raw_time, valid = _decimal(data, *field(0), integer=6)
+    valid &= _char(data, *field(1), RMC_VALID_STATUS.encode())
+    raw_lat, ok = _decimal(data, *field(2), integer=4, fraction=True)
+    valid &= ok & _char(data, *field(3), b'NS')
+    raw_lon, ok = _decimal(data, *field(4), integer=5, fraction=True)
+    valid &= ok & _char(data, *field(5), b'EW')
+    speed, ok = _decimal(data, *field(6))
+    valid &= ok
+    heading, ok = _decimal(data, *field(7))
+    valid &= ok
+    raw_date, ok = _decimal(data, *field(8), integer=6, fraction=False)
+    valid &= ok & _checksum_ok(data, positions, ends_at)
+
+    seconds = _seconds_of_day(raw_time[valid])
+    columns = {
+        'time': _epoch_days(raw_date[valid]) * 86400.0 + seconds,
+        'latitude': _degrees(raw_lat[valid], data[starts[valid, 3]], 'S'),
+        'longitude': _degrees(raw_lon[valid], data[starts[valid, 5]], 'W'),
+        'speed': speed[valid] * KNOTS_TO_KMH,
+        'heading': heading[valid],
+    }
+    return columns, seconds, positions[valid]
+
+
+def _decode_gga(data, dollars, stars, commas):
+    """GGA 자정 이후 초, HDOP, 문장 위치 (유효한 문장만)"""
+    positions, ends_at, starts, ends = _select(data, dollars, stars, commas, 'GGA', GGA_FIELDS)
+
+    def field(i):
+        return starts[:, i], ends[:, i]
+
+    raw_time, valid = _decimal(data, *field(0), integer=6)
+    _, ok = _decimal(data, *field(1), integer=4, fraction=True, convert=False)
+    valid &= ok & _char(data, *field(2), b'NS')
+    _, ok = _decimal(data, *field(3), integer=5, fraction=True, convert=False)
+    valid &= ok & _char(data, *field(4), b'EW')
+    valid &= _char(data, *field(5), bytes(range(ord('0') + MIN_FIX_QUALITY, ord('9') + 1)))
+    _, ok = _decimal(data, *field(6), fraction=False, convert=False)
+    valid &= ok
+    hdop, ok = _decimal(data, *field(7))
+    valid &= ok & _checksum_ok(data, positions, ends_at)
+
+    return _seconds_of_day(raw_time[valid]), hdop[valid], positions[valid]
+
+
+def decode_buffer(buffer):
+    """NMEA 바이트 버퍼(bytes/mmap)를 컬럼 딕셔너리로 변환
+
+    Returns:
+        {'time': UTC epoch 초, 'latitude', 'longitude', 'speed'(km/h), 'heading', 'hdop'}
+        각 값은 RMC 문장 수 길이의 numpy 배열. HDOP는 스트림에서 바로 앞/뒤 GGA 중
+        UTC 시각이 같은 것에서 가져옴 (여러 날/여러 차량 로그에서도 다른 날짜의 같은 시각과 섞이지 않음)
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    dollars, stars = _sentences(data)
+    commas = np.flatnonzero(data == COMMA)
+
+    columns, seconds, rmc_positions = _decode_rmc(data, dollars, stars, commas)
+    gga_seconds, gga_hdop, gga_positions = _decode_gga(data, dollars, stars, commas)
+
+    # GGA HDOP를 RMC에 결합: 스트림 위치로 바로 앞/뒤 GGA를 찾고 시각이 같은 것 중 가까운 쪽 사용
+    hdop = np.full(len(seconds), np.nan)
+    count = len(gga_seconds)
+    if count and len(seconds):
+        after = np.searchsorted(gga_positions, rmc_positions)
+        nearest = np.full(len(seconds), np.inf)
+        for candidate in (after - 1, after):
+            index = np.clip(candidate, 0, count - 1)
+            matched = (candidate >= 0) & (candidate < count) & (gga_seconds[index] == seconds)
+            distance = np.where(matched, np.abs(gga_positions[index] - rmc_positions), np.inf)
+            closer = distance < nearest
+            hdop[closer] = gga_hdop[index[closer]]
+            nearest[closer] = distance[closer]
+
+    columns['hdop'] = hdop
+    return columns
+
+
+def decode_file(path):
+    """NMEA 로그 파일 디코딩 (일반 파일은 메모리 매핑, .gz 캡처는 압축 해제 후 처리)
+
+    nmea_capture.py 캡처 형식(앞에 수신 시각이 붙은 줄)도 그대로 처리됩니다.
+    """
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            return decode_buffer(f.read())
+
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return decode_buffer(mapped)
+        except ValueError:
+            # 빈 파일은 매핑할 수 없음
+            return decode_buffer(b'')
+
+
+def benchmark(path, repeat=3):
+    """디코딩 처리 속도 측정 (문장/초)"""
+    with open(path, 'rb') as f:
+        data = f.read() if not path.endswith('.gz') else gzip.decompress(f.read())
+    sentences = data.count(b'$')
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        columns = decode_buffer(data)
+        best = min(best, time.perf_counter() - start)
+
+    rate = sentences / best if best > 0 else 0
+    print(f"문장 수: {sentences}, 측위 수: {len(columns['time'])}")
+    print(f"최고 처리 시간: {best:.3f}초 ({rate / 1e6:.2f}M 문장/초)")
+    return rate
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NMEA 로그 일괄 디코딩")
+    parser.add_argument('path', help="NMEA 로그 파일 (.gz 캡처 파일 가능)")
+    parser.add_argument('--bench', action='store_true', help="처리 속도 측정")
+    parser.add_argument('--csv', help="결과를 CSV로 저장")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.path)
+    else:
+        result = decode_file(args.path)
+        print(f"측위 {len(result['time'])}개 디코딩 완료")
+        if args.csv:
+            names = list(result)
+            np.savetxt(args.csv, np.column_stack([result[n] for n in names]),
+                       delimiter=',', header=','.join(names), comments='', fmt='%.7f')
+            print(f"CSV 저장: {args.csv}")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+NMEA 원시 데이터 캡처/재생
+GPS 시리얼 원시 바이트를 수신 시각과 함께 압축 파일로 저장하고,
+저장된 파일을 다시 GPSReader 파서로 흘려보내 문제 재현/벤치마크에 사용
+"""
+
+import glob
+import gzip
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from config import (
+    GPS_CAPTURE_DIR,
+    GPS_CAPTURE_MAX_FILE_BYTES,
+    GPS_CAPTURE_MAX_TOTAL_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# 캡처 파일 이름 규칙 (정렬하면 시간 순서)
+CAPTURE_PREFIX = "nmea_"
+CAPTURE_SUFFIX = ".log.gz"
+
+
+class NMEACaptureWriter:
+    """원시 NMEA 바이트를 회전(rotation)되는 gzip 파일로 저장하는 클래스
+
+    write()는 큐에 넣기만 하고 즉시 반환하므로 GPS 읽기 경로를 막지 않습니다.
+    큐가 가득 차면 해당 줄은 버리고 dropped 카운터만 증가시킵니다.
+
+    레코드 형식: "<수신 epoch 초> <원시 NMEA 바이트>" (한 줄에 한 문장)
+    """
+
+    def __init__(self, directory=GPS_CAPTURE_DIR, max_file_bytes=GPS_CAPTURE_MAX_FILE_BYTES,
+                 max_total_bytes=GPS_CAPTURE_MAX_TOTAL_BYTES, queue_size=10000):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.running = True
+
+        self.raw_file = None
+        self.gzip_file = None
+        self.current_path = None
+
+        self.stats = {
+            'captured': 0,
+            'dropped': 0,
+            'files_rotated': 0,
+            'files_deleted': 0
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+        logger.info(f"NMEA 캡처 시작: {self.directory} (파일당 {max_file_bytes} B, 총 {max_total_bytes} B)")
+
+    def write(self, raw_line, arrival_time=None):
+        """원시 한 줄을 캡처 큐에 추가 (블로킹 없음)"""
+        if not self.running or not raw_line:
+            return
+        try:
+            self.queue.put_nowait((arrival_time or time.time(), raw_line))
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def _open_new_file(self):
+        """새 캡처 파일 열기"""
+        self._close_file()
+        name = f"{CAPTURE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{CAPTURE_SUFFIX}"
+        self.current_path = os.path.join(self.directory, name)
+        self.raw_file = open(self.current_path, 'wb')
+        self.gzip_file = gzip.GzipFile(fileobj=self.raw_file, mode='wb', compresslevel=6)
+        logger.debug(f"NMEA 캡처 파일 생성: {self.current_path}")
+
+    def _close_file(self):
+        """현재 캡처 파일 닫기"""
+        if self.gzip_file:
+            self.gzip_file.close()
+            self.gzip_file = None
+        if self.raw_file:
+            self.raw_file.close()
+            self.raw_file = None
+
+    def _enforce_budget(self):
+        """전체 용량 한도를 넘으면 오래된 파일부터 삭제"""
+        files = list_capture_files(self.directory)
+        sizes = {path: os.path.getsize(path) for path in files}
+        total = sum(sizes.values())
+
+        for path in files:
+            if total <= self.max_total_bytes or path == self.current_path:
+                break
+            try:
+                os.remove(path)
+                total -= sizes[path]
+                self.stats['files_deleted'] += 1
+                logger.info(f"NMEA 캡처 용량 초과로 삭제: {path}")
+            except OSError as e:
+                logger.warning(f"NMEA 캡처 파일 삭제 실패: {e}")
+
+    def _writer_loop(self):
+        """큐의 데이터를 파일에 기록 (백그라운드 스레드)"""
+        while self.running or not self.queue.empty():
+            try:
+                arrival_time, raw_line = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if self.gzip_file is None:
+                    self._open_new_file()
+                    self._enforce_budget()
+
+                if not raw_line.endswith(b'\n'):
+                    raw_line += b'\n'
+                self.gzip_file.write(b'%.3f ' % arrival_time + raw_line)
+                self.stats['captured'] += 1
+
+                # 압축된 실제 파일 크기 기준으로 회전
+                if self.raw_file.tell() >= self.max_file_bytes:
+                    self._open_new_file()
+                    self.stats['files_rotated'] += 1
+                    self._enforce_budget()
+
+            except Exception as e:
+                logger.error(f"NMEA 캡처 기록 오류: {e}")
+                self._close_file()
+
+        self._close_file()
+
+    def get_stats(self):
+        """캡처 통계 반환"""
+        return {
+            **self.stats,
+            'queued': self.queue.qsize(),
+            'current_file': self.current_path
+        }
+
+    def close(self):
+        """남은 데이터를 기록하고 캡처 종료"""
+        self.running = False
+        self.writer_thread.join(timeout=5)
+        logger.info(f"NMEA 캡처 종료 (저장 {self.stats['captured']}줄, 누락 {self.stats['dropped']}줄)")
+
+
+def list_capture_files(directory=GPS_CAPTURE_DIR):
+    """캡처 파일 목록 (오래된 순)"""
+    return sorted(glob.glob(os.path.join(directory, f"{CAPTURE_PREFIX}*{CAPTURE_SUFFIX}")))
+
+
+def iter_capture_records(paths):
+    """캡처 파일에서 (수신 시각, 원시 바이트) 순회"""
+    for path in paths:
+        try:
+            with gzip.open(path, 'rb') as f:
+                for record in f:
+                    stamp, _, raw_line = record.partition(b' ')
+                    try:
+                        yield float(stamp), raw_line
+                    except ValueError:
+                        continue
+        except (OSError, EOFError) as e:
+            # 전원 차단 등으로 끝이 잘린 파일은 읽은 데까지만 사용
+            logger.warning(f"캡처 파일 읽기 중단 ({path}): {e}")
+
+
+class NMEAReplaySource:
+    """캡처 파일을 시리얼 포트처럼 재생하는 클래스
+
+    GPSReader(source=NMEAReplaySource(...))로 넘기면 실제 파서 경로를 그대로 탑니다.
+
+    Args:
+        paths: 캡처 파일 경로 목록 (None이면 캡처 디렉터리 전체)
+        speed: 재생 배속 (1.0=실시간, 10.0=10배속, 0=대기 없이 최대 속도)
+    """
+
+    def __init__(self, paths=None, speed=1.0):
+        self.paths = paths if paths is not None else list_capture_files()
+        self.speed = speed
+        self.is_open = True
+
+        self._records = iter_capture_records(self.paths)
+        self._pending = next(self._records, None)
+        self._first_capture_time = self._pending[0] if self._pending else None
+        self._start_time = time.time()
+        self.lines_replayed = 0
+
+        logger.info(f"NMEA 재생 시작: 파일 {len(self.paths)}개, 배속 {speed}")
+
+    @property
+    def in_waiting(self):
+        """재생할 데이터가 남아 있으면 1 (재생 시각이 되었을 때만)"""
+        if self._pending is None:
+            return 0
+        if self.speed <= 0:
+            return 1
+        due = (self._pending[0] - self._first_capture_time) / self.speed
+        return 1 if time.time() - self._start_time >= due else 0
+
+    def readline(self):
+        """다음 원시 NMEA 줄 반환 (재생 시각까지 대기)"""
+        if self._pending is None:
+            return b''
+
+        if self.speed > 0:
+            due = (self._pending[0] - self._first_capture_time) / self.speed
+            wait = due - (time.time() - self._start_time)
+            if wait > 0:
+                time.sleep(wait)
+
+        _, raw_line = self._pending
+        self._pending = next(self._records, None)
+        self.lines_replayed += 1
+        return raw_line
+
+    def is_finished(self):
+        """모든 캡처를 재생했는지 여부"""
+        return self._pending is None
+
+    def close(self):
+        """재생 종료"""
+        self.is_open = False
+
+
+def replay_capture(paths=None, speed=0):
+    """캡처 파일을 GPSReader 파서로 재생하고 처리 속도 출력"""
+    from gps_reader import GPSReader
+
+    source = NMEAReplaySource(paths, speed=speed)
+    reader = GPSReader(source=source)
+
+    fixes = 0
+    start = time.time()
+    while not source.is_finished():
+        if reader.read():
+            fixes += 1
+    elapsed = max(time.time() - start, 1e-9)
+
+    print(f"재생 줄 수: {source.lines_replayed}, 측위 수: {fixes}")
+    print(f"처리 속도: {source.lines_replayed / elapsed:.0f} 줄/초 ({elapsed:.2f}초)")
+    reader.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="NMEA 캡처 파일 재생")
+    parser.add_argument('paths', nargs='*', help="캡처 파일 (생략 시 캡처 디렉터리 전체)")
+    parser.add_argument('--speed', type=float, default=0, help="재생 배속 (0=최대 속도, 1=실시간)")
+    args = parser.parse_args()
+
+    replay_capture(args.paths or None, speed=args.speed)
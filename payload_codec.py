@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+MQTT 샘플 payload 인코딩/디코딩 (트럭 전송과 수신 서버가 같이 사용)
+셀룰러 종량제 회선에서 JSON(ISO 시각 문자열, 반복되는 키)보다 작게 보내기 위함
+
+- json: 기존 형식 그대로 (압축하지 않으면 헤더 없는 JSON 문자열, 기존 수신기와 호환)
+- binary: 고정 레이아웃 레코드 (struct), 시각/id는 직전 레코드 대비 차이, 위경도/온도는 고정소수점
+- msgpack: 같은 값을 열(column) 단위 배열로 묶어 msgpack 직렬화 (msgpack 패키지 필요)
+- 압축: zlib(표준 라이브러리) 또는 zstd(zstandard 패키지 필요), 여러 샘플을 묶은 메시지에서 효과적
+
+바이너리/압축 payload는 5바이트 헤더(b'TG', 버전, 코덱, 압축)로 시작하고,
+decode_payload()는 헤더를 보고 형식을 자동으로 판별합니다.
+payload['seq'](순번 정보: epoch, acked, covered, unavailable, backfill)는 모든 코덱에서 그대로 전달되며
+binary는 레코드 뒤 선택 구간(b'S')으로 붙이므로 이전 디코더는 무시합니다.
+binary/msgpack의 시각은 시간대 없는 ISO 문자열의 벽시계 값을 UTC처럼 ms로 바꿔 보내므로 (버전 2)
+트럭과 수신 서버의 시간대가 달라도 JSON과 같은 문자열로 복원됩니다. 버전 1 프레임은 수신 측 시간대로 복원합니다.
+이 모듈은 config 등 프로젝트 모듈에 의존하지 않으므로 수신 서버에 그대로 복사해 사용할 수 있습니다.
+"""
+
+import json
+import struct
+import zlib
+from datetime import datetime, timezone
+
+MAGIC = b'TG'
+VERSION = 2
+LOCAL_TIME_VERSION = 1                    # 시각을 트럭 시간대 epoch로 보내던 이전 버전 (디코딩만 지원)
+
+CODECS = ('json', 'binary', 'msgpack')
+COMPRESSIONS = ('none', 'zlib', 'zstd')
+
+# 코드 값은 프로토콜의 일부이므로 순서를 바꾸지 말고 뒤에만 추가
+STATUS_NAMES = ('unknown', 'critical_cold', 'cold', 'normal', 'warm', 'critical_hot')
+HEALTH_NAMES = ('unknown', 'ok', 'degraded', 'failed')
+
+HEADER = struct.Struct('<2sBBB')          # magic, version, codec, compression
+FRAME = struct.Struct('<dHqq')            # 전송 시각(초), 레코드 수, 첫 레코드 시각(ms), 첫 레코드 id
+# 레코드: 시각 차(ms), id 차, 위도/경도(1e-7도), 온도(0.01°C), 상태, HDOP(0.01), 측위 시각 차(ms),
+#         예측 도달 시간(초), 예측 신뢰도(0.0001), 예측 경계 온도(0.01°C)
+RECORD = struct.Struct('<iiiihBHiHHh')
+RECORD_KEYS = ('dt', 'did', 'lat', 'lon', 'temp', 'status', 'hdop', 'fix', 'eta', 'conf', 'thr')
+CHANNEL = struct.Struct('<HBhBB')         # 레코드 번호, 채널 이름 번호, 온도(0.01°C), 상태, 상태(health)
+SEQ_MARK = b'S'
+SEQ = struct.Struct('<qqHH')              # epoch, acked, covered 구간 수, unavailable 구간 수 (+ backfill 요청 id 문자열)
+ID_RANGE = struct.Struct('<qq')           # id 구간 [시작, 끝]
+
+# 값 없음(None) 표시
+I32_NONE = -2 ** 31
+I16_NONE = -2 ** 15
+U16_NONE = 0xFFFF
+
+COORD_SCALE = 1e7
+TEMP_SCALE = 100.0
+HDOP_SCALE = 100.0
+CONFIDENCE_SCALE = 10000.0
+
+
+# ━━━━━ 고정소수점 변환 ━━━━━
+
+def _fixed(value, scale, none):
+    return none if value is None else int(round(value * scale))
+
+
+def _float(value, scale, none):
+    return None if value == none else value / scale
+
+
+def _code(names, value):
+    try:
+        return names.index(value)
+    except ValueError:
+        return 0
+
+
+def _name(names, code):
+    return names[code] if code < len(names) else names[0]
+
+
+def _to_seconds(iso_time):
+    """ISO 시각 -> 초 (시간대 없는 시각은 벽시계 값 그대로 UTC로 간주, 인코딩 측 시간대와 무관)"""
+    moment = datetime.fromisoformat(iso_time)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _to_ms(iso_time):
+    return int(round(_to_seconds(iso_time) * 1000))
+
+
+def _to_iso(seconds, timespec='auto', local_time=False):
+    """초 -> 시간대 없는 ISO 시각 (local_time이면 버전 1 프레임처럼 수신 측 시간대 기준)"""
+    if local_time:
+        return datetime.fromtimestamp(seconds).isoformat(timespec=timespec)
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None).isoformat(timespec=timespec)
+
+
+def _pack_str(value):
+    raw = value.encode('utf-8')
+    return struct.pack('<B', len(raw)) + raw
+
+
+def _unpack_str(buffer, offset):
+    length = buffer[offset]
+    offset += 1
+    return buffer[offset:offset + length].decode('utf-8'), offset + length
+
+
+def _columns(payload):
+    """payload['data'] -> 고정소수점/차이값 열 (binary, msgpack 공통)"""
+    data = payload['data']
+    times = [_to_ms(item['timestamp']) for item in data]
+    ids = [item['id'] for item in data]
+
+    columns = {
+        'dt': [0] + [b - a for a, b in zip(times, times[1:])],
+        'did': [0] + [b - a for a, b in zip(ids, ids[1:])],
+        'lat': [], 'lon': [], 'temp': [], 'status': [], 'hdop': [], 'fix': [],
+        'eta': [], 'conf': [], 'thr': []
+    }
+    for item, ms in zip(data, times):
+        forecast = item.get('forecast') or {}
+        fix_time = item.get('fix_time')
+        columns['lat'].append(_fixed(item.get('latitude'), COORD_SCALE, I32_NONE))
+        columns['lon'].append(_fixed(item.get('longitude'), COORD_SCALE, I32_NONE))
+        columns['temp'].append(_fixed(item.get('temperature'), TEMP_SCALE, I16_NONE))
+        columns['status'].append(_code(STATUS_NAMES, item.get('status')))
+        columns['hdop'].append(min(_fixed(item.get('hdop'), HDOP_SCALE, U16_NONE), U16_NONE))
+        columns['fix'].append(I32_NONE if fix_time is None else int(round(fix_time * 1000)) - ms)
+        eta = forecast.get('eta_seconds')
+        columns['eta'].append(U16_NONE if eta is None else min(int(round(eta)), U16_NONE - 1))
+        confidence = forecast.get('confidence')
+        columns['conf'].append(_fixed(confidence, CONFIDENCE_SCALE, U16_NONE))
+        columns['thr'].append(_fixed(forecast.get('threshold'), TEMP_SCALE, I16_NONE))
+
+    names = []
+    channels = []
+    for index, item in enumerate(data):
+        for name, reading in (item.get('channels') or {}).items():
+            if name not in names:
+                names.append(name)
+            channels.append((index, names.index(name),
+                             _fixed(reading.get('temperature'), TEMP_SCALE, I16_NONE),
+                             _code(STATUS_NAMES, reading.get('status')),
+                             _code(HEALTH_NAMES, reading.get('health'))))
+    return times, ids, columns, names, channels
+
+
+def _rows(vehicle_id, sent_at, first_ms, first_id, columns, names, channels, seq=None, local_time=False):
+    """열 -> payload dict (JSON 형식과 같은 구조)"""
+    data = []
+    ms, row_id = first_ms, first_id
+    for i in range(len(columns['dt'])):
+        ms += columns['dt'][i]
+        row_id += columns['did'][i]
+        fix = columns['fix'][i]
+        eta = columns['eta'][i]
+        forecast = None
+        if eta != U16_NONE:
+            forecast = {
+                'eta_seconds': eta,
+                'threshold': _float(columns['thr'][i], TEMP_SCALE, I16_NONE),
+                'confidence': _float(columns['conf'][i], CONFIDENCE_SCALE, U16_NONE)
+            }
+        data.append({
+            'id': row_id,
+            'vehicle_id': vehicle_id,
+            'timestamp': _to_iso(ms / 1000.0, 'milliseconds', local_time),
+            'latitude': _float(columns['lat'][i], COORD_SCALE, I32_NONE),
+            'longitude': _float(columns['lon'][i], COORD_SCALE, I32_NONE),
+            'temperature': _float(columns['temp'][i], TEMP_SCALE, I16_NONE),
+            'status': _name(STATUS_NAMES, columns['status'][i]),
+            'fix_time': None if fix == I32_NONE else (ms + fix) / 1000.0,
+            'hdop': _float(columns['hdop'][i], HDOP_SCALE, U16_NONE),
+            'forecast': forecast
+        })
+
+    for index, name_index, temperature, status, health in channels:
+        data[index].setdefault('channels', {})[names[name_index]] = {
+            'temperature': _float(temperature, TEMP_SCALE, I16_NONE),
+            'status': _name(STATUS_NAMES, status),
+            'health': _name(HEALTH_NAMES, health)
+        }
+
+    payload = {'vehicle_id': vehicle_id, 'timestamp': _to_iso(sent_at, local_time=local_time), 'data': data}
+    if seq is not None:
+        payload['seq'] = seq
+    return payload
+
+
+def _pack_seq(seq):
+    covered = seq.get('covered') or []
+    unavailable = seq.get('unavailable') or []
+    parts = [SEQ_MARK, SEQ.pack(seq['epoch'], seq.get('acked') or 0, len(covered), len(unavailable))]
+    parts.extend(ID_RANGE.pack(*id_range) for id_range in covered + unavailable)
+    parts.append(_pack_str(seq.get('backfill') or ''))
+    return b''.join(parts)
+
+
+def _unpack_seq(body, offset):
+    epoch, acked, covered_count, unavailable_count = SEQ.unpack_from(body, offset)
+    offset += SEQ.size
+    ranges = [list(id_range) for id_range in
+              ID_RANGE.iter_unpack(body[offset:offset + (covered_count + unavailable_count) * ID_RANGE.size])]
+    offset += len(ranges) * ID_RANGE.size
+    backfill, offset = _unpack_str(body, offset)
+    return {'epoch': epoch, 'acked': acked, 'covered': ranges[:covered_count],
+            'unavailable': ranges[covered_count:], 'backfill': backfill or None}
+
+
+# ━━━━━ 코덱별 본문 ━━━━━
+
+def _encode_binary(payload):
+    times, ids, columns, names, channels = _columns(payload)
+    sent_at = _to_seconds(payload['timestamp'])
+    parts = [
+        _pack_str(payload['vehicle_id']),
+        FRAME.pack(sent_at, len(times), times[0] if times else 0, ids[0] if ids else 0)
+    ]
+    parts.extend(RECORD.pack(*values) for values in zip(*(columns[key] for key in RECORD_KEYS)))
+
+    parts.append(struct.pack('<B', len(names)))
+    parts.extend(_pack_str(name) for name in names)
+    parts.append(struct.pack('<H', len(channels)))
+    parts.extend(CHANNEL.pack(*channel) for channel in channels)
+    if payload.get('seq'):
+        parts.append(_pack_seq(payload['seq']))
+    return b''.join(parts)
+
+
+def _decode_binary(body, local_time=False):
+    vehicle_id, offset = _unpack_str(body, 0)
+    sent_at, count, first_ms, first_id = FRAME.unpack_from(body, offset)
+    offset += FRAME.size
+
+    columns = {key: [] for key in RECORD_KEYS}
+    for values in RECORD.iter_unpack(body[offset:offset + count * RECORD.size]):
+        for key, value in zip(RECORD_KEYS, values):
+            columns[key].append(value)
+    offset += count * RECORD.size
+
+    name_count = body[offset]
+    offset += 1
+    names = []
+    for _ in range(name_count):
+        name, offset = _unpack_str(body, offset)
+        names.append(name)
+    (channel_count,) = struct.unpack_from('<H', body, offset)
+    offset += 2
+    channels = list(CHANNEL.iter_unpack(body[offset:offset + channel_count * CHANNEL.size]))
+    offset += channel_count * CHANNEL.size
+
+    seq = None
+    if body[offset:offset + 1] == SEQ_MARK:
+        seq = _unpack_seq(body, offset + 1)
+    return _rows(vehicle_id, sent_at, first_ms, first_id, columns, names, channels, seq, local_time)
+
+
+def _encode_msgpack(payload):
+    import msgpack
+
+    times, ids, columns, names, channels = _columns(payload)
+    return msgpack.packb({
+        'v': payload['vehicle_id'],
+        'at': _to_seconds(payload['timestamp']),
+        't0': times[0] if times else 0,
+        'id0': ids[0] if ids else 0,
+        'c': columns,
+        'n': names,
+        'ch': channels,
+        's': payload.get('seq')
+    }, use_bin_type=True)
+
+
+def _decode_msgpack(body, local_time=False):
+    import msgpack
+
+    frame = msgpack.unpackb(body, raw=False)
+    return _rows(frame['v'], frame['at'], frame['t0'], frame['id0'], frame['c'], frame['n'],
+                 [tuple(channel) for channel in frame['ch']], frame.get('s'), local_time)
+
+
+def _compress(body, compression, level=None):
+    if compression == 'zlib':
+        return zlib.compress(body, 9 if level is None else level)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=10 if level is None else level).compress(body)
+    return body
+
+
+def _decompress(body, compression):
+    if compression == 'zlib':
+        return zlib.decompress(body)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(body)
+    return body
+
+
+# ━━━━━ 공개 함수 ━━━━━
+
+def encode_payload(payload, codec='json', compression='none', level=None):
+    """샘플 payload dict({'vehicle_id', 'timestamp', 'data': [...]})를 전송용으로 인코딩
+
+    level: 압축 수준 (None이면 zlib 9, zstd 10)
+
+    Returns:
+        json + 압축 없음이면 str (기존 형식), 그 외에는 bytes
+    """
+    if codec not in CODECS:
+        raise ValueError(f"지원하지 않는 payload 코덱: {codec} (가능: {', '.join(CODECS)})")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"지원하지 않는 압축 방식: {compression} (가능: {', '.join(COMPRESSIONS)})")
+
+    if codec == 'json':
+        text = json.dumps(payload, default=str)
+        if compression == 'none':
+            return text
+        body = text.encode('utf-8')
+    elif codec == 'binary':
+        body = _encode_binary(payload)
+    else:
+        body = _encode_msgpack(payload)
+
+    header = HEADER.pack(MAGIC, VERSION, CODECS.index(codec), COMPRESSIONS.index(compression))
+    return header + _compress(body, compression, level)
+
+
+def decode_payload(payload):
+    """수신한 payload(bytes 또는 str)를 dict로 복원 (형식 자동 판별)
+
+    binary/msgpack은 고정소수점으로 보낸 값이므로 위경도 1e-7도, 온도 0.01°C, 시각 1ms 단위로 반올림됩니다.
+    """
+    if isinstance(payload, str):
+        return json.loads(payload)
+    if not payload.startswith(MAGIC):
+        return json.loads(payload.decode('utf-8'))
+
+    _, version, codec, compression = HEADER.unpack_from(payload)
+    if version not in (VERSION, LOCAL_TIME_VERSION):
+        raise ValueError(f"지원하지 않는 payload 버전: {version}")
+    body = _decompress(payload[HEADER.size:], COMPRESSIONS[compression])
+
+    codec = CODECS[codec]
+    if codec == 'json':
+        return json.loads(body.decode('utf-8'))
+    local_time = version == LOCAL_TIME_VERSION
+    if codec == 'binary':
+        return _decode_binary(body, local_time)
+    return _decode_msgpack(body, local_time)
+
+
+# ━━━━━ 크기 비교 ━━━━━
+
+def _sample_payloads(batch_size, batches=20, seed=1):
+    """시뮬레이터 값으로 만든 전송 payload (ServerSender 형식)"""
+    import random
+    import time
+    from temperature_simulator import TemperatureSimulator
+
+    random.seed(seed)
+    simulator = TemperatureSimulator()
+    now = time.time()
+    lat, lon = 37.5665, 126.9780
+    row_id = 1000
+
+    payloads = []
+    for _ in range(batches):
+        data = []
+        for _ in range(batch_size):
+            now += 0.1
+            row_id += 1
+            lat += random.uniform(-1e-5, 1e-5)
+            lon += random.uniform(-1e-5, 1e-5)
+            temperature = simulator.read()
+            data.append({
+                'id': row_id,
+                'vehicle_id': 'V001',
+                'timestamp': datetime.fromtimestamp(now).isoformat(),
+                'latitude': lat,
+                'longitude': lon,
+                'temperature': temperature,
+                'status': simulator.get_temperature_status(temperature),
+                'fix_time': now - 0.3,
+                'hdop': round(random.uniform(0.7, 1.5), 2),
+                'forecast': None
+            })
+        payloads.append({'vehicle_id': 'V001', 'timestamp': datetime.fromtimestamp(now).isoformat(), 'data': data})
+    return payloads
+
+
+def benchmark(batch_sizes=(1, 10, 100, 500)):
+    """코덱/압축 조합별 샘플당 바이트와 인코딩 시간 출력"""
+    import time
+
+    combinations = []
+    for codec in CODECS:
+        for compression in COMPRESSIONS:
+            try:
+                encode_payload({'vehicle_id': 'V001', 'timestamp': datetime.now().isoformat(), 'data': []},
+                               codec, compression)
+            except ImportError as e:
+                print(f"{codec}+{compression}: 건너뜀 ({e})")
+                continue
+            combinations.append((codec, compression))
+
+    for batch_size in batch_sizes:
+        payloads = _sample_payloads(batch_size)
+        samples = batch_size * len(payloads)
+        print(f"\n묶음 크기 {batch_size}개")
+        for codec, compression in combinations:
+            started = time.perf_counter()
+            encoded = [encode_payload(payload, codec, compression) for payload in payloads]
+            elapsed = time.perf_counter() - started
+            size = sum(len(item.encode('utf-8') if isinstance(item, str) else item) for item in encoded)
+            print(f"  {codec + '+' + compression:<16} 샘플당 {size / samples:7.1f} B  "
+                  f"인코딩 {elapsed / samples * 1e6:6.1f}µs/샘플")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+온도 센서 드라이버 레지스트리
+센서 타입 이름 -> 드라이버 클래스 경로("모듈:클래스")를 등록해 두고,
+실제로 선택된 드라이버 모듈만 처음 사용할 때 import
+
+새 센서 추가: SensorDriver를 상속한 클래스를 만들고 아래 DRIVERS에 추가하거나
+config.TEMP_SENSOR_DRIVERS에 {"이름": "모듈:클래스"}로 등록 (디스패처 수정 불필요)
+"""
+
+import importlib
+import inspect
+import logging
+from config import TEMP_SENSOR_DRIVERS
+from sensor_drivers.base import SensorDriver
+
+logger = logging.getLogger(__name__)
+
+
+def _check_driver(name, driver):
+    """SensorDriver를 상속하고 추상 메서드(connect/read)를 모두 구현했는지 확인"""
+    if not (inspect.isclass(driver) and issubclass(driver, SensorDriver)):
+        raise TypeError(f"센서 드라이버 {name}: SensorDriver를 상속한 클래스가 아님 ({driver!r})")
+    if inspect.isabstract(driver):
+        missing = ', '.join(sorted(driver.__abstractmethods__))
+        raise TypeError(f"센서 드라이버 {name}: 구현되지 않은 메서드 {missing}")
+    return driver
+
+# 기본 드라이버 (모듈은 create_driver()에서 필요할 때만 import)
+DRIVERS = {
+    'MCP9600': 'sensor_drivers.mcp9600:MCP9600Driver',
+    'DS18B20': 'sensor_drivers.ds18b20:DS18B20Driver',
+    'DHT22': 'sensor_drivers.dht22:DHT22Driver',
+    'GY21': 'sensor_drivers.gy21:GY21Driver',
+    'SIMULATOR': 'sensor_drivers.simulator:SimulatorDriver',
+}
+DRIVERS.update(TEMP_SENSOR_DRIVERS)
+
+
+def register_driver(name, driver=None):
+    """드라이버 등록 (클래스 또는 "모듈:클래스" 문자열)
+
+    데코레이터로도 사용 가능:
+        @register_driver('MAX31865')
+        class MAX31865Driver(SensorDriver): ...
+    """
+    if driver is None:
+        def decorator(cls):
+            register_driver(name, cls)
+            return cls
+        return decorator
+
+    if not isinstance(driver, str):
+        _check_driver(name, driver)
+    DRIVERS[name] = driver
+    return driver
+
+
+def load_driver(name):
+    """이름으로 드라이버 클래스 가져오기 (최초 사용 시 모듈 import)"""
+    try:
+        driver = DRIVERS[name]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 센서 타입: {name} (등록된 타입: {', '.join(sorted(DRIVERS))})")
+
+    if isinstance(driver, str):
+        module_name, _, class_name = driver.partition(':')
+        driver = _check_driver(name, getattr(importlib.import_module(module_name), class_name))
+        DRIVERS[name] = driver
+        logger.debug(f"센서 드라이버 로드: {name} -> {module_name}.{class_name}")
+
+    return driver
+
+
+def create_driver(name, **kwargs):
+    """드라이버 인스턴스 생성 (연결은 호출자가 connect()로 수행)"""
+    return load_driver(name)(**kwargs)
+
+
+def available_drivers():
+    """등록된 센서 타입 이름 목록"""
+    return sorted(DRIVERS)
+
+
+__all__ = ['SensorDriver', 'DRIVERS', 'register_driver', 'load_driver', 'create_driver', 'available_drivers']
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+온도 센서 드라이버 공통 인터페이스
+"""
+
+import logging
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class SensorDriver(ABC):
+    """센서 드라이버 기본 클래스
+
+    센서 하나당 클래스 하나를 만들고 sensor_drivers 레지스트리에 이름으로 등록합니다.
+    생성자는 하드웨어에 접근하지 않으며, connect()에서 실제 연결을 수행합니다.
+    connect()/read()는 추상 메서드이므로 빠뜨린 드라이버는 등록/생성 시점에 TypeError로 드러납니다.
+
+    capabilities 값:
+        'temperature'  온도 측정
+        'humidity'     습도 측정 가능
+        'multi_probe'  한 드라이버에서 여러 probe 읽기 (read_batch가 probe별 값 반환)
+        'i2c', '1wire', 'gpio'  사용하는 버스
+    """
+
+    name = None
+    capabilities = frozenset({'temperature'})
+
+    @abstractmethod
+    def connect(self):
+        """센서 연결 (실패 시 예외 발생)"""
+
+    @abstractmethod
+    def read(self):
+        """대표 온도 읽기 (°C, 실패 시 None)"""
+
+    def read_batch(self):
+        """드라이버가 읽을 수 있는 모든 값 -> {이름: 온도}"""
+        return {self.name: self.read()}
+
+    def close(self):
+        """센서 연결 종료"""
+
+    def get_stats(self):
+        """드라이버별 읽기 통계 (없으면 빈 딕셔너리)"""
+        return {}
+
+    def connection_test(self):
+        """센서 연결 상태 테스트 (로그 출력)"""
+        try:
+            temperature = self.read()
+            logger.info(f"{self.name} 센서 응답 온도: {temperature}°C")
+            stats = self.get_stats()
+            if stats:
+                logger.info(f"{self.name} 읽기 통계: {stats}")
+            logger.info(f"{self.name} 센서 연결 정상")
+        except Exception as e:
+            logger.error(f"{self.name} 센서 연결 오류: {e}")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+DHT22 온습도 센서 드라이버 (Adafruit 라이브러리 사용)
+"""
+
+import logging
+from sensor_drivers.base import SensorDriver
+
+logger = logging.getLogger(__name__)
+
+
+class DHT22Driver(SensorDriver):
+    """DHT22 센서 (GPIO4)"""
+
+    name = 'DHT22'
+    capabilities = frozenset({'temperature', 'humidity', 'gpio'})
+
+    def __init__(self):
+        self.sensor = None
+
+    def connect(self):
+        import adafruit_dht
+        import board
+        self.sensor = adafruit_dht.DHT22(board.D4)  # GPIO4
+        logger.info("DHT22 온도 센서 연결 성공")
+
+    def read(self):
+        """DHT22 센서 읽기"""
+        try:
+            return self.sensor.temperature
+        except RuntimeError as e:
+            # DHT22는 간혹 읽기 실패
+            logger.debug(f"DHT22 읽기 재시도 필요: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"DHT22 읽기 오류: {e}")
+            return None
+
+    def read_batch(self):
+        """온도와 습도"""
+        temperature = self.read()
+        try:
+            humidity = self.sensor.humidity if temperature is not None else None
+        except Exception:
+            humidity = None
+        return {self.name: temperature, 'humidity': humidity}
+
+    def close(self):
+        if self.sensor:
+            self.sensor.exit()
+            self.sensor = None
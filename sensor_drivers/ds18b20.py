@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+DS18B20 1-Wire 온도 센서 드라이버 (같은 버스의 여러 probe 지원)
+/sys/bus/w1/devices/28-xxxx/ 아래 파일 읽기
+
+가짜 sysfs 점검: python -m sensor_drivers.ds18b20
+(임시 디렉터리에 가짜 /sys/bus/w1 트리를 만들어 일괄 변환, 개별 읽기 전환, 동시 읽기를 확인)
+"""
+
+import glob
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import W1_SYSFS_ROOT, DS18B20_CONVERSION_TIMEOUT
+from sensor_drivers.base import SensorDriver
+
+logger = logging.getLogger(__name__)
+
+
+def parse_w1_slave(text):
+    """w1_slave 내용 파싱 (CRC 실패 또는 형식 오류면 None)"""
+    lines = text.splitlines()
+    if len(lines) < 2 or lines[0].strip()[-3:] != 'YES':
+        return None
+    temp_pos = lines[1].find('t=')
+    if temp_pos == -1:
+        return None
+    return float(lines[1][temp_pos + 2:]) / 1000.0
+
+
+class W1Sysfs:
+    """1-Wire sysfs 접근 계층 (root를 임시 디렉터리로 바꾸면 테스트용 가짜 sysfs 사용 가능)
+
+    커널이 therm_bulk_read를 지원하면 버스의 모든 DS18B20을 한 번에 변환시킨 뒤
+    각 probe의 temperature 파일에서 결과만 읽습니다.
+    """
+
+    def __init__(self, root=W1_SYSFS_ROOT):
+        self.root = root
+
+    def probe_ids(self):
+        """연결된 DS18B20 ID 목록 (28-xxxx)"""
+        return sorted(os.path.basename(path) for path in glob.glob(os.path.join(self.root, '28-*')))
+
+    def _bulk_files(self):
+        return glob.glob(os.path.join(self.root, 'w1_bus_master*', 'therm_bulk_read'))
+
+    def bulk_read_supported(self):
+        """일괄 변환(therm_bulk_read) 지원 여부"""
+        return bool(self._bulk_files())
+
+    def trigger_bulk_conversion(self):
+        """버스의 모든 온도 센서 변환 동시 시작"""
+        for path in self._bulk_files():
+            with open(path, 'w') as f:
+                f.write('trigger\n')
+
+    def bulk_conversion_pending(self):
+        """변환 진행 중이면 True (therm_bulk_read 값 -1)"""
+        for path in self._bulk_files():
+            with open(path) as f:
+                if f.read().strip() == '-1':
+                    return True
+        return False
+
+    def read_temperature(self, probe_id):
+        """일괄 변환 결과 읽기 (temperature 파일, 밀리도 단위)"""
+        with open(os.path.join(self.root, probe_id, 'temperature')) as f:
+            value = f.read().strip()
+        return float(value) / 1000.0 if value else None
+
+    def read_w1_slave(self, probe_id):
+        """개별 변환 후 결과 읽기 (약 750ms 블로킹)"""
+        with open(os.path.join(self.root, probe_id, 'w1_slave')) as f:
+            return parse_w1_slave(f.read())
+
+
+class DS18B20Driver(SensorDriver):
+    """DS18B20 온도 센서 (read()는 첫 번째 probe, read_batch()는 전체 probe)"""
+
+    name = 'DS18B20'
+    capabilities = frozenset({'temperature', 'multi_probe', '1wire'})
+
+    def __init__(self, root=W1_SYSFS_ROOT):
+        self.w1 = W1Sysfs(root)
+        self.probes = []
+        self.bulk = False
+        self.executor = None
+        self.latency = {}
+        self.last_probe_temperatures = {}
+
+    def connect(self):
+        """1-Wire 인터페이스 활성화 확인 및 장치 검색"""
+        self.probes = self.w1.probe_ids()
+        if not self.probes:
+            # 1-Wire 인터페이스가 로드되지 않았을 수 있으므로 재시도
+            logger.warning("1-Wire 장치가 감지되지 않습니다. 인터페이스를 확인합니다...")
+            raise FileNotFoundError("DS18B20 센서를 찾을 수 없습니다. 1-Wire 인터페이스가 활성화되어 있는지 확인해주세요.")
+
+        self.bulk = self.w1.bulk_read_supported()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.probes), thread_name_prefix='ds18b20')
+        self.latency = {probe: {'last': None, 'total': 0.0, 'reads': 0} for probe in self.probes}
+        self.last_probe_temperatures = {}
+        logger.info(
+            f"DS18B20 온도 센서 연결 성공: {len(self.probes)}개 {self.probes} "
+            f"(일괄 변환 {'지원' if self.bulk else '미지원, 개별 동시 읽기'})"
+        )
+
+    def _read_probe(self, probe_id, read_func, started):
+        """probe 하나 읽기 + 지연 기록 (스레드 풀에서 실행)"""
+        try:
+            temperature = read_func(probe_id)
+        except Exception as e:
+            logger.error(f"DS18B20 읽기 오류 ({probe_id}): {e}")
+            temperature = None
+
+        latency = self.latency[probe_id]
+        latency['last'] = time.perf_counter() - started
+        latency['total'] += latency['last']
+        latency['reads'] += 1
+        return temperature
+
+    def read_batch(self):
+        """모든 DS18B20 probe 동시 읽기 -> {probe_id: 온도}
+
+        일괄 변환 지원 시: 한 번 트리거 후 변환 완료를 기다렸다가 결과만 읽음
+        미지원 시: 각 probe의 w1_slave를 스레드 풀에서 동시에 읽음 (변환 시간이 겹침)
+        """
+        started = time.perf_counter()
+        read_func = self.w1.read_w1_slave
+
+        if self.bulk:
+            try:
+                self.w1.trigger_bulk_conversion()
+                deadline = time.monotonic() + DS18B20_CONVERSION_TIMEOUT
+                while self.w1.bulk_conversion_pending():
+                    if time.monotonic() > deadline:
+                        logger.warning("DS18B20 일괄 변환 시간 초과")
+                        break
+                    time.sleep(0.01)
+                read_func = self.w1.read_temperature
+            except OSError as e:
+                logger.warning(f"DS18B20 일괄 변환 실패, 개별 읽기로 전환: {e}")
+                self.bulk = False
+
+        futures = {probe: self.executor.submit(self._read_probe, probe, read_func, started)
+                   for probe in self.probes}
+        self.last_probe_temperatures = {probe: future.result() for probe, future in futures.items()}
+        return self.last_probe_temperatures
+
+    def read(self):
+        """첫 번째 probe 온도 (나머지는 last_probe_temperatures에 보관)"""
+        return self.read_batch().get(self.probes[0])
+
+    def get_stats(self):
+        """probe별 읽기 지연 통계 (초)"""
+        return {
+            probe: {
+                'last_latency': latency['last'],
+                'avg_latency': latency['total'] / latency['reads'] if latency['reads'] else None,
+                'reads': latency['reads'],
+                'temperature': self.last_probe_temperatures.get(probe)
+            }
+            for probe, latency in self.latency.items()
+        }
+
+    def connection_test(self):
+        """DS18B20 센서 파일 존재 확인 및 probe별 읽기"""
+        try:
+            probes = self.w1.probe_ids()
+            if not probes:
+                logger.error("DS18B20 센서를 찾을 수 없습니다")
+                return
+
+            logger.info(f"DS18B20 센서 발견: {probes}")
+            self.read_batch()
+            for probe, stats in self.get_stats().items():
+                logger.info(f"  {probe}: {stats['temperature']}°C, 지연 {stats['last_latency'] * 1000:.0f}ms")
+            logger.info("DS18B20 센서 연결 정상")
+
+        except Exception as e:
+            logger.error(f"DS18B20 센서 연결 오류: {e}")
+
+    def close(self):
+        """probe 읽기 스레드 풀 종료"""
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+# ━━━━━ 가짜 sysfs 점검 ━━━━━
+
+def _write_atomic(path, text):
+    """읽는 쪽이 잘린 파일을 보지 않도록 임시 파일에 쓴 뒤 교체"""
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+
+def make_fake_w1_tree(root, temperatures, bulk=True):
+    """가짜 1-Wire sysfs 트리 생성
+
+    temperatures: {probe_id: 온도(°C) 또는 None(CRC 실패)}
+    bulk: True면 w1_bus_master1/therm_bulk_read 파일, 'broken'이면 쓰기가 실패하도록 디렉터리로 만듦
+    """
+    master = os.path.join(root, 'w1_bus_master1')
+    os.makedirs(master, exist_ok=True)
+    for probe_id, temperature in temperatures.items():
+        os.makedirs(os.path.join(root, probe_id), exist_ok=True)
+        crc, millidegrees = ('YES', int(round(temperature * 1000))) if temperature is not None else ('NO', 0)
+        _write_atomic(os.path.join(root, probe_id, 'w1_slave'),
+                      f"50 05 4b 46 7f ff 0c 10 1c : crc=1c {crc}\n"
+                      f"50 05 4b 46 7f ff 0c 10 1c t={millidegrees}\n")
+        _write_atomic(os.path.join(root, probe_id, 'temperature'), '')
+
+    bulk_path = os.path.join(master, 'therm_bulk_read')
+    if bulk == 'broken':
+        os.makedirs(bulk_path, exist_ok=True)
+    elif bulk:
+        _write_atomic(bulk_path, '0\n')
+
+
+class FakeW1Kernel(W1Sysfs):
+    """가짜 sysfs 트리에서 커널의 일괄 변환 동작 흉내
+
+    trigger를 쓰면 바로 변환 중(-1)이 되고, conversion_time 뒤 각 probe의 temperature 파일을 채운 다음 완료(1)
+    """
+
+    def __init__(self, root, temperatures, conversion_time):
+        super().__init__(root)
+        self.temperatures = temperatures
+        self.conversion_time = conversion_time
+        self.timer = None
+
+    def trigger_bulk_conversion(self):
+        super().trigger_bulk_conversion()
+        for path in self._bulk_files():
+            _write_atomic(path, '-1\n')
+        self.timer = threading.Timer(self.conversion_time, self._complete)
+        self.timer.start()
+
+    def _complete(self):
+        for probe_id, temperature in self.temperatures.items():
+            _write_atomic(os.path.join(self.root, probe_id, 'temperature'),
+                          f"{int(round(temperature * 1000))}\n" if temperature is not None else '')
+        for path in self._bulk_files():
+            _write_atomic(path, '1\n')
+
+
+def run_fake_sysfs_check(probe_count=4, conversion_time=0.2):
+    """가짜 sysfs로 일괄 변환 / 일괄 변환 실패 시 개별 읽기 전환 / therm_bulk_read 없는 버스를 점검
+
+    Returns:
+        모든 경우 probe별 온도가 기대값과 같으면 True
+    """
+    import tempfile
+
+    temperatures = {f"28-00000000{index:04x}": 2.0 + index * 1.5 for index in range(probe_count)}
+    crc_failed = dict(temperatures, **{'28-00000000ffff': None})
+    ok = True
+
+    def check(label, driver, expected):
+        nonlocal ok
+        started = time.perf_counter()
+        result = driver.read_batch()
+        elapsed = time.perf_counter() - started
+        passed = result == expected
+        ok &= passed
+        print(f"{label}: {'OK' if passed else '불일치'} ({elapsed * 1000:.0f}ms, 일괄 변환 {driver.bulk}) {result}")
+        reads = [stats['reads'] for stats in driver.get_stats().values()]
+        print(f"  probe별 읽기 횟수: {reads}")
+        driver.close()
+
+    # 1) therm_bulk_read 지원: 한 번 트리거하고 변환 완료(-1 -> 1)를 기다린 뒤 temperature 파일만 읽음
+    with tempfile.TemporaryDirectory() as root:
+        make_fake_w1_tree(root, temperatures, bulk=True)
+        driver = DS18B20Driver(root=root)
+        driver.w1 = FakeW1Kernel(root, temperatures, conversion_time)
+        driver.connect()
+        check("일괄 변환", driver, temperatures)
+        waited = all(stats['last_latency'] >= conversion_time for stats in driver.get_stats().values())
+        ok &= waited
+        print(f"  변환 완료 대기: {'OK' if waited else '기다리지 않고 읽음'}")
+
+    # 2) 일괄 변환 쓰기 실패(OSError): 개별 읽기(w1_slave)로 전환, CRC 실패 probe는 None
+    with tempfile.TemporaryDirectory() as root:
+        make_fake_w1_tree(root, crc_failed, bulk='broken')
+        driver = DS18B20Driver(root=root)
+        driver.connect()
+        check("일괄 변환 실패 -> 개별 읽기", driver, crc_failed)
+
+    # 3) therm_bulk_read 없음: 처음부터 스레드 풀에서 probe별 w1_slave 동시 읽기
+    with tempfile.TemporaryDirectory() as root:
+        make_fake_w1_tree(root, temperatures, bulk=False)
+        driver = DS18B20Driver(root=root)
+        driver.connect()
+        check("개별 동시 읽기", driver, temperatures)
+
+    return ok
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="가짜 1-Wire sysfs로 DS18B20 일괄/개별 읽기 점검")
+    parser.add_argument('--probes', type=int, default=4, help="가짜 probe 수")
+    parser.add_argument('--conversion', type=float, default=0.2, help="가짜 일괄 변환 시간 (초)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(0 if run_fake_sysfs_check(args.probes, args.conversion) else 1)
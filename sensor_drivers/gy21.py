@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+GY-21 I2C 온도/습도 센서 드라이버 (SHT20 기반)
+"""
+
+import logging
+import time
+from config import GY21_ADDRESSES, GY21_CONVERSION_TIME, GY21_RESCAN_AFTER_FAILURES
+from sensor_drivers.base import SensorDriver
+
+logger = logging.getLogger(__name__)
+
+
+def sht20_crc8(data):
+    """SHT20 CRC-8 계산 (다항식 x^8 + x^5 + x^4 + 1, 초기값 0)"""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def find_i2c_devices(i2c_bus):
+    """연결된 I2C 장치 찾기"""
+    logger.info("연결된 I2C 장치 검색 중...")
+
+    found_devices = []
+    for address in range(0x03, 0x78):  # 일반적인 I2C 주소 범위
+        try:
+            # 장치가 응답하는지 테스트
+            i2c_bus.writeto(address, b'')
+            found_devices.append(address)
+            logger.info(f"주소 0x{address:02X}에 장치 발견")
+        except Exception:
+            pass  # 응답 없음, 계속 진행
+
+    if found_devices:
+        logger.info(f"발견된 I2C 장치들: {[f'0x{addr:02X}' for addr in found_devices]}")
+    else:
+        logger.warning("연결된 I2C 장치를 찾을 수 없습니다")
+    return found_devices
+
+
+class GY21Driver(SensorDriver):
+    """GY-21 (SHT20) 온도 센서
+
+    측정 트리거와 결과 읽기를 분리해 파이프라이닝합니다.
+    """
+
+    name = 'GY21'
+    capabilities = frozenset({'temperature', 'humidity', 'i2c'})
+
+    def __init__(self, addresses=GY21_ADDRESSES):
+        self.possible_addresses = addresses
+        self.i2c_bus = None
+        self.address = None          # 발견한 주소 (최초 1회 검색 후 캐시)
+        self.triggered_at = None     # 진행 중인 측정의 트리거 시각
+        self.failures = 0            # 연속 실패 횟수 (초과 시 재검색)
+
+    def connect(self):
+        import board
+        import busio
+
+        # I2C 버스 초기화 (Adafruit-Blinka 사용, 10kHz로 설정)
+        self.i2c_bus = busio.I2C(board.SCL, board.SDA, frequency=10000)
+        logger.info(f"GY-21 온도 센서 초기화 (시도 주소: {[f'0x{a:02X}' for a in self.possible_addresses]})")
+
+    def discover(self):
+        """GY-21 주소 검색 (후보 주소 우선, 없으면 전체 버스 검색)"""
+        for address in self.possible_addresses:
+            try:
+                self.i2c_bus.writeto(address, b'')
+                logger.info(f"GY-21 센서 발견 (I2C 주소: 0x{address:02X})")
+                return address
+            except Exception:
+                continue
+
+        devices = find_i2c_devices(self.i2c_bus)
+        if devices:
+            logger.info(f"GY-21 후보 주소 응답 없음, 발견된 장치 0x{devices[0]:02X} 사용")
+            return devices[0]
+        return None
+
+    def _trigger(self):
+        """온도 측정 시작 (No Hold Master 모드, 0xF3)"""
+        self.i2c_bus.writeto(self.address, bytes([0xF3]))
+        self.triggered_at = time.monotonic()
+
+    def _fetch(self):
+        """측정 결과 3바이트(MSB, LSB, CRC) 읽고 온도로 변환"""
+        buffer = bytearray(3)
+        self.i2c_bus.readfrom_into(self.address, buffer)
+
+        if sht20_crc8(buffer[:2]) != buffer[2]:
+            raise ValueError(f"CRC 불일치: {list(buffer)}")
+
+        # 하위 2비트는 상태 비트이므로 제거
+        raw_temp = ((buffer[0] << 8) | buffer[1]) & 0xFFFC
+
+        # 온도 계산 (SHT20 공식)
+        return -46.85 + 175.72 * (raw_temp / 65536.0)
+
+    def read(self):
+        """GY-21 센서 읽기
+
+        결과를 읽자마자 다음 측정을 시작하므로 85ms 변환 시간 동안 다른 작업이 진행되고,
+        변환이 끝나지 않았으면 기다리지 않고 None을 반환합니다.
+        """
+        try:
+            if self.address is None:
+                self.address = self.discover()
+                if self.address is None:
+                    logger.error("읽을 수 있는 I2C 장치가 없습니다")
+                    return None
+
+            if self.triggered_at is None:
+                # 첫 측정 (또는 실패 후): 트리거하고 변환 완료까지 대기
+                self._trigger()
+                time.sleep(GY21_CONVERSION_TIME)
+            elif time.monotonic() - self.triggered_at < GY21_CONVERSION_TIME:
+                return None  # 아직 변환 중
+
+            temperature = self._fetch()
+            self._trigger()  # 다음 측정 미리 시작
+
+            self.failures = 0
+            logger.debug(f"GY-21 온도: {temperature:.2f}°C")
+            return temperature
+
+        except Exception as e:
+            self.triggered_at = None
+            self.failures += 1
+            logger.warning(f"GY-21 읽기 오류 ({self.failures}회 연속): {e}")
+
+            # 연속 실패가 누적되면 다음 읽기에서 주소 재검색
+            if self.failures >= GY21_RESCAN_AFTER_FAILURES:
+                logger.warning("GY-21 연속 실패 한도 초과, 주소를 다시 검색합니다")
+                self.address = None
+                self.failures = 0
+            return None
+
+    def connection_test(self):
+        """연결된 모든 I2C 장치에서 온도 읽기 시도"""
+        try:
+            logger.info("연결된 모든 I2C 장치 검색...")
+            devices = find_i2c_devices(self.i2c_bus)
+            if not devices:
+                logger.error("연결된 I2C 장치를 찾을 수 없습니다")
+                return
+
+            for device_addr in devices:
+                try:
+                    logger.info(f"장치 0x{device_addr:02X}에서 온도 읽기 시도...")
+
+                    # 온도 측정 명령 전송 (0xF3)
+                    self.i2c_bus.writeto(device_addr, bytes([0xF3]))
+                    time.sleep(0.1)
+
+                    buffer = bytearray(2)
+                    self.i2c_bus.readfrom_into(device_addr, buffer)
+                    logger.info(f"장치 0x{device_addr:02X} 응답 데이터: {list(buffer)}")
+
+                    raw_temp = (buffer[0] << 8) + buffer[1]
+                    temperature = -46.85 + 175.72 * (raw_temp / 65536.0)
+                    logger.info(f"장치 0x{device_addr:02X} 온도: {temperature:.2f}°C")
+                    logger.info("GY-21 센서 연결 정상")
+
+                except Exception as e:
+                    logger.warning(f"장치 0x{device_addr:02X} 읽기 실패: {e}")
+
+        except Exception as e:
+            logger.error(f"GY-21 센서 연결 테스트 오류: {e}")
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+MCP9600 I2C 열전대 증폭기 드라이버
+Adafruit 드라이버 대신 레지스터를 직접 읽어 한 번의 버스 점유로 처리
+"""
+
+import json
+import logging
+import time
+from config import (
+    MCP9600_ADDRESSES,
+    MCP9600_FREQUENCIES,
+    MCP9600_THERMOCOUPLE_TYPE,
+    MCP9600_ADC_RESOLUTION,
+    MCP9600_FILTER_COEFFICIENT,
+    MCP9600_CACHE_FILE,
+    MCP9600_STATS_INTERVAL,
+)
+from sensor_drivers.base import SensorDriver
+
+logger = logging.getLogger(__name__)
+
+# MCP9600 레지스터 (데이터시트 기준)
+MCP9600_REG_HOT_JUNCTION = 0x00
+MCP9600_REG_COLD_JUNCTION = 0x02
+MCP9600_REG_STATUS = 0x04
+# 0x00~0x04 결과 레지스터를 한 번에 읽을 때의 길이와 위치
+# 열전대(2) + 델타(2) + 냉접점(2) + 원시 ADC(3) + 상태(1)
+MCP9600_BURST_LENGTH = 10
+MCP9600_BURST_HOT = slice(0, 2)
+MCP9600_BURST_COLD = slice(4, 6)
+MCP9600_BURST_STATUS = 9
+MCP9600_BURST_TOLERANCE = 1.0           # 버스트/개별 읽기 냉접점 허용 차이 (°C)
+MCP9600_REG_SENSOR_CONFIG = 0x05
+MCP9600_REG_DEVICE_CONFIG = 0x06
+MCP9600_REG_DEVICE_ID = 0x20
+MCP9600_DEVICE_IDS = (0x40, 0x41)      # MCP9600, MCP9601
+MCP9600_STATUS_INPUT_RANGE = 0x10       # 열전대 단선/범위 초과
+
+MCP9600_THERMOCOUPLE_TYPES = {'K': 0, 'J': 1, 'T': 2, 'N': 3, 'S': 4, 'E': 5, 'B': 6, 'R': 7}
+# ADC 분해능(비트) -> 설정 코드, 변환 시간(초)
+MCP9600_ADC_RESOLUTIONS = {18: (0b00, 0.320), 16: (0b01, 0.080), 14: (0b10, 0.020), 12: (0b11, 0.005)}
+
+
+class MCP9600Driver(SensorDriver):
+    """MCP9600 열전대 온도 센서"""
+
+    name = 'MCP9600'
+    capabilities = frozenset({'temperature', 'cold_junction', 'i2c'})
+
+    def __init__(self, cache_file=MCP9600_CACHE_FILE):
+        self.cache_file = cache_file
+        self.i2c_bus = None
+        self.address = None
+        self.last_cold_junction = None
+        self.last_status = None
+        self.burst_read = False
+        self.stats = None
+
+    def connect(self):
+        """MCP9600 연결 후 열전대/ADC/필터 설정"""
+        try:
+            self._connect_bus()
+            self.configure()
+        except Exception as e:
+            logger.warning(f"MCP9600 센서 연결 실패: {e}")
+            raise
+
+    def _probe(self, i2c, address):
+        """장치 ID 레지스터로 MCP9600 응답 확인"""
+        buffer = bytearray(2)
+        while not i2c.try_lock():
+            pass
+        try:
+            i2c.writeto_then_readfrom(address, bytes([MCP9600_REG_DEVICE_ID]), buffer)
+        finally:
+            i2c.unlock()
+        return buffer[0] in MCP9600_DEVICE_IDS
+
+    def _connect_bus(self):
+        """저장된 주소/주파수 우선 시도, 실패 시 전체 탐색 후 저장"""
+        import board
+        import busio
+
+        cached = None
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        candidates = []
+        if cached:
+            candidates.append((cached['frequency'], [cached['address']]))
+        candidates += [(freq, MCP9600_ADDRESSES) for freq in MCP9600_FREQUENCIES]
+
+        for freq, addresses in candidates:
+            try:
+                i2c = busio.I2C(board.SCL, board.SDA, frequency=freq)
+            except Exception as e:
+                logger.debug(f"I2C 버스 초기화 실패 ({freq}Hz): {e}")
+                continue
+
+            for address in addresses:
+                try:
+                    if self._probe(i2c, address):
+                        self.i2c_bus = i2c
+                        self.address = address
+                        logger.info(f"MCP9600 온도 센서 연결 성공 (I2C 주소: 0x{address:02X}, {freq}Hz)")
+                        if cached != {'address': address, 'frequency': freq}:
+                            self._save_cache(address, freq)
+                        return
+                except Exception:
+                    continue
+
+            i2c.deinit()
+
+        raise Exception("모든 주소/주파수 시도 실패")
+
+    def _save_cache(self, address, frequency):
+        """발견한 주소/주파수 저장 (다음 시작 시 탐색 생략)"""
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump({'address': address, 'frequency': frequency}, f)
+        except OSError as e:
+            logger.warning(f"MCP9600 설정 캐시 저장 실패: {e}")
+
+    def configure(self):
+        """열전대 타입, 디지털 필터, ADC 분해능 설정
+
+        ADC 분해능은 변환 시간이 샘플 간격 안에 들어오도록 고릅니다
+        (18비트 320ms, 16비트 80ms, 14비트 20ms, 12비트 5ms).
+        """
+        tc_type = MCP9600_THERMOCOUPLE_TYPES[MCP9600_THERMOCOUPLE_TYPE]
+        adc_code, conversion_time = MCP9600_ADC_RESOLUTIONS[MCP9600_ADC_RESOLUTION]
+
+        sensor_config = (tc_type << 4) | (MCP9600_FILTER_COEFFICIENT & 0x07)
+        # bit7=0: 냉접점 0.0625°C 분해능, bit4-2=0: 버스트 1회, bit1-0=0: 연속 변환 모드
+        device_config = adc_code << 5
+
+        while not self.i2c_bus.try_lock():
+            pass
+        try:
+            self.i2c_bus.writeto(self.address, bytes([MCP9600_REG_SENSOR_CONFIG, sensor_config]))
+            self.i2c_bus.writeto(self.address, bytes([MCP9600_REG_DEVICE_CONFIG, device_config]))
+        finally:
+            self.i2c_bus.unlock()
+
+        self.burst_read = self._check_burst()
+
+        self.stats = {'reads': 0, 'errors': 0, 'latency_total': 0.0, 'latency_max': 0.0,
+                      'started_at': time.monotonic()}
+        self.last_cold_junction = None
+        self.last_status = None
+        logger.info(
+            f"MCP9600 설정: {MCP9600_THERMOCOUPLE_TYPE}형 열전대, ADC {MCP9600_ADC_RESOLUTION}비트 "
+            f"(변환 {conversion_time * 1000:.0f}ms), 필터 계수 {MCP9600_FILTER_COEFFICIENT}, "
+            f"{'버스트 읽기' if self.burst_read else '레지스터별 읽기'}"
+        )
+
+    def _check_burst(self):
+        """결과 레지스터 연속 읽기(포인터 자동 증가) 지원 여부 확인
+
+        0x00부터 10바이트를 한 번에 읽은 냉접점 값이 0x02를 따로 읽은 값과
+        일치하면 이후 샘플마다 한 번의 트랜잭션으로 읽습니다. 포인터가
+        증가하지 않는 장치(같은 레지스터 반복 등)는 레지스터별 읽기로 둡니다.
+        """
+        burst = bytearray(MCP9600_BURST_LENGTH)
+        cold = bytearray(2)
+        while not self.i2c_bus.try_lock():
+            pass
+        try:
+            self.i2c_bus.writeto_then_readfrom(self.address, bytes([MCP9600_REG_HOT_JUNCTION]), burst)
+            self.i2c_bus.writeto_then_readfrom(self.address, bytes([MCP9600_REG_COLD_JUNCTION]), cold)
+        except Exception as e:
+            logger.warning(f"MCP9600 버스트 읽기 확인 실패, 레지스터별 읽기 사용: {e}")
+            return False
+        finally:
+            self.i2c_bus.unlock()
+
+        difference = abs(self._temperature(burst[MCP9600_BURST_COLD]) - self._temperature(cold))
+        if difference > MCP9600_BURST_TOLERANCE:
+            logger.info(f"MCP9600 포인터 자동 증가 미지원 (냉접점 차이 {difference:.2f}°C), 레지스터별 읽기 사용")
+            return False
+        return True
+
+    @staticmethod
+    def _temperature(data):
+        """2바이트 부호 있는 온도 레지스터 -> °C (LSB 0.0625°C)"""
+        return int.from_bytes(data, 'big', signed=True) * 0.0625
+
+    def read(self):
+        """MCP9600 센서 읽기
+
+        버스트 읽기가 확인된 경우 0x00~0x04 결과 레지스터를 트랜잭션 한 번으로 읽어
+        열전대(hot junction), 냉접점(cold junction), 상태를 꺼냅니다. 확인되지 않은
+        경우 버스를 한 번 점유한 상태에서 세 레지스터를 각각 읽습니다.
+        """
+        started = time.perf_counter()
+
+        try:
+            while not self.i2c_bus.try_lock():
+                pass
+            try:
+                if self.burst_read:
+                    burst = bytearray(MCP9600_BURST_LENGTH)
+                    self.i2c_bus.writeto_then_readfrom(self.address, bytes([MCP9600_REG_HOT_JUNCTION]), burst)
+                    hot = burst[MCP9600_BURST_HOT]
+                    cold = burst[MCP9600_BURST_COLD]
+                    status = burst[MCP9600_BURST_STATUS:MCP9600_BURST_STATUS + 1]
+                else:
+                    hot = bytearray(2)
+                    cold = bytearray(2)
+                    status = bytearray(1)
+                    self.i2c_bus.writeto_then_readfrom(self.address, bytes([MCP9600_REG_HOT_JUNCTION]), hot)
+                    self.i2c_bus.writeto_then_readfrom(self.address, bytes([MCP9600_REG_COLD_JUNCTION]), cold)
+                    self.i2c_bus.writeto_then_readfrom(self.address, bytes([MCP9600_REG_STATUS]), status)
+            finally:
+                self.i2c_bus.unlock()
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"MCP9600 읽기 오류: {e}")
+            return None
+
+        self._record_latency(time.perf_counter() - started)
+
+        self.last_cold_junction = self._temperature(cold)
+        self.last_status = status[0]
+        if status[0] & MCP9600_STATUS_INPUT_RANGE:
+            logger.warning("MCP9600 열전대 입력 범위 초과 (단선 확인 필요)")
+            return None
+
+        # 열전대로 측정한 온도 (냉장고 내부 온도)
+        return self._temperature(hot)
+
+    def read_batch(self):
+        """열전대 온도와 냉접점(보드) 온도"""
+        temperature = self.read()
+        return {self.name: temperature, 'cold_junction': self.last_cold_junction}
+
+    def _record_latency(self, latency):
+        """읽기 지연 통계 누적 및 주기적 로그"""
+        stats = self.stats
+        stats['reads'] += 1
+        stats['latency_total'] += latency
+        stats['latency_max'] = max(stats['latency_max'], latency)
+
+        if stats['reads'] % MCP9600_STATS_INTERVAL == 0:
+            result = self.get_stats()
+            logger.info(
+                f"MCP9600 읽기 통계: {result['reads_per_second']:.1f}회/초, "
+                f"평균 {result['latency_avg_ms']:.2f}ms, 최대 {result['latency_max_ms']:.2f}ms, "
+                f"오류 {result['errors']}회"
+            )
+
+    def get_stats(self):
+        """MCP9600 읽기 속도/지연 통계 반환"""
+        stats = self.stats
+        if stats is None:
+            return {}
+        elapsed = max(time.monotonic() - stats['started_at'], 1e-9)
+        reads = stats['reads']
+        return {
+            'reads': reads,
+            'errors': stats['errors'],
+            'reads_per_second': reads / elapsed,
+            'latency_avg_ms': (stats['latency_total'] / reads * 1000) if reads else 0.0,
+            'latency_max_ms': stats['latency_max'] * 1000,
+            'cold_junction': self.last_cold_junction,
+            'status': self.last_status
+        }
+
+    def close(self):
+        """I2C 버스 해제"""
+        if self.i2c_bus is not None:
+            try:
+                self.i2c_bus.deinit()
+            except Exception:
+                pass
+            self.i2c_bus = None
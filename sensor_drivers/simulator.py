@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+온도 시뮬레이터 드라이버 (센서 없이 채널 구성 테스트용)
+"""
+
+from sensor_drivers.base import SensorDriver
+
+
+class SimulatorDriver(SensorDriver):
+    """TemperatureSimulator를 드라이버 인터페이스로 감싼 클래스"""
+
+    name = 'SIMULATOR'
+    capabilities = frozenset({'temperature', 'simulated'})
+
+    def __init__(self):
+        self.simulator = None
+
+    def connect(self):
+        from temperature_simulator import TemperatureSimulator
+        self.simulator = TemperatureSimulator()
+
+    def read(self):
+        return self.simulator.read()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+다중 온도 채널 관리자
+냉장 칸 여러 개와 문/외기 probe 등 서로 다른 온도 센서를 스레드 풀에서 동시에 읽음
+채널마다 읽기 주기, 타임아웃, 상태(health)를 따로 관리하므로 느린 probe가 다른 채널을 막지 않음
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import TEMP_CHANNELS, SENSOR_FAILURE_THRESHOLD, SENSOR_RECONNECT_INTERVAL, TEMP_RANGES
+from temperature_filter import TemperatureFilter
+from excursion_engine import classify_temperature
+from anomaly_detector import AnomalyDetector
+
+logger = logging.getLogger(__name__)
+
+
+def create_temperature_reader(sensor_type, isolated=False, timeout=None):
+    """센서 타입 이름으로 온도 리더 생성 (sensor_drivers에 등록된 이름, 'SIMULATOR'는 시뮬레이터)
+
+    isolated=True면 드라이버를 작업 프로세스에서 실행 (읽기마다 timeout 강제)
+    """
+    if isolated:
+        from sensor_watchdog import IsolatedSensorReader
+        return IsolatedSensorReader(sensor_type, timeout=timeout)
+
+    from temperature_reader import TemperatureReader
+    return TemperatureReader(sensor_type=sensor_type)
+
+
+class SensorChannel:
+    """온도 채널 하나의 설정과 상태"""
+
+    def __init__(self, name, sensor_type, rate=1.0, timeout=1.0, primary=False, isolated=False):
+        self.name = name
+        self.sensor_type = sensor_type
+        self.isolated = isolated
+        self.interval = 1.0 / rate
+        self.timeout = timeout
+        self.primary = primary
+
+        self.reader = None
+        self.last_connect_attempt = None
+
+        # 상태: unknown(아직 읽지 않음), ok, degraded(일시 실패), failed(연속 실패/타임아웃)
+        self.health = 'unknown'
+        self.consecutive_failures = 0
+        self.timeouts = 0
+
+        self.future = None
+        self.submitted_at = None
+        self.next_due = 0.0
+
+        # 채널별 스파이크 제거 필터 (last_value는 필터값, last_raw는 원시값)
+        self.filter = TemperatureFilter()
+        self.last_value = None
+        self.last_raw = None
+        self.last_read_time = None
+        self.last_latency = None
+
+        # 채널별 이상 패턴 감지 (문 probe의 급변 등), 이벤트는 저장 전까지 모아둠
+        self.anomaly = AnomalyDetector(channel=name)
+        self.anomaly_events = []
+
+    def record_success(self, value, latency):
+        self.last_raw = value
+        self.last_value = self.filter.update(value)
+        self.last_read_time = time.time()
+        self.anomaly_events.extend(self.anomaly.update(self.last_value, self.last_read_time))
+        self.last_latency = latency
+        self.consecutive_failures = 0
+        self.health = 'ok'
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.health = 'failed' if self.consecutive_failures >= SENSOR_FAILURE_THRESHOLD else 'degraded'
+
+
+class SensorManager:
+    """여러 온도 채널을 동시에 읽는 관리자
+
+    GPSTracker에서는 기존 온도 리더 자리에 그대로 들어갑니다.
+    read()는 대표(primary) 채널의 새 원시값을 반환하고 (필터는 GPSTracker에서 적용),
+    get_readings()는 전체 채널의 필터값과 원시값을 반환합니다.
+    """
+
+    def __init__(self, channels):
+        if not channels:
+            raise ValueError("온도 채널이 설정되지 않았습니다")
+
+        self.channels = channels
+        if not any(channel.primary for channel in channels):
+            channels[0].primary = True
+        self.primary = next(channel for channel in channels if channel.primary)
+
+        self.temp_ranges = TEMP_RANGES
+        self.executor = ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix='sensor')
+        self.lock = threading.Lock()
+        self.running = False
+        self.scheduler_thread = None
+        self._last_primary_read_time = None
+
+    @classmethod
+    def from_config(cls, channel_configs=TEMP_CHANNELS):
+        """config.TEMP_CHANNELS 목록으로 관리자 생성"""
+        return cls([SensorChannel(**channel_config) for channel_config in channel_configs])
+
+    def start(self):
+        """채널 스케줄러 시작"""
+        if self.running:
+            return
+        self.running = True
+        self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+        self.scheduler_thread.start()
+        logger.info(f"온도 채널 관리자 시작: {[channel.name for channel in self.channels]} (대표: {self.primary.name})")
+
+    def _read_channel(self, channel):
+        """채널 하나 읽기 (스레드 풀에서 실행)"""
+        if channel.reader is None:
+            now = time.time()
+            if channel.last_connect_attempt and now - channel.last_connect_attempt < SENSOR_RECONNECT_INTERVAL:
+                return None
+            channel.last_connect_attempt = now
+            channel.reader = create_temperature_reader(channel.sensor_type, channel.isolated, channel.timeout)
+            logger.info(f"온도 채널 '{channel.name}' 연결 ({channel.sensor_type})")
+        return channel.reader.read()
+
+    def _collect(self, channel, now):
+        """완료된 읽기 결과 반영"""
+        latency = now - channel.submitted_at
+        try:
+            value = channel.future.result()
+        except Exception as e:
+            logger.warning(f"온도 채널 '{channel.name}' 읽기 오류: {e}")
+            value = None
+            # 센서 객체가 망가졌을 수 있으므로 다음에 다시 연결
+            self._drop_reader(channel)
+
+        with self.lock:
+            if value is not None:
+                channel.record_success(value, latency)
+            else:
+                channel.record_failure()
+        channel.future = None
+
+    def _drop_reader(self, channel):
+        """채널 센서 연결 정리"""
+        reader, channel.reader = channel.reader, None
+        if reader is not None:
+            try:
+                reader.close()
+            except Exception:
+                pass
+
+    def _scheduler_loop(self):
+        """채널별 주기에 맞춰 읽기 작업 제출 (백그라운드 스레드)"""
+        while self.running:
+            now = time.time()
+            for channel in self.channels:
+                if channel.future is not None:
+                    if channel.future.done():
+                        self._collect(channel, now)
+                    elif now - channel.submitted_at > channel.timeout:
+                        # 응답 없는 채널은 끝날 때까지 새 작업을 제출하지 않음 (다른 채널은 계속 진행)
+                        if channel.health != 'failed':
+                            logger.warning(f"온도 채널 '{channel.name}' 읽기 타임아웃 ({channel.timeout}초)")
+                            channel.timeouts += 1
+                            with self.lock:
+                                channel.health = 'failed'
+                        continue
+
+                if channel.future is None and now >= channel.next_due:
+                    channel.next_due = now + channel.interval
+                    channel.submitted_at = now
+                    channel.future = self.executor.submit(self._read_channel, channel)
+
+            time.sleep(0.01)
+
+    def get_temperature_status(self, temperature):
+        """온도값에 따른 상태 판단"""
+        return classify_temperature(temperature, self.temp_ranges)
+
+    def read(self):
+        """대표 채널의 새 원시 온도 (새 값이 없으면 None)"""
+        with self.lock:
+            channel = self.primary
+            if channel.last_read_time is None or channel.last_read_time == self._last_primary_read_time:
+                return None
+            self._last_primary_read_time = channel.last_read_time
+            return channel.last_raw
+
+    def get_readings(self):
+        """전체 채널 최신 값 -> {채널명: {'temperature', 'raw', 'status', 'health', 'age'}}"""
+        now = time.time()
+        readings = {}
+        with self.lock:
+            for channel in self.channels:
+                temperature = channel.last_value if channel.health != 'failed' else None
+                readings[channel.name] = {
+                    'temperature': temperature,
+                    'raw': channel.last_raw if channel.health != 'failed' else None,
+                    'status': self.get_temperature_status(temperature),
+                    'health': channel.health,
+                    'age': now - channel.last_read_time if channel.last_read_time else None
+                }
+        return readings
+
+    def pop_anomaly_events(self):
+        """채널별로 모인 이상 패턴 이벤트를 꺼냄 (GPSTracker가 DB에 저장)"""
+        events = []
+        with self.lock:
+            for channel in self.channels:
+                events.extend(channel.anomaly_events)
+                channel.anomaly_events = []
+        return events
+
+    def get_status(self):
+        """채널별 상태/지연 통계"""
+        with self.lock:
+            return {
+                channel.name: {
+                    'sensor_type': channel.sensor_type,
+                    'health': channel.health,
+                    'consecutive_failures': channel.consecutive_failures,
+                    'timeouts': channel.timeouts,
+                    'last_latency': channel.last_latency,
+                    'filter_outliers': channel.filter.outliers
+                }
+                for channel in self.channels
+            }
+
+    def close(self):
+        """스케줄러 중지 및 모든 센서 종료"""
+        self.running = False
+        if self.scheduler_thread:
+            self.scheduler_thread.join(timeout=2)
+        self.executor.shutdown(wait=False)
+        for channel in self.channels:
+            self._drop_reader(channel)
+        logger.info("온도 채널 관리자 종료")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+온도 센서 읽기 감시 (프로세스 격리)
+I2C/1-Wire 버스가 멈추면 Adafruit/busio 호출이 영원히 블로킹될 수 있으므로
+센서 드라이버를 별도 프로세스에서 실행하고 읽기마다 제한 시간을 둠
+제한 시간을 넘긴 작업 프로세스는 강제 종료 후 다시 시작
+"""
+
+import logging
+import multiprocessing
+import time
+from config import TEMP_READ_TIMEOUT, TEMP_WORKER_START_TIMEOUT, SENSOR_RECONNECT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def _sensor_worker(sensor_type, conn):
+    """작업 프로세스: 센서를 연결하고 'read' 요청마다 온도를 돌려줌"""
+    try:
+        from sensor_manager import create_temperature_reader
+        reader = create_temperature_reader(sensor_type)
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+
+    conn.send(('ready', None))
+    try:
+        while True:
+            request = conn.recv()
+            if request == 'close':
+                break
+            try:
+                conn.send(('value', reader.read()))
+            except Exception as e:
+                conn.send(('error', str(e)))
+    except (EOFError, OSError):
+        pass  # 부모 프로세스 종료
+    finally:
+        try:
+            reader.close()
+        except Exception:
+            pass
+
+
+class IsolatedSensorReader:
+    """센서 드라이버를 작업 프로세스에서 실행하는 온도 리더
+
+    TemperatureReader와 같은 read()/close() 인터페이스를 제공합니다.
+    읽기가 timeout 안에 끝나지 않으면 작업 프로세스를 종료하고 None을 반환하며,
+    다음 read()에서 새 작업 프로세스를 시작합니다.
+    """
+
+    def __init__(self, sensor_type, timeout=None, start_timeout=TEMP_WORKER_START_TIMEOUT):
+        self.sensor_type = sensor_type
+        self.timeout = timeout if timeout is not None else TEMP_READ_TIMEOUT
+        self.start_timeout = start_timeout
+
+        # 스레드가 돌고 있는 부모에서 fork하지 않도록 spawn 사용
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.started_at = None
+        self.last_failure = None
+
+        self.stats = {
+            'reads': 0,
+            'timeouts': 0,
+            'errors': 0,
+            'restarts': 0
+        }
+
+        # 최초 시작은 연결 결과를 기다려 실패 시 호출자가 대체 수단을 쓸 수 있게 함
+        self._start_worker()
+        if not self._wait_ready(self.start_timeout):
+            self.close()
+            raise RuntimeError(f"{sensor_type} 센서 작업 프로세스 시작 실패")
+
+    def _start_worker(self):
+        """작업 프로세스 시작"""
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_sensor_worker, args=(self.sensor_type, child_conn),
+            name=f"sensor-{self.sensor_type}", daemon=True)
+        self.process.start()
+        child_conn.close()
+
+        self.conn = parent_conn
+        self.ready = False
+        self.started_at = time.time()
+        logger.info(f"{self.sensor_type} 센서 작업 프로세스 시작 (pid {self.process.pid})")
+
+    def _wait_ready(self, timeout):
+        """작업 프로세스의 센서 연결 완료 확인 (timeout=0이면 대기 없이 확인)"""
+        try:
+            if not self.conn.poll(timeout):
+                return False
+            kind, message = self.conn.recv()
+        except (EOFError, OSError):
+            kind, message = 'error', "작업 프로세스 종료"
+
+        if kind == 'ready':
+            self.ready = True
+            return True
+
+        logger.error(f"{self.sensor_type} 센서 연결 실패 (작업 프로세스): {message}")
+        self._stop_worker()
+        self.last_failure = time.time()
+        return False
+
+    def _stop_worker(self):
+        """작업 프로세스 강제 종료"""
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1)
+                if self.process.is_alive():
+                    self.process.kill()
+                    self.process.join(timeout=1)
+            self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.ready = False
+
+    def read(self):
+        """온도 읽기 (제한 시간 초과 시 작업 프로세스 재시작 후 None)"""
+        if self.process is None:
+            # 연결 실패 직후에는 잠시 쉬었다가 재시작
+            if self.last_failure and time.time() - self.last_failure < SENSOR_RECONNECT_INTERVAL:
+                return None
+            self.stats['restarts'] += 1
+            self._start_worker()
+
+        if not self.ready:
+            if self._wait_ready(0):
+                pass
+            elif self.process is not None and time.time() - self.started_at > self.start_timeout:
+                logger.error(f"{self.sensor_type} 센서 작업 프로세스 시작 시간 초과, 재시작합니다")
+                self._stop_worker()
+                self.last_failure = time.time()
+                return None
+            else:
+                return None
+
+        try:
+            self.conn.send('read')
+            if not self.conn.poll(self.timeout):
+                self.stats['timeouts'] += 1
+                logger.error(f"{self.sensor_type} 센서 읽기 시간 초과 ({self.timeout}초), 작업 프로세스를 재시작합니다")
+                self._stop_worker()
+                return None
+            kind, value = self.conn.recv()
+        except (EOFError, OSError) as e:
+            logger.error(f"{self.sensor_type} 센서 작업 프로세스 통신 오류: {e}")
+            self.stats['errors'] += 1
+            self._stop_worker()
+            return None
+
+        if kind != 'value':
+            self.stats['errors'] += 1
+            logger.warning(f"{self.sensor_type} 센서 읽기 오류: {value}")
+            return None
+
+        self.stats['reads'] += 1
+        return value
+
+    def get_stats(self):
+        """읽기/타임아웃/재시작 통계"""
+        return {
+            **self.stats,
+            'alive': self.process is not None and self.process.is_alive(),
+            'ready': self.ready
+        }
+
+    def close(self):
+        """작업 프로세스 종료"""
+        if self.conn is not None and self.ready:
+            try:
+                self.conn.send('close')
+                self.process.join(timeout=1)
+            except (OSError, AttributeError):
+                pass
+        self._stop_worker()
+        logger.info(f"{self.sensor_type} 센서 작업 프로세스 종료")
@@ -5,26 +5,265 @@ MQTT 브로커로만 전송 (불필요한 MySQL/API 경로 제거)
 """
 
 import json
+import math
+import os
 import time
 import logging
 import threading
+from collections import deque
 from datetime import datetime, timedelta
 from config import (
     VEHICLE_ID,
     SEND_INTERVAL,
     BATCH_SIZE,
+    LIVE_WINDOW_SECONDS,
+    LIVE_PUBLISH_INTERVAL,
+    LANE_LATENCY_TARGETS,
+    BANDWIDTH_BUDGET_BYTES,
+    BANDWIDTH_BUDGET_PERIOD,
+    BANDWIDTH_MESSAGE_OVERHEAD,
+    BANDWIDTH_USAGE_FILE,
+    BANDWIDTH_RATE_WINDOW,
+    BANDWIDTH_MIN_DWELL,
+    BANDWIDTH_PROFILES,
+    BACKLOG_BATCH_SIZE,
+    BACKLOG_DRAIN_RATE,
+    BACKLOG_REPORT_INTERVAL,
     MQTT_BROKER_HOST,
     MQTT_BROKER_PORT,
     MQTT_TOPIC,
     MQTT_CLIENT_ID,
     MQTT_QOS,
     MQTT_RETAIN,
+    MQTT_INFLIGHT_WINDOW,
+    MQTT_ACK_TIMEOUT,
+    MQTT_PAYLOAD_CODEC,
+    MQTT_PAYLOAD_COMPRESSION,
+    MQTT_EXCURSION_TOPIC,
+    MQTT_ANOMALY_TOPIC,
+    MQTT_ALARM_TOPIC,
+    MQTT_ALARM_QOS,
+    MQTT_STABILITY_TOPIC,
+    MQTT_CONTROL_TOPIC,
+    BACKFILL_MAX_ROWS,
+    STABILITY_PUBLISH_INTERVAL,
+    SHIPMENT_ID,
     TEMP_RANGES,
 )
+from excursion_engine import classify_temperature
+from gap_detector import id_ranges, subtract_ranges
+from mqtt_connection import MQTTConnectionManager
+from mqtt_spool import MessageSpool
+from payload_codec import encode_payload
+from telemetry_sinks import AckCursor, SinkFanout, build_sinks
 
 logger = logging.getLogger(__name__)
 
 
+class LaneMetrics:
+    """전송 레인(alarm/live/backlog)별 대기 건수, 발행 수, 지연 (발생 시각부터 PUBACK까지)"""
+
+    def __init__(self, name, target=None, window=500):
+        self.name = name
+        self.target = target
+        self.latencies = deque(maxlen=window)
+        self.queued = 0
+        self.messages = 0
+        self.items = 0
+        self.acked = 0
+        self.late = 0
+
+    def published(self, items):
+        self.messages += 1
+        self.items += items
+
+    def delivered(self, items, latency):
+        self.acked += items
+        self.latencies.append(latency)
+        if self.target is not None and latency > self.target:
+            self.late += 1
+
+    def get_stats(self):
+        ordered = sorted(self.latencies)
+
+        def percentile(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+        return {
+            'queued': self.queued,
+            'messages': self.messages,
+            'items': self.items,
+            'acked': self.acked,
+            'latency_p50': percentile(0.5),
+            'latency_p95': percentile(0.95),
+            'latency_max': ordered[-1] if ordered else None,
+            'target': self.target,
+            'late': self.late
+        }
+
+
+class BandwidthBudget:
+    """데이터 요금제 바이트 예산에 맞춰 전송 프로필을 고르는 스케줄러
+
+    발행한 바이트(메시지당 오버헤드 포함)를 기간(일/월)별로 누적하고, 최근 사용 속도로 기간 말 사용량을 예측합니다.
+    예측이 예산을 넘으면 더 절약하는 프로필(BANDWIDTH_PROFILES)로 한 단계 올리고,
+    한 단계 아래에서 측정했던 속도로도 예산의 90% 안에 들어오면 내립니다 (최소 min_dwell초 간격).
+    알람 레인은 프로필과 관계없이 전송되며 사용량에만 포함됩니다.
+    """
+
+    BUCKET_SECONDS = 10.0
+
+    def __init__(self, budget_bytes=BANDWIDTH_BUDGET_BYTES, period=BANDWIDTH_BUDGET_PERIOD,
+                 profiles=BANDWIDTH_PROFILES, overhead=BANDWIDTH_MESSAGE_OVERHEAD, usage_file=BANDWIDTH_USAGE_FILE,
+                 rate_window=BANDWIDTH_RATE_WINDOW, min_dwell=BANDWIDTH_MIN_DWELL, now=None):
+        if period not in ('day', 'month'):
+            raise ValueError(f"지원하지 않는 예산 기간: {period} ('day' 또는 'month')")
+        now = now or time.time()
+        self.budget_bytes = budget_bytes
+        self.period = period
+        self.profiles = profiles
+        self.overhead = overhead
+        self.usage_file = usage_file
+        self.rate_window = rate_window
+        self.min_dwell = min_dwell
+
+        self.period_start, self.period_end = self._period_bounds(now)
+        self.used = 0
+        self.lane_bytes = {}
+        self.last_saved = now
+
+        # 사용 속도 (바이트/초): BUCKET_SECONDS마다 측정해 지수 평균 (프로필 변경 후에는 새로 측정)
+        self.rate = None
+        self.rate_samples = 0
+        self.bucket_start = now
+        self.bucket_bytes = 0
+
+        self.level = 0
+        self.level_rates = {}       # 단계별로 측정한 사용 속도 (한 단계 내릴 수 있는지 판단)
+        self.level_changed_at = now
+        self._load()
+
+    def _period_bounds(self, now):
+        current = datetime.fromtimestamp(now)
+        if self.period == 'day':
+            start = current.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = start + timedelta(days=1)
+        else:
+            start = current.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            end = (start + timedelta(days=32)).replace(day=1)
+        return start.timestamp(), end.timestamp()
+
+    def _load(self):
+        """같은 기간에 저장된 사용량이 있으면 이어서 집계"""
+        if not self.usage_file or not os.path.exists(self.usage_file):
+            return
+        try:
+            with open(self.usage_file) as f:
+                saved = json.load(f)
+            if saved.get('period_start') == self.period_start:
+                self.used = saved.get('used', 0)
+                self.lane_bytes = saved.get('lane_bytes', {})
+                logger.info(f"대역폭 사용량 이어서 집계: {self.used / 1e6:.1f}MB")
+        except (OSError, ValueError) as e:
+            logger.warning(f"대역폭 사용량 파일 읽기 실패: {e}")
+
+    def save(self):
+        if not self.usage_file:
+            return
+        try:
+            temp_path = self.usage_file + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump({'period_start': self.period_start, 'used': self.used, 'lane_bytes': self.lane_bytes}, f)
+            os.replace(temp_path, self.usage_file)
+        except OSError as e:
+            logger.warning(f"대역폭 사용량 저장 실패: {e}")
+
+    @property
+    def profile(self):
+        return self.profiles[self.level]
+
+    def record(self, payload_bytes, lane=None):
+        """발행한 메시지 하나의 바이트 반영"""
+        size = payload_bytes + self.overhead
+        self.used += size
+        self.bucket_bytes += size
+        if lane:
+            self.lane_bytes[lane] = self.lane_bytes.get(lane, 0) + size
+
+    def update(self, now=None):
+        """사용 속도 갱신과 프로필 조정 (전송 주기마다 호출)"""
+        now = now or time.time()
+        if now >= self.period_end:
+            logger.info(f"대역폭 예산 새 기간 시작 (지난 기간 사용량 {self.used / 1e6:.1f}MB)")
+            self.period_start, self.period_end = self._period_bounds(now)
+            self.used = 0
+            self.lane_bytes = {}
+            self._set_level(0, now)
+
+        elapsed = now - self.bucket_start
+        if elapsed >= self.BUCKET_SECONDS:
+            self.rate_samples += 1
+            rate = self.bucket_bytes / elapsed
+            alpha = max(elapsed / self.rate_window, 1.0 / self.rate_samples)
+            self.rate = rate if self.rate is None else self.rate + min(1.0, alpha) * (rate - self.rate)
+            self.bucket_start = now
+            self.bucket_bytes = 0
+            self._adjust(now)
+
+        if now - self.last_saved >= 60:
+            self.save()
+            self.last_saved = now
+
+    def projected(self, now=None, rate=None):
+        """현재(또는 주어진) 속도가 기간 끝까지 이어질 때 예상 사용량"""
+        now = now or time.time()
+        rate = self.rate if rate is None else rate
+        return self.used + (rate or 0.0) * max(0.0, self.period_end - now)
+
+    def _adjust(self, now):
+        if not self.budget_bytes or now - self.level_changed_at < self.min_dwell:
+            return
+        top = len(self.profiles) - 1
+        if self.used >= self.budget_bytes and self.level < top:
+            self._set_level(top, now)
+        elif self.projected(now) > self.budget_bytes and self.level < top:
+            self._set_level(self.level + 1, now)
+        elif self.level > 0:
+            lower_rate = self.level_rates.get(self.level - 1)
+            if lower_rate is not None and self.projected(now, lower_rate) <= self.budget_bytes * 0.9:
+                self._set_level(self.level - 1, now)
+
+    def _set_level(self, level, now):
+        if level == self.level:
+            return
+        if self.rate is not None:
+            self.level_rates[self.level] = self.rate
+        logger.warning(f"대역폭 예산 전송 프로필 {self.level} -> {level} "
+                       f"(사용 {self.used / 1e6:.1f}MB, 예상 {self.projected(now) / 1e6:.1f}MB"
+                       f"{f' / 예산 {self.budget_bytes / 1e6:.1f}MB' if self.budget_bytes else ''})")
+        self.level = level
+        self.level_changed_at = now
+        self.rate = None
+        self.rate_samples = 0
+
+    def get_stats(self, now=None):
+        now = now or time.time()
+        projected = self.projected(now)
+        return {
+            'budget': self.budget_bytes,
+            'period': self.period,
+            'period_start': self.period_start,
+            'period_end': self.period_end,
+            'used': self.used,
+            'lane_bytes': dict(self.lane_bytes),
+            'rate_bps': self.rate,
+            'projected': projected,
+            'projected_ratio': projected / self.budget_bytes if self.budget_bytes else None,
+            'level': self.level,
+            'profile': self.profile
+        }
+
+
 class ServerSender:
     """서버로 데이터를 전송하는 클래스"""
 
@@ -33,6 +272,13 @@ class ServerSender:
         self.vehicle_id = VEHICLE_ID
         self.send_interval = SEND_INTERVAL
         self.batch_size = BATCH_SIZE
+        self.backlog_batch_size = BACKLOG_BATCH_SIZE
+        self.backlog_drain_rate = BACKLOG_DRAIN_RATE
+
+        # 백로그 전송량 제한 (토큰 버킷, 샘플 단위)과 백로그 현황
+        self.backlog_tokens = 0.0
+        self.last_drain_time = None
+        self.backlog = {'count': 0, 'oldest': None, 'updated_at': None}
 
         # MQTT 설정 (config.py에서 가져옴)
         self.mqtt_broker_host = MQTT_BROKER_HOST
@@ -41,9 +287,52 @@ class ServerSender:
         self.mqtt_client_id = MQTT_CLIENT_ID
         self.mqtt_qos = MQTT_QOS
         self.mqtt_retain = MQTT_RETAIN
-
-        self.mqtt_client = None
-        self._mqtt_connected_event = threading.Event()
+        self.payload_codec = MQTT_PAYLOAD_CODEC
+        self.payload_compression = MQTT_PAYLOAD_COMPRESSION
+        self.mqtt_excursion_topic = MQTT_EXCURSION_TOPIC
+        self.mqtt_anomaly_topic = MQTT_ANOMALY_TOPIC
+        self.mqtt_alarm_topic = MQTT_ALARM_TOPIC
+        self.mqtt_alarm_qos = MQTT_ALARM_QOS
+        self.mqtt_stability_topic = MQTT_STABILITY_TOPIC
+        self.last_stability_publish = None
+
+        # 연결/재연결은 MQTTConnectionManager 스레드가 처리 (지속 세션, 백오프, 오프라인 큐)
+        self.connection = None
+
+        # PUBACK 대기 중인 메시지 {mid: {'kind', 'ids', 'published_at', 'lane', 'created'}}
+        # kind: 'samples'(gps_temperature_data), 'excursion', 'anomaly', 'alarm' -> 해당 테이블 id를 PUBACK 후 전송 완료 표시
+        self.inflight_window = MQTT_INFLIGHT_WINDOW
+        self.inflight = {}
+        self.inflight_ids = {'samples': set(), 'excursion': set(), 'anomaly': set(), 'alarm': set(), 'backfill': set()}
+        self.inflight_lock = threading.Lock()
+        self.early_acks = {}        # 등록 전에 도착한 PUBACK {mid: 수신 시각}
+        self.acked = deque()        # on_publish에서 확인된 메시지 (전송 스레드가 DB에 반영)
+
+        # 발행이 실패한 메시지는 디스크 스풀에 보관했다가 연결이 회복되면 다시 발행
+        self.spool = MessageSpool()
+
+        # 전송 완료 위치: PUBACK 받은 샘플은 행마다 표시하지 않고 id 범위로 기록 (미전송 조회는 id > acked_id)
+        self.ack_cursor = AckCursor(db_path)
+
+        # 샘플 순번: 같은 epoch(DB 순번 공간) 안에서 샘플 id가 차량별 순번, 메시지마다 payload['seq']로 전달
+        # 서버가 누락 구간을 제어 토픽으로 요청하면 backfill_requests에 넣고 전송 스레드가 묶음으로 응답
+        self.sequence_epoch = None
+        self.backfill_requests = deque()
+
+        # 추가 전송 대상 (config.SINKS: 파일 보관, 다른 브로커, HTTP), 싱크별 전송 완료 위치와 큐로 따로 전송
+        self.fanout = None
+
+        # 이미 발행한 샘플 id 상한 (다음 조회는 이보다 큰 id만, 재전송 시 0으로 되돌림 -> 전송 완료 위치부터 다시)
+        self.live_cursor = 0
+        self.backlog_cursor = 0
+
+        # 전송 레인: alarm(매 주기 즉시, PUBACK 대기 한도 무시), live(LIVE_PUBLISH_INTERVAL마다 묶음),
+        # backlog(BACKLOG_DRAIN_RATE로 제한)
+        self.lanes = {name: LaneMetrics(name, target) for name, target in LANE_LATENCY_TARGETS.items()}
+        self.last_live_publish = None
+
+        # 데이터 요금제 예산: 사용량 집계와 전송 프로필(묶음 간격, 압축, 다운샘플링) 선택
+        self.budget = BandwidthBudget()
 
         self.running = False
         self.last_send_time = None
@@ -52,6 +341,11 @@ class ServerSender:
         # 전송 통계
         self.stats = {
             'total_sent': 0,
+            'live_sent': 0,
+            'backlog_sent': 0,
+            'downsampled': 0,
+            'backfilled': 0,
+            'requeued': 0,
             'send_failures': 0,
             'last_success': None
         }
@@ -66,6 +360,14 @@ class ServerSender:
             return
 
         self.running = True
+        self.ack_cursor.load()
+        self._load_sequence_epoch()
+        self._init_mqtt_client()
+
+        sinks = build_sinks(self.db_path)
+        if sinks:
+            self.fanout = SinkFanout(self.db_path, sinks, self._format_rows)
+            self.fanout.start()
 
         self.send_thread = threading.Thread(target=self._send_loop, daemon=True)
         self.send_thread.start()
@@ -80,6 +382,14 @@ class ServerSender:
 
         if self.send_thread:
             self.send_thread.join(timeout=5)
+        if self.connection:
+            self.connection.stop()
+        if self.fanout:
+            self.fanout.stop()
+        # 종료 직전에 받은 PUBACK까지 반영
+        self._process_acks()
+        self.ack_cursor.flush(force=True)
+        self.budget.save()
         logger.info("서버 전송 중지")
 
 
@@ -107,130 +417,638 @@ class ServerSender:
                 time.sleep(1)  # 오류 발생 시 짧게 대기 후 재시도
 
     def _send_batch(self):
-        """배치 데이터 전송"""
+        """배치 데이터 전송
+
+        알람: 상태 전환/센서 끊김/지오펜스 알람은 매 주기 알람 토픽으로 가장 먼저 전송
+        실시간: LIVE_WINDOW_SECONDS 안의 최신 샘플은 LIVE_PUBLISH_INTERVAL마다 묶어서 전송
+        백로그: 그 이전의 미전송 샘플은 오래된 순으로 BACKLOG_DRAIN_RATE 속도까지 큰 묶음으로 전송
+        """
         try:
-            # 전송할 데이터 조회
-            data_to_send = self._get_unsent_data()
-            if not data_to_send:
-                logger.debug("전송할 새 데이터가 없습니다")
+            # 예산 사용 속도 갱신 (필요하면 전송 프로필 변경)
+            self.budget.update()
+            profile = self.budget.profile
+
+            # PUBACK 받은 메시지 전송 완료 표시, 응답 없음이면 재전송 준비
+            self._process_acks()
+            self._send_alarm_events()
+            self._replay_spool()
+
+            # 온도 이탈/이상 패턴 이벤트는 샘플과 별도 토픽으로 먼저 전송
+            self._send_excursion_events()
+            self._send_anomaly_events()
+            if (self.last_stability_publish is None or
+                    time.time() - self.last_stability_publish >= STABILITY_PUBLISH_INTERVAL):
+                self._send_stability_state()
+
+            # 전송 완료 위치를 모르면 처음부터 다시 보내게 되므로 샘플 전송은 복원 후에
+            if not self.ack_cursor.loaded and not self.ack_cursor.load():
+                return
+            if self.sequence_epoch is None and not self._load_sequence_epoch():
                 return
 
-            logger.info(f"{len(data_to_send)}개의 데이터를 서버로 전송합니다 (MQTT)")
+            now = time.time()
+            # 묶음 간격이 길어지면 그 사이 샘플이 백로그로 넘어가지 않도록 실시간 구간과 묶음 크기도 늘림
+            live_interval = profile['live_interval']
+            live_since = now - max(LIVE_WINDOW_SECONDS, 2 * live_interval)
+            live_limit = math.ceil(self.batch_size * max(1.0, live_interval / LIVE_PUBLISH_INTERVAL))
 
-            # 서버로 전송 (MQTT 전용)
-            success = self._send_to_mqtt(data_to_send)
+            # 실시간 샘플 (최신 live_limit개, 전송은 시간 순으로)
+            if self.last_live_publish is None or now - self.last_live_publish >= live_interval:
+                self._send_live(live_since, live_limit)
 
-            if success:
-                # 성공 시 전송 완료 표시
-                self._mark_data_as_sent([item['id'] for item in data_to_send])
-                self.stats['total_sent'] += len(data_to_send)
-                self.stats['last_success'] = datetime.now()
-                logger.info(f"✅ {len(data_to_send)}개 데이터 전송 성공")
-            else:
-                self.stats['send_failures'] += 1
-                logger.error("❌ 데이터 전송 실패")
+            # 서버 누락 구간 요청 응답 (실시간 다음, 백로그보다 먼저)
+            self._answer_backfill()
+            self._drain_backlog(now, live_since)
 
         except Exception as e:
             logger.error(f"배치 전송 오류: {e}")
             self.stats['send_failures'] += 1
 
-    def _init_mqtt_client(self):
-        """MQTT 클라이언트 초기화"""
+    def _send_live(self, live_since, limit):
+        """실시간 레인: 최근 샘플을 한 묶음으로 발행"""
+        live_data = self._get_unsent_data(limit=limit, since=live_since,
+                                          after_id=self.ack_cursor.next_after(self.live_cursor))
+        self.lanes['live'].queued = len(live_data)
+        if not live_data:
+            return
+        live_data.reverse()
+        cursor = live_data[-1]['id']
+        live_data = self._exclude_inflight(live_data)
+        if not live_data or self._send_rows(live_data, 'live'):
+            self.live_cursor = cursor
+            self.last_live_publish = time.time()
+            self.stats['live_sent'] += len(live_data)
+
+    def _drain_backlog(self, now, live_since):
+        """밀린 샘플을 오래된 순으로 전송 (토큰 버킷으로 따라잡기 속도 제한)"""
+        if self.last_drain_time is not None:
+            self.backlog_tokens = min(self.backlog_tokens + (now - self.last_drain_time) * self._drain_rate(),
+                                      float(self.backlog_batch_size))
+        self.last_drain_time = now
+
+        if self.backlog['updated_at'] is None or now - self.backlog['updated_at'] >= BACKLOG_REPORT_INTERVAL:
+            self._update_backlog(now, live_since)
+        self.lanes['backlog'].queued = self.backlog['count']
+        # 예산 프로필에 따라 토큰이 min_batch만큼 모일 때까지 기다렸다가 큰 묶음으로 전송 (압축 효율, 메시지 오버헤드)
+        min_batch = min(self.budget.profile['min_batch'], self.backlog_batch_size, self.backlog['count'])
+        if not self.backlog['count'] or self.backlog_tokens < max(1, min_batch):
+            return
+
+        backlog_data = self._get_unsent_data(limit=int(self.backlog_tokens), before=live_since, oldest_first=True,
+                                             after_id=self.ack_cursor.next_after(self.backlog_cursor))
+        if not backlog_data:
+            # 커서 뒤에 남은 행이 없으면 다음에는 전송 완료 위치부터 다시 확인 (스풀에서 버린 묶음 등)
+            self.backlog['count'] = 0
+            self.backlog_cursor = 0
+            return
+
+        # 실시간으로 보낸 뒤 PUBACK을 기다리는 샘플은 백로그로 다시 보내지 않음
+        cursor = backlog_data[-1]['id']
+        backlog_data = self._exclude_inflight(backlog_data)
+        self.backlog_tokens -= len(backlog_data)
+        if not backlog_data or self._send_rows(backlog_data, 'backlog'):
+            self.backlog_cursor = cursor
+            self.stats['backlog_sent'] += len(backlog_data)
+            self.backlog['count'] = max(0, self.backlog['count'] - len(backlog_data))
+            if not self.backlog['count']:
+                logger.info("백로그 전송 완료")
+
+    def _load_sequence_epoch(self):
+        """DB의 샘플 순번 epoch 조회 -> 성공하면 True"""
         try:
-            import paho.mqtt.client as mqtt
+            from database import GPSDatabase
 
-            self.mqtt_client = mqtt.Client(client_id=self.mqtt_client_id, clean_session=True)
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                self.sequence_epoch = db.get_sequence_epoch()
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"샘플 순번 epoch 조회 오류: {e}")
+            return False
+        return True
 
-            def on_connect(client, userdata, flags, rc):
-                if rc == 0:
-                    logger.info(f"✅ MQTT 브로커 연결 성공: {self.mqtt_broker_host}:{self.mqtt_broker_port}")
-                    self._mqtt_connected_event.set()
+    def _on_control(self, topic, payload):
+        """제어 토픽 수신 (연결 관리 스레드, 처리는 전송 스레드에서)"""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"제어 메시지 형식 오류 ({topic})")
+            return
+        if message.get('type') == 'backfill':
+            self.backfill_requests.append(message)
+            logger.info(f"서버 재전송 요청 {message.get('request_id')}: {len(message.get('ranges') or [])}개 구간")
+        else:
+            logger.warning(f"알 수 없는 제어 메시지: {message.get('type')}")
+
+    def _answer_backfill(self):
+        """서버 재전송 요청에 로컬 DB에서 묶음으로 응답 (PUBACK 대기 한도 안에서, 남은 구간은 다음 주기)
+
+        DB에 없는 id(보관 기간 정리, 다른 epoch)는 unavailable로 알려 서버가 다시 요청하지 않도록 함
+        """
+        while self.backfill_requests and self._can_publish():
+            request = self.backfill_requests[0]
+            if 'pending' not in request:
+                ranges, total = [], 0
+                for start, end in sorted(request.get('ranges') or []):
+                    end = min(end, start + BACKFILL_MAX_ROWS - total - 1)
+                    if end < start:
+                        break
+                    ranges.append([start, end])
+                    total += end - start + 1
+                request['pending'] = ranges
+                if request.get('epoch') != self.sequence_epoch:
+                    # 이전 DB의 순번 공간이면 응답할 데이터가 없음 (요청한 epoch로 전부 unavailable 응답)
+                    if not self._send_backfill(request, [], [], ranges, epoch=request.get('epoch')):
+                        return
+                    request['pending'] = []
+
+            if request['pending']:
+                start, end = request['pending'][0]
+                data = self._get_rows_by_id(start, end, self.backlog_batch_size)
+                last = data[-1]['id'] if len(data) == self.backlog_batch_size else end
+                covered = id_ranges(item['id'] for item in data)
+                if not self._send_backfill(request, data, covered, subtract_ranges([[start, last]], covered)):
+                    return
+                if last >= end:
+                    request['pending'].pop(0)
                 else:
-                    logger.error(f"❌ MQTT 브로커 연결 실패: {rc}")
+                    request['pending'][0] = [last + 1, end]
+
+            if not request['pending']:
+                self.backfill_requests.popleft()
+                logger.info(f"서버 재전송 요청 {request.get('request_id')} 응답 완료")
+
+    def _send_backfill(self, request, data, covered, unavailable, epoch=None):
+        """재전송 응답 1개 발행 -> 성공하면 True
+
+        epoch가 현재 DB와 다르면 그 epoch로 응답하고 acked는 보내지 않음 (서버가 현재 순번 공간과 섞지 않도록)
+        """
+        if epoch is None:
+            epoch = self.sequence_epoch
+        acked = self.ack_cursor.acked_id if epoch == self.sequence_epoch else 0
+        seq = {'epoch': epoch, 'acked': acked, 'covered': covered,
+               'unavailable': unavailable, 'backfill': request.get('request_id')}
+        result = self._publish(self.mqtt_topic, self._encode_samples(data, seq), self.mqtt_qos, lane='backfill',
+                               queue=False)
+        if result is None or result.rc != 0:
+            return False
+        self._track(result.mid, 'backfill', [])
+        self.stats['backfilled'] += len(data)
+        return True
+
+    def _update_backlog(self, now, live_since):
+        """백로그 크기와 가장 오래된 샘플 시각 갱신"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                count, oldest = db.get_unsent_backlog(live_since, after_id=self.ack_cursor.acked_id)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"백로그 조회 오류: {e}")
+            return
+
+        # 전송 완료 위치 위에서 먼저 완료된 샘플(대부분 실시간 레인)은 제외
+        count = max(0, count - self.ack_cursor.pending())
 
-            def on_disconnect(client, userdata, rc):
-                if rc != 0:
-                    logger.warning(f"MQTT 브로커 연결 끊김: {rc}")
-                self._mqtt_connected_event.clear()
+        self.backlog = {'count': count, 'oldest': oldest, 'updated_at': now}
+        if count:
+            logger.info(f"전송 백로그 {count}개 (가장 오래된 샘플 {now - oldest:.0f}초 전), "
+                        f"예상 소요 {self._backlog_eta():.0f}초")
 
-            self.mqtt_client.on_connect = on_connect
-            self.mqtt_client.on_disconnect = on_disconnect
+    def _drain_rate(self):
+        """백로그 따라잡기 속도 (샘플/초, 대역폭 예산 프로필 반영)"""
+        return self.backlog_drain_rate * self.budget.profile['drain_scale']
 
-            # 동기 연결로 전환 (연결 보장)
-            self._mqtt_connected_event.clear()
-            self.mqtt_client.connect(self.mqtt_broker_host, self.mqtt_broker_port, 60)
-            self.mqtt_client.loop_start()
-            # on_connect 신호 대기
-            self._mqtt_connected_event.wait(timeout=5)
+    def _backlog_eta(self):
+        """백로그를 모두 보내는 데 걸릴 예상 시간 (초)"""
+        rate = self._drain_rate()
+        return self.backlog['count'] / rate if rate else None
 
+    def _send_rows(self, data, lane):
+        """샘플 묶음을 MQTT로 발행 (전송 완료 표시는 PUBACK을 받은 뒤 _process_acks에서)"""
+        logger.debug(f"{len(data)}개의 데이터를 서버로 전송합니다 (MQTT, {lane})")
+
+        # 예산 프로필의 다운샘플링: 보내지 않는 샘플도 이 메시지의 PUBACK과 함께 처리 완료로 표시
+        data, skipped = self._downsample(data, self.budget.profile['downsample'])
+
+        # 서버로 전송 (MQTT 전용)
+        success = self._send_to_mqtt(data, lane, skipped)
+        if success:
+            self.stats['downsampled'] += len(skipped)
+
+        if not success:
+            self.stats['send_failures'] += 1
+            logger.debug("데이터 발행 보류 (연결 없음 또는 PUBACK 대기 한도)")
+        return success
+
+    @staticmethod
+    def _downsample(data, factor):
+        """정상 상태 샘플은 id가 factor의 배수인 것만 남김 (이상 상태와 묶음의 마지막 샘플은 항상 전송)
+
+        Returns:
+            (보낼 샘플, 건너뛴 샘플 id)
+        """
+        if factor <= 1 or not data:
+            return data, []
+        kept, skipped = [], []
+        last_id = data[-1]['id']
+        for item in data:
+            if item['id'] % factor == 0 or item['status'] != 'normal' or item['id'] == last_id:
+                kept.append(item)
+            else:
+                skipped.append(item['id'])
+        return kept, skipped
+
+    def _publish(self, topic, payload, qos, lane=None, **kwargs):
+        """연결 관리자로 발행하고 대역폭 사용량에 반영 (오프라인 큐에 넣은 메시지 포함)"""
+        result = self.connection.publish(topic, payload, qos=qos, **kwargs)
+        if result is None and not kwargs.get('queue', True):
+            return None
+        if result is None or result.rc == 0:
+            self.budget.record(len(payload) + len(topic), lane)
+        return result
+
+    def _exclude_inflight(self, data, kind='samples'):
+        """PUBACK을 기다리는 중이거나 스풀에서 재전송을 기다리는 항목, 이미 전송 완료된 샘플 제외"""
+        if kind == 'samples':
+            data = [item for item in data if not self.ack_cursor.is_acked(item['id'])]
+        spooled = self.spool.pending_ids.get(kind, ())
+        with self.inflight_lock:
+            pending = self.inflight_ids[kind]
+            return [item for item in data if item['id'] not in pending and item['id'] not in spooled]
+
+    def _can_publish(self, priority=False):
+        """연결되어 있고 PUBACK 대기 메시지가 한도 미만인지 (priority면 한도와 관계없이 연결만 확인)"""
+        if self.connection is None:
+            self._init_mqtt_client()
+        if self.connection is None or not self.connection.is_connected():
+            return False
+        if priority:
+            return True
+        with self.inflight_lock:
+            return len(self.inflight) < self.inflight_window
+
+    def _track(self, mid, kind, ids, lane=None, created=None):
+        """발행한 메시지를 PUBACK 대기 목록에 등록 (created: 가장 오래된 항목의 발생 시각, 레인 지연 계산용)"""
+        entry = {'kind': kind, 'ids': ids, 'published_at': time.time(), 'lane': lane, 'created': created}
+        if lane in self.lanes:
+            self.lanes[lane].published(len(ids))
+        with self.inflight_lock:
+            acked_at = self.early_acks.pop(mid, None)
+            if acked_at is not None:
+                # publish() 반환 전에 on_publish가 먼저 불린 경우
+                entry['acked_at'] = acked_at
+                self.acked.append(entry)
+                return
+            self.inflight[mid] = entry
+            self.inflight_ids[kind].update(ids)
+
+    def _on_publish(self, mid):
+        """PUBACK 수신 (연결 관리 스레드, DB 작업은 전송 스레드에서)"""
+        with self.inflight_lock:
+            entry = self.inflight.pop(mid, None)
+            if entry is None:
+                self.early_acks[mid] = time.time()
+                return
+            self.inflight_ids[entry['kind']].difference_update(entry['ids'])
+            entry['acked_at'] = time.time()
+            self.acked.append(entry)
+
+    def _process_acks(self):
+        """PUBACK 받은 메시지의 행을 전송 완료로 표시하고, 응답 없는 메시지는 다시 보내도록 되돌림
+
+        샘플은 전송 완료 위치(AckCursor)에만 반영하고 DB 기록은 SEND_CURSOR_FLUSH_INTERVAL마다 한 번
+
+        재연결 시에는 같은 paho 클라이언트가 미완료 메시지를 다시 보내므로(지속 세션) 되돌리지 않음
+        """
+        now = time.time()
+        with self.inflight_lock:
+            acked = list(self.acked)
+            self.acked.clear()
+
+            expired = [mid for mid, entry in self.inflight.items() if now - entry['published_at'] > MQTT_ACK_TIMEOUT]
+            self.early_acks = {mid: at for mid, at in self.early_acks.items() if now - at <= MQTT_ACK_TIMEOUT}
+            requeue = bool(expired)
+            if requeue:
+                requeued = sum(len(entry['ids']) for entry in self.inflight.values())
+                self.inflight.clear()
+                for ids in self.inflight_ids.values():
+                    ids.clear()
+
+        if requeue:
+            # 아직 전송 완료 표시가 안 된 행은 DB에 그대로 있으므로 커서만 되돌리면 다시 조회됨
+            self.live_cursor = 0
+            self.backlog_cursor = 0
+            self.backlog['updated_at'] = None
+            self.stats['requeued'] += requeued
+            if requeued:
+                logger.warning(f"PUBACK을 받지 못한 {requeued}건 재전송 예정 (응답 시간 초과)")
+
+        if not acked:
+            self.ack_cursor.flush()
+            return
+
+        ids = {'samples': [], 'excursion': [], 'anomaly': [], 'alarm': [], 'backfill': []}
+        for entry in acked:
+            ids[entry['kind']].extend(entry['ids'])
+            if entry['lane'] in self.lanes and entry['created'] is not None:
+                self.lanes[entry['lane']].delivered(len(entry['ids']), entry['acked_at'] - entry['created'])
+
+        if ids['samples']:
+            self.ack_cursor.ack(ids['samples'])
+            self.ack_cursor.flush()
+            self.stats['total_sent'] += len(ids['samples'])
+            self.stats['last_success'] = datetime.now()
+            logger.debug(f"✅ {len(ids['samples'])}개 데이터 전송 확인 (PUBACK)")
+
+        if not (ids['excursion'] or ids['anomaly'] or ids['alarm']):
+            return
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                if ids['excursion']:
+                    db.mark_excursion_events_as_sent(ids['excursion'])
+                if ids['anomaly']:
+                    db.mark_anomaly_events_as_sent(ids['anomaly'])
+                if ids['alarm']:
+                    db.mark_alarm_events_as_sent(ids['alarm'])
+            finally:
+                db.close()
         except Exception as e:
-            logger.error(f"MQTT 클라이언트 초기화 실패: {e}")
-            self.mqtt_client = None
+            logger.error(f"전송 완료 표시 실패: {e}")
 
-    def _send_to_mqtt(self, data):
-        """MQTT 브로커로 데이터 전송"""
+    def _spool_failed(self, topic, payload, kind, ids, qos=None):
+        """발행 실패 메시지를 디스크 스풀에 보관 -> 보관했으면 True (행은 재전송 때까지 조회에서 제외)"""
         try:
-            if self.mqtt_client is None:
-                self._init_mqtt_client()
+            if self.spool.append(topic, payload, qos=self.mqtt_qos if qos is None else qos, kind=kind, ids=ids):
+                logger.warning(f"발행 실패 메시지를 스풀에 보관 ({kind} {len(ids)}건, 대기 {len(self.spool)}건)")
+                return True
+        except Exception as e:
+            logger.error(f"MQTT 스풀 저장 실패: {e}")
+        return False
+
+    def _replay_spool(self):
+        """연결이 회복되면 스풀에 보관한 메시지를 오래된 순서로 다시 발행 (PUBACK 대기 한도 안에서)"""
+        if not len(self.spool) or not self._can_publish():
+            return
+        with self.inflight_lock:
+            room = self.inflight_window - len(self.inflight)
 
-            # 연결 완료 대기 (최대 5초)
-            self._mqtt_connected_event.wait(timeout=5)
+        try:
+            replayed = 0
+            for record in self.spool.peek(room):
+                result = self._publish(record['topic'], record['payload'], record['qos'], lane='spool',
+                                       retain=record['retain'], queue=False)
+                if result is None or result.rc != 0:
+                    break
+                if record['ids']:
+                    self._track(result.mid, record['kind'], record['ids'])
+                replayed += 1
+            self.spool.advance(replayed)
+        except Exception as e:
+            logger.error(f"MQTT 스풀 재전송 오류: {e}")
+            return
 
-            if self.mqtt_client is None:
-                return False
+        if replayed:
+            logger.info(f"스풀 메시지 {replayed}건 재발행 (남은 {len(self.spool)}건)")
+
+    def _send_alarm_events(self):
+        """미전송 알람을 알람 토픽으로 즉시 전송 (샘플/백로그보다 먼저, PUBACK 대기 한도와 관계없이)"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                events = self._exclude_inflight(db.get_alarm_events(limit=50, unsent_only=True), 'alarm')
+                self.lanes['alarm'].queued = len(events)
+                if not events or not self._can_publish(priority=True):
+                    return
+
+                payload = {
+                    'vehicle_id': self.vehicle_id,
+                    'timestamp': datetime.now().isoformat(),
+                    'events': events
+                }
+                message = json.dumps(payload, default=str)
+                result = self._publish(self.mqtt_alarm_topic, message, self.mqtt_alarm_qos, lane='alarm', queue=False)
+                if result is None:
+                    return
+                ids = [event['id'] for event in events]
+                if result.rc == 0:
+                    self._track(result.mid, 'alarm', ids, lane='alarm', created=events[0]['timestamp'])
+                    logger.info(f"알람 {len(events)}개 발행 (PUBACK 대기)")
+                else:
+                    logger.error(f"알람 발행 실패: {result.rc}")
+                    self._spool_failed(self.mqtt_alarm_topic, message, 'alarm', ids, qos=self.mqtt_alarm_qos)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"알람 전송 오류: {e}")
+
+    def _send_excursion_events(self):
+        """미전송 온도 이탈 이벤트를 이벤트 토픽으로 전송"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                events = self._exclude_inflight(db.get_excursion_events(limit=50, unsent_only=True), 'excursion')
+                if not events or not self._can_publish():
+                    return
+
+                payload = {
+                    'vehicle_id': self.vehicle_id,
+                    'timestamp': datetime.now().isoformat(),
+                    'events': events
+                }
+                # 이벤트는 DB에 남아 있으므로 오프라인 큐에 넣지 않음 (재연결 후 다시 조회)
+                message = json.dumps(payload, default=str)
+                result = self._publish(self.mqtt_excursion_topic, message, self.mqtt_qos, lane='events', queue=False)
+                if result is None:
+                    return
+                if result.rc == 0:
+                    self._track(result.mid, 'excursion', [event['id'] for event in events])
+                    logger.info(f"온도 이탈 이벤트 {len(events)}개 발행 (PUBACK 대기)")
+                else:
+                    logger.error(f"온도 이탈 이벤트 발행 실패: {result.rc}")
+                    self._spool_failed(self.mqtt_excursion_topic, message, 'excursion', [event['id'] for event in events])
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"온도 이탈 이벤트 전송 오류: {e}")
+
+    def _send_anomaly_events(self):
+        """미전송 온도 이상 패턴 이벤트(문 열림, 압축기 정지 등)를 이벤트 토픽으로 전송"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                events = self._exclude_inflight(db.get_anomaly_events(limit=50, unsent_only=True), 'anomaly')
+                if not events or not self._can_publish():
+                    return
+
+                payload = {
+                    'vehicle_id': self.vehicle_id,
+                    'timestamp': datetime.now().isoformat(),
+                    'events': events
+                }
+                # 이벤트는 DB에 남아 있으므로 오프라인 큐에 넣지 않음 (재연결 후 다시 조회)
+                message = json.dumps(payload, default=str)
+                result = self._publish(self.mqtt_anomaly_topic, message, self.mqtt_qos, lane='events', queue=False)
+                if result is None:
+                    return
+                if result.rc == 0:
+                    self._track(result.mid, 'anomaly', [event['id'] for event in events])
+                    logger.info(f"온도 이상 이벤트 {len(events)}개 발행 (PUBACK 대기)")
+                else:
+                    logger.error(f"온도 이상 이벤트 발행 실패: {result.rc}")
+                    self._spool_failed(self.mqtt_anomaly_topic, message, 'anomaly', [event['id'] for event in events])
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"온도 이상 이벤트 전송 오류: {e}")
+
+    def _send_stability_state(self):
+        """운행/배송 MKT와 안정성 예산 상태 전송 (retain, 최신 상태만 의미 있음)"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                trip = db.get_stability_state('trip')
+                shipment = db.get_stability_state('shipment', SHIPMENT_ID)
+            finally:
+                db.close()
+            if not trip and not shipment:
+                return
+
+            if self.connection is None:
+                self._init_mqtt_client()
+            if self.connection is None:
+                return
 
             payload = {
                 'vehicle_id': self.vehicle_id,
                 'timestamp': datetime.now().isoformat(),
-                'data': data
+                'trip': trip,
+                'shipment': shipment
             }
+            # 연결이 없으면 오프라인 큐에 최신 상태 하나만 보관했다가 재연결 직후 발행
+            result = self._publish(self.mqtt_stability_topic, json.dumps(payload, default=str), self.mqtt_qos,
+                                   lane='state', retain=True, coalesce=True)
+            if result is None or result.rc == 0:
+                self.last_stability_publish = time.time()
+                logger.debug(f"MKT/안정성 예산 상태 {'전송 완료' if result else '오프라인 큐에 보관'}")
+        except Exception as e:
+            logger.error(f"MKT 상태 전송 오류: {e}")
+
+    def _init_mqtt_client(self):
+        """MQTT 연결 관리자 시작 (연결은 백그라운드에서, 전송 스레드는 기다리지 않음)"""
+        try:
+            self.connection = MQTTConnectionManager(
+                self.mqtt_broker_host, self.mqtt_broker_port, self.mqtt_client_id,
+                max_inflight=self.inflight_window,
+                on_connect=self._on_mqtt_connect,
+                on_publish=self._on_publish
+            )
+            self.connection.subscribe(MQTT_CONTROL_TOPIC, qos=1, callback=self._on_control)
+            self.connection.start()
+        except Exception as e:
+            logger.error(f"MQTT 클라이언트 초기화 실패: {e}")
+            self.connection = None
+
+    def _on_mqtt_connect(self, session_present):
+        """재연결 시 PUBACK을 못 받은 메시지는 paho가 다시 보냄 (mid 유지, 추적 그대로)"""
+        with self.inflight_lock:
+            pending = len(self.inflight)
+        if pending:
+            logger.info(f"PUBACK 대기 메시지 {pending}건 재전송 (세션 {'유지' if session_present else '새로 시작'})")
 
-            json_payload = json.dumps(payload, default=str)
-            result = self.mqtt_client.publish(self.mqtt_topic, json_payload, qos=self.mqtt_qos, retain=self.mqtt_retain)
+    def _send_to_mqtt(self, data, lane=None, skipped=()):
+        """MQTT 브로커로 데이터 전송 (skipped: 다운샘플링으로 뺀 샘플 id, PUBACK 후 함께 완료 표시)"""
+        try:
+            if not self._can_publish():
+                return False
+
+            ids = [item['id'] for item in data] + list(skipped)
+            # 순번 정보: 이 메시지가 처리한 id 구간(다운샘플링으로 뺀 샘플 포함)과 전송 완료 위치
+            seq = {'epoch': self.sequence_epoch, 'acked': self.ack_cursor.acked_id, 'covered': id_ranges(ids)}
+            encoded = self._encode_samples(data, seq)
+            # 샘플은 DB가 오프라인 큐 역할을 하므로 연결 관리자 큐에 넣지 않음
+            result = self._publish(self.mqtt_topic, encoded, self.mqtt_qos, lane=lane, retain=self.mqtt_retain,
+                                   queue=False)
+            if result is None:
+                return False
 
             if result.rc == 0:
-                logger.info(f"MQTT 브로커에 {len(data)}개 데이터 전송 완료")
+                # 묶음은 시간 순이므로 첫 샘플이 가장 오래됨 (레인 지연 계산용)
+                created = datetime.fromisoformat(data[0]['timestamp']).timestamp()
+                self._track(result.mid, 'samples', ids, lane=lane, created=created)
+                logger.debug(f"MQTT 브로커에 {len(data)}개 데이터 발행 ({len(encoded)}바이트, mid {result.mid}, PUBACK 대기)")
                 return True
             else:
+                # 연결은 있는데 발행이 실패한 경우 (paho 큐 한도 등) 디스크 스풀에 보관 후 다시 발행
                 logger.error(f"MQTT 발행 실패: {result.rc}")
-                # paho 실패 시 mosquitto_pub 폴백 시도
-                try:
-                    import subprocess
-                    subprocess.run([
-                        'mosquitto_pub',
-                        '-h', self.mqtt_broker_host,
-                        '-p', str(self.mqtt_broker_port),
-                        '-t', self.mqtt_topic,
-                        '-m', json_payload,
-                        '-q', str(self.mqtt_qos)
-                    ], check=True)
-                    logger.info(f"mosquitto_pub 폴백으로 {len(data)}개 데이터 전송 완료")
-                    return True
-                except Exception as se:
-                    logger.error(f"mosquitto_pub 폴백 실패: {se}")
-                    return False
+                return self._spool_failed(self.mqtt_topic, encoded, 'samples', ids)
 
         except Exception as e:
             logger.error(f"MQTT 전송 실패: {e}")
             return False
 
-    def _get_unsent_data(self):
+    def _encode_samples(self, data, seq):
+        """샘플 묶음 payload 인코딩 (json+none이면 기존 JSON 문자열, 대역폭 예산 프로필이 코덱/압축을 지정하면 그 설정)"""
+        payload = {
+            'vehicle_id': self.vehicle_id,
+            'timestamp': datetime.now().isoformat(),
+            'data': data,
+            'seq': seq
+        }
+        profile = self.budget.profile
+        return encode_payload(payload, profile['codec'] or self.payload_codec,
+                              profile['compression'] or self.payload_compression, profile['level'])
+
+    def _get_rows_by_id(self, first_id, last_id, limit):
+        """id 구간의 샘플을 서버 전송 형식으로 조회 (재전송 요청 응답용)"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                return self._format_rows(db, db.get_gps_temperature_data_by_id_range(first_id, last_id, limit))
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"재전송 데이터 조회 오류: {e}")
+            return []
+
+    def _get_unsent_data(self, limit, since=None, before=None, oldest_first=False, after_id=None):
         """전송하지 않은 GPS+온도 데이터 조회 (중복 전송 방지)"""
         try:
             # 각 스레드에서 독립적인 데이터베이스 연결 생성
-            import sqlite3
             from database import GPSDatabase
 
             db = GPSDatabase(self.db_path)
             db.connect()
 
             # 전송하지 않은 GPS+온도 데이터만 조회
-            unsent_data = db.get_unsent_gps_temperature_data(limit=self.batch_size)
-
-            # 데이터를 서버 전송 형식으로 변환
-            formatted_data = []
-            for row in unsent_data:
-                formatted_data.append(self._format_gps_temperature_data_for_server(row))
+            unsent_data = db.get_unsent_gps_temperature_data(limit=limit, since=since, before=before,
+                                                             oldest_first=oldest_first, after_id=after_id)
+            formatted_data = self._format_rows(db, unsent_data)
 
             db.close()
             return formatted_data
@@ -239,9 +1057,22 @@ class ServerSender:
             logger.error(f"GPS+온도 데이터 조회 오류: {e}")
             return []
 
+    def _format_rows(self, db, rows):
+        """DB 행을 서버 전송 형식으로 변환하고 다중 온도 채널 값 첨부 (추가 싱크도 같은 형식 사용)"""
+        formatted_data = [self._format_gps_temperature_data_for_server(row) for row in rows]
+
+        # 다중 온도 채널 값 첨부 (채널이 있는 샘플만)
+        channel_readings = db.get_channel_readings([item['id'] for item in formatted_data])
+        for item in formatted_data:
+            if item['id'] in channel_readings:
+                item['channels'] = channel_readings[item['id']]
+        return formatted_data
+
     def _format_gps_temperature_data_for_server(self, row):
         """GPS+온도 데이터베이스 행을 서버 형식으로 변환"""
-        # row: (id, vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, temperature, status, sent, sent_at, created_at)
+        # row: (id, vehicle_id, timestamp, datetime, latitude, longitude, altitude, speed, heading, temperature, status, sent, sent_at, created_at,
+        #       fix_time, hdop, pdop, fix_type, satellites, temperature_age, temperature_raw,
+        #       forecast_eta, forecast_threshold, forecast_confidence)
 
         # 온도 상태 재확인 (데이터베이스에 저장된 상태 우선 사용)
         temperature = row[9]   # temperature 필드 (인덱스 9)
@@ -253,6 +1084,11 @@ class ServerSender:
         else:
             temp_status = db_status
 
+        # 이탈 예측이 있을 때만 포함 (대부분의 샘플은 추세 없음)
+        forecast = None
+        if row[21] is not None:
+            forecast = {'eta_seconds': round(row[21], 1), 'threshold': row[22], 'confidence': round(row[23], 3)}
+
         return {
             'id': row[0],          # id 필드 (인덱스 0) - 전송 완료 표시에 필요
             'vehicle_id': row[1],  # vehicle_id 필드 (인덱스 1)
@@ -260,40 +1096,35 @@ class ServerSender:
             'latitude': row[4],    # latitude 필드 (인덱스 4)
             'longitude': row[5],   # longitude 필드 (인덱스 5)
             'temperature': temperature,
-            'status': temp_status
+            'status': temp_status,
+            'fix_time': row[14],   # 측위 UTC 시각 (epoch)
+            'hdop': row[15],
+            'forecast': forecast
         }
 
     def _get_temperature_status(self, temperature):
         """온도값에 따른 상태 판단"""
-        if temperature is None:
-            return 'unknown'
-
-        for status, (min_temp, max_temp) in self.temp_ranges.items():
-            if min_temp <= temperature < max_temp:
-                return status
-        return 'normal'
+        return classify_temperature(temperature, self.temp_ranges)
 
     # MySQL/API 전송 경로는 제거됨 (MQTT 전용)
 
 
-    def _mark_data_as_sent(self, data_ids):
-        """전송 완료된 GPS+온도 데이터 표시 (중복 전송 방지)"""
-        try:
-            # 각 스레드에서 독립적인 데이터베이스 연결 생성
-            import sqlite3
-            from database import GPSDatabase
-
-            db = GPSDatabase(self.db_path)
-            db.connect()
-            db.mark_gps_temperature_data_as_sent(data_ids)
-            db.close()
-        except Exception as e:
-            logger.error(f"GPS+온도 데이터 전송 완료 표시 실패: {e}")
-
     def get_stats(self):
         """전송 통계 반환"""
         return {
             **self.stats,
+            'backlog': self.backlog['count'],
+            'backlog_oldest': self.backlog['oldest'],
+            'backlog_eta': self._backlog_eta(),
+            'inflight': len(self.inflight),
+            'sequence_epoch': self.sequence_epoch,
+            'backfill_pending': len(self.backfill_requests),
+            'ack_cursor': self.ack_cursor.get_stats(),
+            'connection': self.connection.get_metrics() if self.connection else None,
+            'spool': self.spool.get_stats(),
+            'lanes': {name: lane.get_stats() for name, lane in self.lanes.items()},
+            'bandwidth': self.budget.get_stats(),
+            'sinks': self.fanout.get_stats() if self.fanout else {},
             'is_running': self.running,
             'next_send_in': max(0, self.send_interval - (time.time() - (self.last_send_time or 0)))
         }
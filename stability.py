@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+평균 동역학 온도(MKT)와 안정성 예산(stability budget) 추적
+백신 안정성은 단순 평균이 아니라 아레니우스식으로 가중한 MKT와 허용 이탈 예산으로 판단
+
+- 스트리밍: 샘플마다 합계 두 개만 갱신 (O(1)), 운행/배송 단위로 누적 후 DB에 저장
+- 일괄: mean_kinetic_temperature()로 저장된 이력을 다시 계산 (DB에는 RETENTION_SECONDS 구간만 남아 있어
+  recompute_from_db()는 그 구간만 검증)
+
+MKT = (Ea/R) / -ln( Σ Δt·exp(-Ea/(R·T)) / Σ Δt )   (T: 켈빈, Δt: 샘플이 유지된 시간)
+"""
+
+import logging
+import math
+import time
+from config import (
+    MKT_ACTIVATION_ENERGY,
+    STABILITY_BUDGET_HOURS,
+    STABILITY_BUDGET_REFERENCE,
+    STABILITY_BUDGET_THRESHOLD,
+    TEMP_EXCURSION_MAX_GAP,
+)
+
+logger = logging.getLogger(__name__)
+
+GAS_CONSTANT = 8.314462618e-3   # kJ/(mol·K)
+KELVIN = 273.15
+# 합계가 너무 작아지지 않도록 exp 지수를 이 기준 온도(5°C)에 대해 계산
+MKT_REFERENCE_KELVIN = 5.0 + KELVIN
+
+
+def _arrhenius(temperature, reference_kelvin, activation_energy):
+    """기준 온도 대비 반응 속도 비 exp(-Ea/R·(1/T - 1/Tref))"""
+    return math.exp(-activation_energy / GAS_CONSTANT * (1.0 / (temperature + KELVIN) - 1.0 / reference_kelvin))
+
+
+class MKTAccumulator:
+    """MKT와 안정성 예산 소모량 누적기 (운행 또는 배송 1개 단위)
+
+    weight_seconds: 누적 시간, kinetic_sum: Σ Δt·exp(...) (기준 온도 대비),
+    budget_used_seconds: 기준 온도(STABILITY_BUDGET_REFERENCE)로 환산한 예산 소모 시간
+    """
+
+    def __init__(self, scope, scope_id, activation_energy=MKT_ACTIVATION_ENERGY,
+                 budget_hours=STABILITY_BUDGET_HOURS, budget_reference=STABILITY_BUDGET_REFERENCE,
+                 budget_threshold=STABILITY_BUDGET_THRESHOLD, started_at=None):
+        self.scope = scope
+        self.scope_id = scope_id
+        self.activation_energy = activation_energy
+        self.budget_seconds = budget_hours * 3600.0
+        self.budget_reference_kelvin = budget_reference + KELVIN
+        self.budget_threshold = budget_threshold
+
+        self.started_at = started_at or time.time()
+        self.weight_seconds = 0.0
+        self.kinetic_sum = 0.0
+        self.budget_used_seconds = 0.0
+
+    def add(self, temperature, duration):
+        """temperature(°C)가 duration(초) 동안 유지됨"""
+        if duration <= 0:
+            return
+        self.weight_seconds += duration
+        self.kinetic_sum += duration * _arrhenius(temperature, MKT_REFERENCE_KELVIN, self.activation_energy)
+        if temperature > self.budget_threshold:
+            self.budget_used_seconds += duration * _arrhenius(
+                temperature, self.budget_reference_kelvin, self.activation_energy)
+
+    @property
+    def mkt(self):
+        """평균 동역학 온도 (°C, 데이터가 없으면 None)"""
+        if self.weight_seconds <= 0:
+            return None
+        ratio = self.kinetic_sum / self.weight_seconds
+        inverse = 1.0 / MKT_REFERENCE_KELVIN - math.log(ratio) * GAS_CONSTANT / self.activation_energy
+        return 1.0 / inverse - KELVIN
+
+    def get_state(self):
+        remaining = self.budget_seconds - self.budget_used_seconds
+        return {
+            'scope': self.scope,
+            'scope_id': self.scope_id,
+            'started_at': self.started_at,
+            'weight_seconds': self.weight_seconds,
+            'kinetic_sum': self.kinetic_sum,
+            'budget_used_seconds': self.budget_used_seconds,
+            'mkt': self.mkt,
+            'budget_remaining_seconds': remaining,
+            'budget_used_ratio': self.budget_used_seconds / self.budget_seconds if self.budget_seconds else None,
+        }
+
+    def restore(self, state):
+        """저장된 누적값으로 이어서 집계"""
+        self.started_at = state['started_at']
+        self.weight_seconds = state['weight_seconds'] or 0.0
+        self.kinetic_sum = state['kinetic_sum'] or 0.0
+        self.budget_used_seconds = state['budget_used_seconds'] or 0.0
+
+
+class StabilityTracker:
+    """운행(trip)과 배송(shipment) MKT/예산을 함께 갱신하는 클래스
+
+    update()는 직전 샘플 온도가 지금까지 유지된 것으로 보고 경과 시간을 더합니다
+    (샘플 간격이 max_gap보다 길면 그 구간은 제외). temperature가 None이면(센서 멈춤)
+    다음 값이 올 때까지의 시간은 더하지 않습니다.
+    """
+
+    def __init__(self, trip_id, shipment_id, max_gap=TEMP_EXCURSION_MAX_GAP, **kwargs):
+        self.max_gap = max_gap
+        self.kwargs = kwargs
+        self.trip = MKTAccumulator('trip', trip_id, **kwargs)
+        self.shipment = MKTAccumulator('shipment', shipment_id, **kwargs)
+        self.last_temperature = None
+        self.last_time = None
+        self.budget_warned = False
+
+    def start_trip(self, trip_id):
+        """새 운행 누적 시작 (배송 누적은 유지)"""
+        self.trip = MKTAccumulator('trip', trip_id, **self.kwargs)
+
+    def update(self, temperature, now=None):
+        now = now or time.time()
+        if self.last_temperature is not None:
+            elapsed = now - self.last_time
+            if 0 < elapsed <= self.max_gap:
+                self.trip.add(self.last_temperature, elapsed)
+                self.shipment.add(self.last_temperature, elapsed)
+
+        self.last_temperature = temperature
+        self.last_time = now
+
+        if not self.budget_warned and self.shipment.budget_used_seconds >= self.shipment.budget_seconds:
+            self.budget_warned = True
+            logger.warning(f"배송 {self.shipment.scope_id} 안정성 예산 소진")
+
+    def get_state(self):
+        """대시보드/MQTT용 상태"""
+        return {
+            'trip': self.trip.get_state(),
+            'shipment': self.shipment.get_state(),
+            'updated_at': time.time()
+        }
+
+
+def mean_kinetic_temperature(timestamps, temperatures, activation_energy=MKT_ACTIVATION_ENERGY,
+                             budget_reference=STABILITY_BUDGET_REFERENCE,
+                             budget_threshold=STABILITY_BUDGET_THRESHOLD, max_gap=TEMP_EXCURSION_MAX_GAP):
+    """저장된 이력으로 MKT와 예산 소모량 일괄 계산 (StabilityTracker와 같은 시간 가중 방식)
+
+    Returns:
+        {'mkt': °C 또는 None, 'weight_seconds', 'budget_used_seconds'}
+    """
+    import numpy as np
+
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    if len(timestamps) < 2:
+        return {'mkt': None, 'weight_seconds': 0.0, 'budget_used_seconds': 0.0}
+
+    # 각 샘플 온도는 다음 샘플까지 유지된 것으로 봄
+    durations = np.diff(timestamps)
+    held = temperatures[:-1]
+    valid = (durations > 0) & (durations <= max_gap) & ~np.isnan(held)
+    durations = durations[valid]
+    held = held[valid]
+
+    weight = durations.sum()
+    if weight <= 0:
+        return {'mkt': None, 'weight_seconds': 0.0, 'budget_used_seconds': 0.0}
+
+    kelvin = held + KELVIN
+    factor = activation_energy / GAS_CONSTANT
+    kinetic = np.sum(durations * np.exp(-factor * (1.0 / kelvin - 1.0 / MKT_REFERENCE_KELVIN)))
+    mkt = 1.0 / (1.0 / MKT_REFERENCE_KELVIN - math.log(kinetic / weight) / factor) - KELVIN
+
+    over = held > budget_threshold
+    budget_kelvin = budget_reference + KELVIN
+    budget_used = np.sum(durations[over] * np.exp(-factor * (1.0 / kelvin[over] - 1.0 / budget_kelvin)))
+
+    return {'mkt': mkt, 'weight_seconds': float(weight), 'budget_used_seconds': float(budget_used)}
+
+
+def recompute_from_db(db_path, since=None):
+    """DB에 남아 있는 온도 이력으로 MKT 재계산 (보관 구간만)
+
+    gps_temperature_data는 RETENTION_SECONDS가 지나면 정리되므로 운행/배송 전체 누적값은 검증할 수 없음.
+    현재 운행 시작(stability_state) 이후, since 이후로 남아 있는 구간만 계산하고 그 구간을 함께 반환
+
+    Returns:
+        mean_kinetic_temperature() 결과 + {'window_start', 'window_end', 'samples'}
+    """
+    import sqlite3
+    from datetime import datetime
+    from config import RETENTION_SECONDS
+
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            trip = conn.execute(
+                "SELECT scope_id, started_at, weight_seconds FROM stability_state WHERE scope = 'trip' "
+                "ORDER BY updated_at DESC LIMIT 1"
+            ).fetchone()
+        except sqlite3.Error:
+            trip = None   # MKT 상태 테이블이 없는 이전 DB
+
+        starts = [value for value in (since, trip[1] if trip else None) if value is not None]
+        query = "SELECT timestamp, temperature FROM gps_temperature_data WHERE temperature IS NOT NULL"
+        params = ()
+        if starts:
+            query += " AND timestamp >= ?"
+            params = (max(starts),)
+        rows = conn.execute(query + " ORDER BY timestamp", params).fetchall()
+    finally:
+        conn.close()
+
+    result = mean_kinetic_temperature([row[0] for row in rows], [row[1] for row in rows])
+    result.update({
+        'window_start': rows[0][0] if rows else None,
+        'window_end': rows[-1][0] if rows else None,
+        'samples': len(rows)
+    })
+
+    if not rows:
+        print("보관 구간에 온도 이력이 없음")
+        return result
+
+    def clock(timestamp):
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+    mkt = f"{result['mkt']:.3f}°C" if result['mkt'] is not None else "N/A"
+    print(f"보관 구간 {clock(rows[0][0])} ~ {clock(rows[-1][0])} "
+          f"({(rows[-1][0] - rows[0][0]) / 60:.1f}분, 샘플 {len(rows)}개): 누적 {result['weight_seconds']:.0f}초, "
+          f"MKT {mkt}, 예산 소모 {result['budget_used_seconds'] / 3600:.3f}시간 ({STABILITY_BUDGET_REFERENCE}°C 환산)")
+    if trip:
+        print(f"운행 {trip[0]} 누적 {(trip[2] or 0.0) / 3600:.2f}시간 중 위 구간만 재계산한 값 "
+              f"(RETENTION_SECONDS={RETENTION_SECONDS}초가 지난 이력은 정리되어 운행/배송 전체 누적값과는 비교 불가)")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import DB_PATH
+
+    parser = argparse.ArgumentParser(description="DB에 남아 있는 온도 이력(보관 구간)으로 MKT/안정성 예산 재계산")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite DB 경로")
+    parser.add_argument('--since', type=float, help="이 epoch 초 이후 데이터만 사용")
+    args = parser.parse_args()
+
+    recompute_from_db(args.db, args.since)
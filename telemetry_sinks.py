@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+샘플 전송 대상(싱크)과 팬아웃
+기본 MQTT 브로커(ServerSender) 외에 로컬 파일 보관, 다른 MQTT 브로커, HTTP 엔드포인트로 같은 샘플을 전송
+
+- AckCursor: 싱크별 전송 완료 위치 (send_cursors 테이블, 기본 브로커는 'mqtt')
+- SinkFanout: DB에서 샘플을 한 번 읽어 자리가 있는 싱크 큐에 나눠 줌
+- 싱크마다 묶음 크기, 재시도 간격(지수 백오프), 크기 제한 큐, 전송 스레드를 따로 가짐
+  느린 싱크는 큐가 차면 더 받지 않고 자기 위치에서 멈춤 (다른 싱크와 샘플 저장은 기다리지 않음)
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from datetime import datetime
+from config import (
+    VEHICLE_ID,
+    BACKLOG_BATCH_SIZE,
+    MQTT_TOPIC,
+    MQTT_CLIENT_ID,
+    MQTT_ACK_TIMEOUT,
+    MQTT_PAYLOAD_CODEC,
+    MQTT_PAYLOAD_COMPRESSION,
+    SEND_CURSOR_FLUSH_INTERVAL,
+    SINKS,
+    SINK_BATCH_SIZE,
+    SINK_QUEUE_SIZE,
+    SINK_RETRY_MIN_DELAY,
+    SINK_RETRY_MAX_DELAY,
+    SINK_POLL_INTERVAL,
+    SINK_HTTP_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# 기본 MQTT 브로커(ServerSender)가 쓰는 전송 완료 위치 이름
+PRIMARY_SINK = 'mqtt'
+
+
+class AckCursor:
+    """싱크별 전송 완료 위치 (연속으로 전송 확인된 마지막 샘플 id)
+
+    행마다 sent를 UPDATE하지 않고 acked_id 이하를 모두 전송 완료로 봅니다.
+    실시간 레인이 백로그보다 먼저 PUBACK을 받으면 acked_id 위에서 완료된 id 구간을 따로 들고 있다가
+    그 아래 빈틈이 채워지면 acked_id를 앞으로 옮깁니다. DB에는 flush_interval마다 싱크당 한 행만 기록합니다.
+    """
+
+    def __init__(self, db_path, sink=PRIMARY_SINK, flush_interval=SEND_CURSOR_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.acked_id = 0
+        self.starts = []        # acked_id 위의 완료 구간 [starts[i], ends[i]] (겹치거나 맞닿지 않음, 정렬)
+        self.ends = []
+        self.loaded = False
+        self.dirty = False
+        self.last_flush = None
+        self.stats = {'acked': 0, 'flushes': 0}
+
+    def load(self):
+        """DB에서 전송 완료 위치 복원 -> 성공하면 True (실패하면 샘플 전송을 미룸)"""
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                self.acked_id, ranges = db.get_send_cursor(self.sink)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"전송 완료 위치 조회 오류 ({self.sink}): {e}")
+            return False
+
+        self.starts = [start for start, _ in ranges]
+        self.ends = [end for _, end in ranges]
+        self.loaded = True
+        self.last_flush = time.time()
+        logger.info(f"전송 완료 위치 ({self.sink}): id {self.acked_id}, 먼저 완료된 구간 {len(ranges)}개")
+        return True
+
+    def ack(self, ids):
+        """전송 확인된 샘플 id 반영 (순서/연속 여부 무관)"""
+        runs = []
+        for sample_id in sorted(set(ids)):
+            if sample_id <= self.acked_id:
+                continue
+            if runs and sample_id == runs[-1][1] + 1:
+                runs[-1][1] = sample_id
+            else:
+                runs.append([sample_id, sample_id])
+        for start, end in runs:
+            self._add(start, end)
+        self._advance()
+        self.stats['acked'] += len(ids)
+        self.dirty = True
+
+    def _add(self, start, end):
+        # 겹치거나 맞닿는 구간 [i, j)를 하나로 합침
+        i = bisect.bisect_left(self.ends, start - 1)
+        j = bisect.bisect_right(self.starts, end + 1)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def _advance(self):
+        if self.starts and self.starts[0] <= self.acked_id + 1:
+            self.acked_id = max(self.acked_id, self.ends[0])
+            del self.starts[0], self.ends[0]
+
+    def is_acked(self, sample_id):
+        if sample_id <= self.acked_id:
+            return True
+        i = bisect.bisect_right(self.starts, sample_id) - 1
+        return i >= 0 and self.ends[i] >= sample_id
+
+    def next_after(self, after_id):
+        """after_id 다음 조회 시작 위치 (전송 완료 위치 이상, 바로 뒤가 완료 구간이면 그 끝으로)"""
+        after_id = max(after_id, self.acked_id)
+        i = bisect.bisect_right(self.starts, after_id + 1) - 1
+        if i >= 0 and self.ends[i] > after_id:
+            return self.ends[i]
+        return after_id
+
+    def pending(self):
+        """acked_id 위에서 먼저 완료된 id 개수"""
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def flush(self, force=False):
+        """flush_interval마다 전송 완료 위치를 DB에 기록 (force면 바로)"""
+        now = time.time()
+        if not self.loaded or (not self.dirty and not self.starts):
+            return
+        if not force and self.last_flush is not None and now - self.last_flush < self.flush_interval:
+            return
+        self.last_flush = now
+        try:
+            from database import GPSDatabase
+
+            db = GPSDatabase(self.db_path)
+            db.connect()
+            try:
+                # 보관 기간 정리 등으로 사라진 id 구간은 완료 구간 사이 빈틈으로 남지 않도록 건너뜀
+                while self.starts:
+                    next_id = db.get_next_sample_id(self.acked_id)
+                    if next_id is not None and next_id < self.starts[0]:
+                        break
+                    self.acked_id = self.ends[0]
+                    del self.starts[0], self.ends[0]
+                    self.dirty = True
+                if self.dirty:
+                    db.save_send_cursor(self.sink, self.acked_id, [list(r) for r in zip(self.starts, self.ends)])
+                    self.dirty = False
+                    self.stats['flushes'] += 1
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"전송 완료 위치 저장 오류 ({self.sink}): {e}")
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'acked_id': self.acked_id,
+            'ranges': len(self.starts),
+            'pending': self.pending(),
+        }
+
+
+class Sink:
+    """전송 대상 기본 클래스
+
+    하위 클래스는 deliver(rows)를 구현합니다 (실패하면 예외, 같은 묶음을 재시도 간격 뒤에 다시 전달).
+    rows는 ServerSender 전송 형식의 샘플 dict 목록이며 여러 싱크가 같이 쓰므로 수정하지 않습니다.
+    """
+
+    kind = None
+
+    def __init__(self, name, db_path, batch_size=SINK_BATCH_SIZE, queue_size=SINK_QUEUE_SIZE,
+                 retry_min=SINK_RETRY_MIN_DELAY, retry_max=SINK_RETRY_MAX_DELAY):
+        self.name = name
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.cursor = AckCursor(db_path, sink=name)
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.read_id = None         # 큐에 넣은 마지막 id (None이면 전송 완료 위치 복원 전)
+        self.running = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.failures = 0           # 연속 실패 횟수 (재시도 간격 계산용)
+
+        self.stats = {'delivered': 0, 'batches': 0, 'failures': 0, 'full': 0,
+                      'last_success': None, 'last_error': None}
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        with self.condition:
+            self.queue.clear()
+            self.read_id = self.cursor.acked_id if self.cursor.loaded else None
+        self.thread = threading.Thread(target=self._run, name=f"sink-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def deliver(self, rows):
+        raise NotImplementedError
+
+    def room(self):
+        """큐에 더 넣을 수 있는 샘플 수 (복원 전이면 0)"""
+        with self.condition:
+            if self.read_id is None:
+                return 0
+            return self.queue_size - len(self.queue)
+
+    def offer(self, rows):
+        """팬아웃이 읽은 샘플 중 이 싱크가 아직 받지 않은 것을 큐 자리만큼 추가"""
+        with self.condition:
+            if self.read_id is None:
+                return
+            rows = [row for row in rows if row['id'] > self.read_id][:self.queue_size - len(self.queue)]
+            if not rows:
+                return
+            self.queue.extend(rows)
+            self.read_id = rows[-1]['id']
+            self.condition.notify()
+
+    def _run(self):
+        while self.running:
+            if not self.cursor.loaded:
+                if not self.cursor.load():
+                    self.stop_event.wait(self.retry_max)
+                    continue
+                with self.condition:
+                    self.read_id = self.cursor.acked_id
+
+            taken, rows = self._next_batch()
+            if not taken:
+                self.cursor.flush()
+                continue
+            if not rows or self._send(rows):
+                with self.condition:
+                    for _ in range(taken):
+                        self.queue.popleft()
+        self.cursor.flush(force=True)
+
+    def _next_batch(self):
+        """큐 앞에서 batch_size개 (이미 전송 확인된 샘플 제외) -> (꺼낼 개수, 보낼 샘플)"""
+        with self.condition:
+            if not self.queue:
+                self.condition.wait(0.5)
+            batch = [self.queue[i] for i in range(min(self.batch_size, len(self.queue)))]
+        return len(batch), [row for row in batch if not self.cursor.is_acked(row['id'])]
+
+    def _send(self, rows):
+        """전송에 성공할 때까지 재시도 -> 성공하면 True (중지하면 False)"""
+        while self.running:
+            try:
+                self.deliver(rows)
+            except Exception as e:
+                self.failures += 1
+                delay = min(self.retry_max, self.retry_min * 2 ** (self.failures - 1))
+                self.stats['failures'] += 1
+                self.stats['last_error'] = str(e)
+                logger.warning(f"싱크 {self.name} 전송 실패 ({len(rows)}건): {e}, {delay:.0f}초 후 재시도")
+                self.stop_event.wait(delay)
+                continue
+
+            self.failures = 0
+            self.cursor.ack([row['id'] for row in rows])
+            self.cursor.flush()
+            self.stats['delivered'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['last_success'] = time.time()
+            return True
+        return False
+
+    def get_stats(self):
+        with self.condition:
+            queued = len(self.queue)
+        return {
+            **self.stats,
+            'kind': self.kind,
+            'queued': queued,
+            'queue_size': self.queue_size,
+            'consecutive_failures': self.failures,
+            'cursor': self.cursor.get_stats(),
+        }
+
+
+class FileArchiveSink(Sink):
+    """로컬 파일 보관 (JSON Lines, 샘플 1건당 1줄)
+
+    path에 strftime 형식을 넣으면 날짜별 파일로 나눠 저장 (예: archive/telemetry-%Y%m%d.jsonl)
+    """
+
+    kind = 'file'
+
+    def __init__(self, name, db_path, path, **options):
+        super().__init__(name, db_path, **options)
+        self.path = path
+
+    def deliver(self, rows):
+        path = time.strftime(self.path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class MQTTSink(Sink):
+    """다른 MQTT 브로커 (연결 관리는 MQTTConnectionManager, 묶음마다 PUBACK 확인 후 다음 묶음)"""
+
+    kind = 'mqtt'
+
+    def __init__(self, name, db_path, host, port=1883, topic=None, client_id=None, qos=1,
+                 codec=MQTT_PAYLOAD_CODEC, compression=MQTT_PAYLOAD_COMPRESSION, ack_timeout=MQTT_ACK_TIMEOUT,
+                 **options):
+        super().__init__(name, db_path, **options)
+        self.host = host
+        self.port = port
+        self.topic = topic or MQTT_TOPIC
+        self.client_id = client_id or f"{MQTT_CLIENT_ID}_{name}"
+        self.qos = qos
+        self.codec = codec
+        self.compression = compression
+        self.ack_timeout = ack_timeout
+        self.connection = None
+
+    def start(self):
+        from mqtt_connection import MQTTConnectionManager
+
+        if self.connection is None:
+            self.connection = MQTTConnectionManager(self.host, self.port, self.client_id)
+        self.connection.start()
+        super().start()
+
+    def stop(self):
+        super().stop()
+        if self.connection:
+            self.connection.stop()
+
+    def deliver(self, rows):
+        from payload_codec import encode_payload
+
+        if not self.connection.is_connected():
+            raise ConnectionError(f"브로커 {self.host}:{self.port} 연결 없음")
+        payload = {'vehicle_id': rows[0].get('vehicle_id') or VEHICLE_ID,
+                   'timestamp': datetime.now().isoformat(), 'data': rows}
+        result = self.connection.publish(self.topic, encode_payload(payload, self.codec, self.compression),
+                                         qos=self.qos, queue=False)
+        if result is None or result.rc != 0:
+            raise ConnectionError(f"발행 실패: {None if result is None else result.rc}")
+        if self.qos > 0:
+            result.wait_for_publish(self.ack_timeout)
+            if not result.is_published():
+                raise TimeoutError(f"{self.ack_timeout:.0f}초 안에 PUBACK 없음")
+
+    def get_stats(self):
+        return {**super().get_stats(), 'connection': self.connection.get_metrics() if self.connection else None}
+
+
+class HTTPSink(Sink):
+    """HTTP 엔드포인트 (묶음을 JSON으로 POST, 2xx 응답이면 성공)"""
+
+    kind = 'http'
+
+    def __init__(self, name, db_path, url, timeout=SINK_HTTP_TIMEOUT, headers=None, **options):
+        super().__init__(name, db_path, **options)
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', 'User-Agent': 'TruckGPS/1.0', **(headers or {})}
+
+    def deliver(self, rows):
+        payload = {'vehicle_id': rows[0].get('vehicle_id') or VEHICLE_ID,
+                   'timestamp': datetime.now().isoformat(), 'data': rows}
+        req = urllib.request.Request(self.url, data=json.dumps(payload).encode('utf-8'),
+                                     headers=self.headers, method='POST')
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            if not 200 <= resp.status < 300:
+                raise ConnectionError(f"HTTP {resp.status}")
+
+
+SINK_TYPES = {sink.kind: sink for sink in (FileArchiveSink, MQTTSink, HTTPSink)}
+
+
+def build_sinks(db_path, configs=SINKS):
+    """config.SINKS 항목으로 싱크 생성 ({'type', 'name', ...옵션})"""
+    sinks = []
+    names = {PRIMARY_SINK}
+    for config in configs:
+        options = dict(config)
+        kind = options.pop('type', None)
+        if kind not in SINK_TYPES:
+            raise ValueError(f"지원하지 않는 싱크 종류: {kind} ({', '.join(SINK_TYPES)})")
+        name = options.pop('name', kind)
+        if name in names:
+            raise ValueError(f"싱크 이름 중복: {name} ('{PRIMARY_SINK}'는 기본 브로커용)")
+        names.add(name)
+        sinks.append(SINK_TYPES[kind](name, db_path, **options))
+    return sinks
+
+
+class SinkFanout:
+    """샘플을 DB에서 한 번 읽어 여러 싱크에 나눠 주는 스레드
+
+    싱크들이 같은 위치에 있으면 조회 1번으로 모두에게 전달하고,
+    멀리 뒤처진 싱크가 있으면 그 싱크용 조회를 따로 해서 앞선 싱크가 기다리지 않도록 합니다.
+    formatter(db, rows): DB 행을 전송 형식 dict 목록으로 변환 (ServerSender._format_rows)
+    """
+
+    def __init__(self, db_path, sinks, formatter, poll_interval=SINK_POLL_INTERVAL, read_limit=BACKLOG_BATCH_SIZE):
+        self.db_path = db_path
+        self.sinks = sinks
+        self.formatter = formatter
+        self.poll_interval = poll_interval
+        self.read_limit = read_limit
+        self.running = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {'reads': 0, 'rows_read': 0}
+
+    def start(self):
+        if self.running:
+            return
+        for sink in self.sinks:
+            sink.start()
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="sink-fanout", daemon=True)
+        self.thread.start()
+        logger.info(f"추가 전송 대상 시작: {', '.join(f'{sink.name}({sink.kind})' for sink in self.sinks)}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        for sink in self.sinks:
+            sink.stop()
+
+    def _run(self):
+        while self.running:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"싱크 팬아웃 오류: {e}")
+            self.stop_event.wait(self.poll_interval)
+
+    def poll(self):
+        """자리가 있는 싱크에 새 샘플 전달 (큐가 찬 싱크는 건너뜀)"""
+        pending = []
+        for sink in self.sinks:
+            room = sink.room()
+            if room > 0:
+                pending.append((sink, room))
+            elif sink.read_id is not None:
+                sink.stats['full'] += 1
+        pending.sort(key=lambda item: item[0].read_id)
+
+        while pending:
+            limit = min(self.read_limit, max(room for _, room in pending))
+            rows = self._read(pending[0][0].read_id, limit)
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            ahead = [(sink, room) for sink, room in pending if sink.read_id >= last_id]
+            for sink, _ in pending:
+                if sink.read_id < last_id:
+                    sink.offer(rows)
+            # 이번 조회 범위보다 앞서 있는 싱크는 그 위치부터 다시 조회 (끝까지 읽었으면 종료)
+            pending = ahead if len(rows) == limit else []
+
+    def _read(self, after_id, limit):
+        from database import GPSDatabase
+
+        db = GPSDatabase(self.db_path)
+        db.connect()
+        try:
+            rows = db.get_unsent_gps_temperature_data(limit=limit, oldest_first=True, after_id=after_id)
+            formatted = self.formatter(db, rows)
+        finally:
+            db.close()
+        self.stats['reads'] += 1
+        self.stats['rows_read'] += len(formatted)
+        return formatted
+
+    def get_stats(self):
+        return {'fanout': dict(self.stats), **{sink.name: sink.get_stats() for sink in self.sinks}}
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+온도 스트리밍 필터 (이상치 제거)
+진동/전자파로 튀는 열전대 값 하나 때문에 critical 상태가 기록되지 않도록
+상태 판단 전에 중앙값/Hampel/EWMA 필터를 거침
+
+- 스트리밍: 창을 인덱스 가능한 skip list로 유지해 삽입/삭제/중앙값이 샘플당 O(log w) (기대 시간)
+  MAD는 두 정렬 편차 수열의 k번째 값 선택(O(log w) 비교)이고 비교마다 순위 조회가 O(log w)라 O(log² w)
+- 일괄: filter_batch()로 저장된 이력을 NumPy 벡터 연산으로 재처리 (스트리밍과 같은 결과)
+"""
+
+import logging
+import math
+import random
+from collections import deque
+from config import (
+    TEMP_FILTER_STAGES,
+    TEMP_FILTER_WINDOW,
+    TEMP_FILTER_HAMPEL_SIGMAS,
+    TEMP_FILTER_MIN_DEVIATION,
+    TEMP_FILTER_EWMA_ALPHA,
+)
+
+logger = logging.getLogger(__name__)
+
+# 정규분포에서 MAD -> 표준편차 환산 계수
+MAD_SCALE = 1.4826
+
+
+def _kth_of_two(a, len_a, b, len_b, k):
+    """정렬된 두 수열 a(i), b(j)의 합집합에서 k번째(0부터) 작은 값 (O(log w))"""
+    lo, hi = max(0, k + 1 - len_b), min(k + 1, len_a)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if a(i) < b(k - i):
+            lo = i + 1
+        else:
+            hi = i
+    i, j = lo, k + 1 - lo
+    if i == 0:
+        return b(j - 1)
+    if j == 0:
+        return a(i - 1)
+    return max(a(i - 1), b(j - 1))
+
+
+class _SkipNode:
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value, levels):
+        self.value = value
+        self.next = [None] * levels
+        self.width = [1] * levels     # 이 레벨에서 다음 노드까지 건너뛰는 원소 수
+
+
+class IndexableSkiplist:
+    """정렬된 값 목록: 삽입/삭제/인덱스 조회/순위(bisect_left)가 O(log n) 기대 시간
+
+    레벨마다 다음 노드까지의 거리(width)를 함께 두어 인덱스로 바로 찾아감 (R. Hettinger 레시피 방식)
+    """
+
+    def __init__(self, expected_size):
+        self.levels = max(1, int(math.log2(max(expected_size, 2))) + 1)
+        self.random = random.Random(0)    # 레벨 선택만 사용 (결과 값에는 영향 없음)
+        self.clear()
+
+    def clear(self):
+        self.tail = _SkipNode(float('inf'), 0)
+        self.head = _SkipNode(None, self.levels)
+        self.head.next = [self.tail] * self.levels
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        node = self.head
+        index += 1
+        for level in reversed(range(self.levels)):
+            while node.width[level] <= index:
+                index -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def rank(self, value):
+        """value보다 작은 값의 개수 (정렬 리스트의 bisect_left)"""
+        node = self.head
+        rank = 0
+        for level in reversed(range(self.levels)):
+            while node.next[level].value < value:
+                rank += node.width[level]
+                node = node.next[level]
+        return rank
+
+    def insert(self, value):
+        chain = [None] * self.levels
+        steps = [0] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value <= value:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = min(self.levels, 1 - int(math.log2(1.0 - self.random.random())))
+        new = _SkipNode(value, height)
+        distance = 0
+        for level in range(height):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - distance
+            previous.width[level] = distance + 1
+            distance += steps[level]
+        for level in range(height, self.levels):
+            chain[level].width[level] += 1
+        self.count += 1
+
+    def remove(self, value):
+        chain = [None] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target.value != value:
+            raise KeyError(value)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.levels):
+            chain[level].width[level] -= 1
+        self.count -= 1
+
+
+class RollingWindow:
+    """최근 size개 값 (도착 순서 deque + 정렬된 skip list, push/median은 O(log size))"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.sorted = IndexableSkiplist(size)
+
+    def push(self, value):
+        if len(self.values) == self.size:
+            self.sorted.remove(self.values.popleft())
+        self.values.append(value)
+        self.sorted.insert(value)
+
+    def median(self):
+        s = self.sorted
+        n = len(s)
+        m = n // 2
+        return s[m] if n % 2 else (s[m - 1] + s[m]) / 2
+
+    def mad(self, center):
+        """중앙값 절대 편차 (center 기준 |x - center|의 중앙값)
+
+        정렬된 창을 center 위치에서 나누면 왼쪽(center - x, 뒤에서부터)과
+        오른쪽(x - center)이 각각 정렬된 편차 수열이 되므로 정렬 없이 k번째 값을 고름
+        """
+        s = self.sorted
+        n = len(s)
+        p = s.rank(center)
+
+        def left(i):
+            return center - s[p - 1 - i]
+
+        def right(j):
+            return s[p + j] - center
+
+        m = n // 2
+        if n % 2:
+            return _kth_of_two(left, p, right, n - p, m)
+        return (_kth_of_two(left, p, right, n - p, m - 1) + _kth_of_two(left, p, right, n - p, m)) / 2
+
+    def clear(self):
+        self.values.clear()
+        self.sorted.clear()
+
+
+class MedianStage:
+    """이동 중앙값 필터"""
+
+    def __init__(self, window=TEMP_FILTER_WINDOW):
+        self.window = RollingWindow(window)
+
+    def update(self, value):
+        self.window.push(value)
+        return self.window.median()
+
+    def reset(self):
+        self.window.clear()
+
+
+class HampelStage:
+    """Hampel 필터: 창의 중앙값에서 n_sigmas * 1.4826 * MAD 이상 벗어난 값을 중앙값으로 대체"""
+
+    def __init__(self, window=TEMP_FILTER_WINDOW, n_sigmas=TEMP_FILTER_HAMPEL_SIGMAS,
+                 min_deviation=TEMP_FILTER_MIN_DEVIATION):
+        self.window = RollingWindow(window)
+        self.n_sigmas = n_sigmas
+        self.min_deviation = min_deviation
+        self.outliers = 0
+
+    def update(self, value):
+        # 창에는 원시값을 넣음 (대체값을 넣으면 실제 변화도 이상치로 계속 눌림)
+        self.window.push(value)
+        median = self.window.median()
+        threshold = max(self.n_sigmas * MAD_SCALE * self.window.mad(median), self.min_deviation)
+        if abs(value - median) > threshold:
+            self.outliers += 1
+            return median
+        return value
+
+    def reset(self):
+        self.window.clear()
+
+
+class EWMAStage:
+    """지수 가중 이동 평균"""
+
+    def __init__(self, alpha=TEMP_FILTER_EWMA_ALPHA):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+
+STAGE_NAMES = ('median', 'hampel', 'ewma')
+
+
+def _build_stage(name, window, n_sigmas, min_deviation, alpha):
+    if name == 'median':
+        return MedianStage(window)
+    if name == 'hampel':
+        return HampelStage(window, n_sigmas, min_deviation)
+    if name == 'ewma':
+        return EWMAStage(alpha)
+    raise ValueError(f"지원하지 않는 온도 필터: {name} (가능: {', '.join(STAGE_NAMES)})")
+
+
+class TemperatureFilter:
+    """온도 필터 체인 (설정된 단계를 순서대로 적용)
+
+    update(raw)는 필터링된 값을 반환하며, 원시값과 필터값을 나란히 보관합니다.
+    None(읽기 실패)은 창에 넣지 않고 그대로 None을 반환합니다.
+    """
+
+    def __init__(self, stages=TEMP_FILTER_STAGES, window=TEMP_FILTER_WINDOW,
+                 n_sigmas=TEMP_FILTER_HAMPEL_SIGMAS, min_deviation=TEMP_FILTER_MIN_DEVIATION,
+                 alpha=TEMP_FILTER_EWMA_ALPHA):
+        self.stage_names = list(stages)
+        self.stages = [_build_stage(name, window, n_sigmas, min_deviation, alpha) for name in self.stage_names]
+        self.last_raw = None
+        self.last_value = None
+        self.samples = 0
+
+    def update(self, raw):
+        """원시값 하나를 넣고 필터링된 값 반환"""
+        if raw is None:
+            return None
+
+        value = raw
+        for stage in self.stages:
+            value = stage.update(value)
+
+        self.samples += 1
+        self.last_raw = raw
+        self.last_value = value
+        return value
+
+    @property
+    def outliers(self):
+        """Hampel 단계에서 대체된 샘플 수"""
+        return sum(stage.outliers for stage in self.stages if isinstance(stage, HampelStage))
+
+    def get_stats(self):
+        return {
+            'stages': self.stage_names,
+            'samples': self.samples,
+            'outliers': self.outliers,
+            'last_raw': self.last_raw,
+            'last_value': self.last_value
+        }
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+        self.last_raw = None
+        self.last_value = None
+
+
+# ━━━━━ 일괄(NumPy) 처리 ━━━━━
+
+def _windows(values, window, reduce):
+    """인과(causal) 이동 창마다 reduce 적용 (처음 window-1개는 부분 창)"""
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    n = len(values)
+    out = np.empty(n)
+    head = min(window - 1, n)
+    for i in range(head):
+        out[i] = reduce(values[:i + 1][None, :])[0]
+    if n >= window:
+        out[window - 1:] = reduce(sliding_window_view(values, window))
+    return out
+
+
+def median_batch(values, window=TEMP_FILTER_WINDOW):
+    import numpy as np
+    return _windows(values, window, lambda w: np.median(w, axis=1))
+
+
+def hampel_batch(values, window=TEMP_FILTER_WINDOW, n_sigmas=TEMP_FILTER_HAMPEL_SIGMAS,
+                 min_deviation=TEMP_FILTER_MIN_DEVIATION):
+    import numpy as np
+
+    def mad(w):
+        median = np.median(w, axis=1)
+        return np.median(np.abs(w - median[:, None]), axis=1)
+
+    median = median_batch(values, window)
+    threshold = np.maximum(n_sigmas * MAD_SCALE * _windows(values, window, mad), min_deviation)
+    return np.where(np.abs(values - median) > threshold, median, values)
+
+
+def ewma_batch(values, alpha=TEMP_FILTER_EWMA_ALPHA):
+    """EWMA 닫힌 식을 구간별 누적합으로 계산 (감쇠 계수 거듭제곱이 넘치지 않도록 구간 분할)"""
+    import numpy as np
+
+    n = len(values)
+    if n == 0 or alpha >= 1.0:
+        return values.copy()
+    if alpha <= 0.0:
+        return np.full(n, values[0])
+
+    decay = 1.0 - alpha
+    chunk = max(1, int(150 / -math.log10(decay)))
+    out = np.empty(n)
+    previous = values[0]
+    for start in range(0, n, chunk):
+        segment = values[start:start + chunk]
+        powers = decay ** np.arange(1, len(segment) + 1)
+        out[start:start + len(segment)] = powers * (previous + alpha * np.cumsum(segment / powers))
+        previous = out[start + len(segment) - 1]
+    return out
+
+
+def filter_batch(values, stages=TEMP_FILTER_STAGES, window=TEMP_FILTER_WINDOW,
+                 n_sigmas=TEMP_FILTER_HAMPEL_SIGMAS, min_deviation=TEMP_FILTER_MIN_DEVIATION,
+                 alpha=TEMP_FILTER_EWMA_ALPHA):
+    """온도 이력 일괄 필터링 (TemperatureFilter를 순서대로 돌린 것과 같은 결과)
+
+    Args:
+        values: 온도 배열 (None/NaN은 건너뛰고 결과에서도 NaN)
+    Returns:
+        필터링된 numpy 배열
+    """
+    import numpy as np
+
+    values = np.asarray([np.nan if v is None else v for v in values], dtype=np.float64) \
+        if not isinstance(values, np.ndarray) else values.astype(np.float64)
+    valid = ~np.isnan(values)
+    result = values[valid]
+
+    for name in stages:
+        if name == 'median':
+            result = median_batch(result, window)
+        elif name == 'hampel':
+            result = hampel_batch(result, window, n_sigmas, min_deviation)
+        elif name == 'ewma':
+            result = ewma_batch(result, alpha)
+        else:
+            raise ValueError(f"지원하지 않는 온도 필터: {name} (가능: {', '.join(STAGE_NAMES)})")
+
+    out = np.full(len(values), np.nan)
+    out[valid] = result
+    return out
+
+
+def reprocess_history(db_path, stages=TEMP_FILTER_STAGES):
+    """DB에 저장된 원시 온도 이력을 다시 필터링해 바뀌는 샘플 수 출력"""
+    import sqlite3
+    import numpy as np
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT COALESCE(temperature_raw, temperature) FROM gps_temperature_data ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    raw = np.array([np.nan if row[0] is None else row[0] for row in rows], dtype=np.float64)
+    filtered = filter_batch(raw, stages)
+    changed = np.sum(np.abs(filtered - raw) > 1e-9)
+    print(f"샘플 {len(raw)}개, 필터 {list(stages)} 적용 시 값이 바뀌는 샘플 {changed}개")
+    return filtered
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import DB_PATH
+
+    parser = argparse.ArgumentParser(description="저장된 온도 이력 필터 재처리")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite DB 경로")
+    parser.add_argument('--stages', nargs='+', default=TEMP_FILTER_STAGES, help="필터 단계 (median/hampel/ewma)")
+    args = parser.parse_args()
+
+    reprocess_history(args.db, args.stages)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+온도 이탈 예측 (time-to-threshold)
+최근 온도 구간에 직선 추세를 맞춰 8°C(또는 2°C) 도달까지 남은 시간을 추정
+압축기 고장처럼 온도가 계속 오르는 경우 critical_hot이 되기 전에 경고하기 위함
+
+- 창별 최소제곱 합계(Σt, Σy, Σt², Σty, Σy²)를 샘플 추가/제거 시 갱신 (다시 맞추지 않음, O(1))
+- 기울기 표준오차로 신뢰도와 도달 시간 범위 계산
+- 여러 창(짧은 창: 급변, 긴 창: 완만한 상승) 중 신뢰도를 만족하는 가장 이른 도달 시간을 사용
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from config import (
+    TEMP_RANGES,
+    FORECAST_WINDOWS,
+    FORECAST_HORIZON,
+    FORECAST_MIN_CONFIDENCE,
+    FORECAST_MIN_SLOPE,
+    FORECAST_MIN_SAMPLES,
+)
+
+logger = logging.getLogger(__name__)
+
+# 도달 시간 범위 계산용 (양측 90%)
+Z_90 = 1.645
+
+
+def _normal_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+class RollingLinearFit:
+    """최근 window초 샘플에 대한 증분 최소제곱 직선 y = a + b·t"""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()      # (epoch 초, 값)
+        self.origin = None          # 합계 계산용 시간 원점
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.n = 0
+        self.sum_t = self.sum_y = self.sum_tt = self.sum_ty = self.sum_yy = 0.0
+
+    def _accumulate(self, timestamp, value, sign):
+        t = timestamp - self.origin
+        self.n += sign
+        self.sum_t += sign * t
+        self.sum_y += sign * value
+        self.sum_tt += sign * t * t
+        self.sum_ty += sign * t * value
+        self.sum_yy += sign * value * value
+
+    def _rebase(self, origin):
+        """시간 원점을 옮기고 합계를 다시 계산 (창 길이의 4배마다 한 번, 평균 O(1))"""
+        self.origin = origin
+        self._reset_sums()
+        for timestamp, value in self.samples:
+            self._accumulate(timestamp, value, 1)
+
+    def update(self, timestamp, value):
+        if self.origin is None:
+            self.origin = timestamp
+        elif timestamp - self.origin > 4 * self.window:
+            # 원점에서 멀어질수록 Σt² 자릿수 손실이 커지므로 원점 이동
+            self._rebase(self.samples[0][0] if self.samples else timestamp)
+
+        self.samples.append((timestamp, value))
+        self._accumulate(timestamp, value, 1)
+
+        cutoff = timestamp - self.window
+        while self.samples and self.samples[0][0] < cutoff:
+            old_timestamp, old_value = self.samples.popleft()
+            self._accumulate(old_timestamp, old_value, -1)
+
+    def fit(self):
+        """(기울기 °C/초, 최신 시각 추정값, 기울기 표준오차) 또는 None"""
+        if self.n < 3:
+            return None
+        sxx = self.sum_tt - self.sum_t * self.sum_t / self.n
+        if sxx <= 1e-9:
+            return None
+        sxy = self.sum_ty - self.sum_t * self.sum_y / self.n
+        syy = self.sum_yy - self.sum_y * self.sum_y / self.n
+
+        slope = sxy / sxx
+        intercept = (self.sum_y - slope * self.sum_t) / self.n
+        residual = max(syy - slope * sxy, 0.0) / (self.n - 2)
+        slope_se = math.sqrt(residual / sxx)
+
+        latest_t = self.samples[-1][0] - self.origin
+        return slope, intercept + slope * latest_t, slope_se
+
+    def span(self):
+        """창에 들어 있는 샘플의 시간 폭 (초)"""
+        return self.samples[-1][0] - self.samples[0][0] if self.samples else 0.0
+
+
+class TemperatureForecaster:
+    """온도 추세로 적정 범위 이탈까지 남은 시간 예측
+
+    update()는 새 온도 샘플마다 호출하고, get_forecast()는 최신 예측을 반환합니다.
+    예측 결과:
+        {'direction': 'hot'/'cold', 'threshold', 'eta_seconds', 'eta_low', 'eta_high',
+         'confidence', 'slope_per_minute', 'window'}
+        또는 None (이탈 추세 없음/신뢰도 부족/예측 범위 밖)
+    """
+
+    def __init__(self, windows=FORECAST_WINDOWS, upper=None, lower=None, horizon=FORECAST_HORIZON,
+                 min_confidence=FORECAST_MIN_CONFIDENCE, min_slope=FORECAST_MIN_SLOPE,
+                 min_samples=FORECAST_MIN_SAMPLES):
+        self.fits = [RollingLinearFit(window) for window in windows]
+        # 적정 범위 경계: critical_hot 시작 온도와 critical_cold 끝 온도
+        self.upper = upper if upper is not None else TEMP_RANGES['critical_hot'][0]
+        self.lower = lower if lower is not None else TEMP_RANGES['critical_cold'][1]
+        self.horizon = horizon
+        self.min_confidence = min_confidence
+        self.min_slope = min_slope / 60.0   # °C/초
+        self.min_samples = min_samples
+        self.forecast = None
+        self.updated_at = None   # 마지막 샘플 시각 (get_forecast의 max_age 판단용)
+
+    def update(self, temperature, now=None):
+        """새 온도 샘플 반영 후 예측 갱신"""
+        if temperature is None:
+            return self.forecast
+        if now is None:
+            now = time.time()
+        for fit in self.fits:
+            fit.update(now, temperature)
+        self.updated_at = now
+        self.forecast = self._predict()
+        return self.forecast
+
+    def _predict(self):
+        best = None
+        for fit in self.fits:
+            # 창이 다 찬 뒤에만 사용 (시작 직후의 짧은 구간 추세는 불안정)
+            if fit.n < self.min_samples or fit.span() < fit.window * 0.95:
+                continue
+            result = fit.fit()
+            if result is None:
+                continue
+            slope, current, slope_se = result
+
+            if slope > 0 and current < self.upper:
+                direction, threshold, distance = 'hot', self.upper, self.upper - current
+            elif slope < 0 and current > self.lower:
+                direction, threshold, distance = 'cold', self.lower, current - self.lower
+            else:
+                continue
+
+            speed = abs(slope)
+            if speed < self.min_slope:
+                continue
+            # 기울기가 0보다 크다(작다)는 신뢰도
+            confidence = _normal_cdf(speed / slope_se) if slope_se > 0 else 1.0
+            if confidence < self.min_confidence:
+                continue
+
+            eta = distance / speed
+            if eta > self.horizon:
+                continue
+
+            fast = speed + Z_90 * slope_se
+            slow = speed - Z_90 * slope_se
+            forecast = {
+                'direction': direction,
+                'threshold': threshold,
+                'eta_seconds': eta,
+                'eta_low': distance / fast,
+                'eta_high': distance / slow if slow > 0 else None,
+                'confidence': confidence,
+                'slope_per_minute': slope * 60,
+                'window': fit.window
+            }
+            if best is None or eta < best['eta_seconds']:
+                best = forecast
+        return best
+
+    def get_forecast(self, max_age=None, now=None):
+        """마지막 예측 (max_age초 넘게 새 샘플이 없었으면 None)"""
+        if max_age is not None and self.updated_at is not None:
+            if (now if now is not None else time.time()) - self.updated_at > max_age:
+                return None
+        return self.forecast
+
+
+def benchmark_scenario(scenario, duration=3600.0, sample_interval=0.1, onset=60.0, seed=None):
+    """TemperatureSimulator 고장 시나리오로 예측 성능 측정
+
+    Returns:
+        {'scenario', 'crossing_time'(실제 8°C 초과 시각), 'first_warning'(첫 예측 시각),
+         'lead_time'(초, 경고가 얼마나 먼저 나왔는지),
+         'false_warning_seconds'(이탈하지 않은 시나리오에서 경고가 켜져 있던 시간), 'us_per_update'}
+    """
+    import random
+    from temperature_filter import TemperatureFilter
+    from temperature_simulator import TemperatureSimulator
+
+    if seed is not None:
+        random.seed(seed)
+
+    simulator = TemperatureSimulator(scenario=scenario, scenario_onset=onset, sample_interval=sample_interval)
+    temp_filter = TemperatureFilter()
+    forecaster = TemperatureForecaster()
+
+    crossing_time = None
+    first_warning = None
+    warning_samples = 0
+    elapsed_update = 0.0
+    steps = int(duration / sample_interval)
+
+    for step in range(steps):
+        now = step * sample_interval
+        temperature = temp_filter.update(simulator.read())
+
+        started = time.perf_counter()
+        forecast = forecaster.update(temperature, now)
+        elapsed_update += time.perf_counter() - started
+
+        if crossing_time is None and temperature >= forecaster.upper:
+            crossing_time = now
+        if forecast and forecast['direction'] == 'hot':
+            warning_samples += 1
+            if first_warning is None:
+                first_warning = now
+
+    lead_time = None
+    if crossing_time is not None and first_warning is not None:
+        lead_time = crossing_time - first_warning
+
+    return {
+        'scenario': scenario or 'normal',
+        'crossing_time': crossing_time,
+        'first_warning': first_warning,
+        'lead_time': lead_time,
+        'false_warning_seconds': warning_samples * sample_interval if crossing_time is None else 0.0,
+        'us_per_update': elapsed_update / steps * 1e6
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from temperature_simulator import SCENARIOS
+
+    parser = argparse.ArgumentParser(description="온도 이탈 예측 벤치마크 (시뮬레이터 고장 시나리오)")
+    parser.add_argument('--duration', type=float, default=3600.0, help="시뮬레이션 시간 (초)")
+    parser.add_argument('--seed', type=int, default=1, help="난수 시드")
+    args = parser.parse_args()
+
+    for scenario in (None,) + SCENARIOS:
+        result = benchmark_scenario(scenario, duration=args.duration, seed=args.seed)
+        fmt = lambda value: f"{value:.0f}초" if value is not None else "-"
+        print(
+            f"{result['scenario']:<20} 8°C 초과: {fmt(result['crossing_time']):>7}  "
+            f"첫 경고: {fmt(result['first_warning']):>7}  선행: {fmt(result['lead_time']):>7}  "
+            f"오경보: {fmt(result['false_warning_seconds']):>6}  갱신 {result['us_per_update']:.1f}µs"
+        )
@@ -9,25 +9,39 @@ import random
 import math
 import time
 from config import TEMP_RANGES
+from excursion_engine import classify_temperature
 
 logger = logging.getLogger(__name__)
 
+# 고장 시나리오 (예측/경보 벤치마크용)
+SCENARIOS = ('compressor_failure', 'door_open', 'slow_drift')
+AMBIENT_TEMP = 25.0  # 냉각이 멈췄을 때 수렴하는 외기 온도
+
 
 class TemperatureSimulator:
     """백신 운송용 냉장 온도를 시뮬레이션하는 클래스"""
 
-    def __init__(self, target_temp=5.0):
+    def __init__(self, target_temp=5.0, scenario=None, scenario_onset=60.0, sample_interval=0.1):
         """
         온도 시뮬레이터 초기화
 
         Args:
             target_temp: 목표 온도 (백신 운송 적정 온도, 기본 5°C)
+            scenario: 고장 시나리오 (None, 'compressor_failure', 'door_open', 'slow_drift')
+            scenario_onset: 시나리오 시작 시점 (시뮬레이션 시간, 초)
+            sample_interval: read() 1회당 시뮬레이션 시간 (초)
         """
         # 백신 운송 적정 온도 범위: 2°C ~ 8°C
         self.target_temp = max(2.0, min(8.0, target_temp))  # 범위 제한
         self.current_temp = self.target_temp + random.uniform(-0.5, 0.5)  # 초기 온도 (목표 주변)
         self.update_count = 0
 
+        if scenario is not None and scenario not in SCENARIOS:
+            raise ValueError(f"지원하지 않는 시나리오: {scenario} (가능: {', '.join(SCENARIOS)})")
+        self.scenario = scenario
+        self.scenario_onset = scenario_onset
+        self.sample_interval = sample_interval
+
         # 온도 상태 범위 설정 (config.py에서 가져옴)
         self.temp_ranges = TEMP_RANGES
 
@@ -35,10 +49,7 @@ class TemperatureSimulator:
     
     def get_temperature_status(self, temperature):
         """온도값에 따른 상태 판단"""
-        for status, (min_temp, max_temp) in self.temp_ranges.items():
-            if min_temp <= temperature < max_temp:
-                return status
-        return 'normal'  # 기본값
+        return classify_temperature(temperature, self.temp_ranges)
 
     def read(self):
         """
@@ -74,11 +85,34 @@ class TemperatureSimulator:
             temperature += random.uniform(1.0, 3.0)  # 온도 상승 이벤트
             # logger.debug(f"냉장 시스템 이상 감지 (온도 상승: {temperature:.1f}°C)")  # 디버그 레벨로 변경
 
+        # ━━━━━ 고장 시나리오 (범위 제한 없이 더함) ━━━━━
+        if self.scenario:
+            temperature += self.scenario_offset(self.update_count * self.sample_interval)
+
         # 소수점 2자리로 반올림
         temperature = round(temperature, 2)
 
         return temperature
 
+    def scenario_offset(self, elapsed):
+        """시나리오에 따른 온도 변화량 (시작 전에는 0)"""
+        t = elapsed - self.scenario_onset
+        if t < 0:
+            return 0.0
+
+        if self.scenario == 'compressor_failure':
+            # 냉각 정지: 외기 온도로 지수적으로 수렴 (시정수 40분, 약 6.5분 후 8°C 초과)
+            return (AMBIENT_TEMP - self.target_temp) * (1 - math.exp(-t / 2400))
+        if self.scenario == 'door_open':
+            # 2분간 문 열림 후 닫힘: 빠르게 올랐다가 냉각으로 회복 (8°C는 넘지 않음)
+            if t < 120:
+                return 2.5 * (1 - math.exp(-t / 60))
+            return 2.5 * (1 - math.exp(-2)) * math.exp(-(t - 120) / 180)
+        if self.scenario == 'slow_drift':
+            # 냉매 누설 등 완만한 상승 (10분에 0.5°C)
+            return t / 600 * 0.5
+        return 0.0
+
     def read_with_status(self):
         """온도와 상태 정보를 함께 반환"""
         temperature = self.read()